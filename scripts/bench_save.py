@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+保存処理ベンチマーク
+
+成長記録データの保存を、以前の「本体を "w" で開いて json.dump する」書き方と、
+一時ファイル → fsync → rename の各段階、および save_records 全体（ロック・旧版の保存を含む）で比べる。
+データは一時ディレクトリへ複製して使うため、リポジトリのデータや Git 履歴は変更しない。
+
+Usage:
+  python scripts/bench_save.py
+  python scripts/bench_save.py --repeat 50 --scale 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from homepage_tools.paths import PUBLIC_DIR
+from homepage_tools.locking import lock_file_for
+from homepage_tools.records import load_records, save_records
+from homepage_tools.snapshots import snapshot_dir_for
+from homepage_tools.storage import format_bytes, replace_file
+
+BENCH_DATA_NAME = "bench-records.json"
+
+
+def write_direct(data_file: Path, records: list[dict[str, Any]]) -> None:
+    with data_file.open("w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def write_renamed(data_file: Path, records: list[dict[str, Any]]) -> None:
+    payload = (json.dumps(records, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+    temp_file = data_file.with_name(f".{data_file.name}.tmp")
+    temp_file.write_bytes(payload)
+    os.replace(temp_file, data_file)
+
+
+def write_fsynced(data_file: Path, records: list[dict[str, Any]]) -> None:
+    replace_file(data_file, (json.dumps(records, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+
+def write_saved(data_file: Path, records: list[dict[str, Any]]) -> None:
+    save_records(data_file, records)
+
+
+BENCH_WRITERS: dict[str, Callable[[Path, list[dict[str, Any]]], None]] = {
+    "直接書き込み": write_direct,
+    "一時ファイル+rename": write_renamed,
+    "+fsync": write_fsynced,
+    "save_records 全体": write_saved,
+}
+
+
+def scaled_records(records: list[dict[str, Any]], scale: int) -> list[dict[str, Any]]:
+    scaled: list[dict[str, Any]] = []
+    for round_index in range(scale):
+        for record in records:
+            scaled.append({**record, "id": len(scaled) + 1, "title": f'{record["title"]} #{round_index + 1}'})
+    return scaled
+
+
+def bench_writers(data_file: Path, records: list[dict[str, Any]], repeat: int) -> dict[str, list[float]]:
+    timings: dict[str, list[float]] = {name: [] for name in BENCH_WRITERS}
+
+    # 1回目はキャッシュを温めるだけで計測しない。負荷の揺れが偏らないよう、毎回すべての方式を順に実行する
+    for index in range(repeat + 1):
+        for name, writer in BENCH_WRITERS.items():
+            start = time.perf_counter()
+            writer(data_file, records)
+            elapsed = time.perf_counter() - start
+            if index:
+                timings[name].append(elapsed)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="データ保存の所要時間を、直接書き込みと安全な置き換えで比較します。")
+    parser.add_argument("--repeat", type=int, default=20, help="各方式の計測回数（デフォルト: 20）")
+    parser.add_argument("--scale", type=int, default=1, help="データを何倍に増やして計測するか（デフォルト: 1）")
+    args = parser.parse_args()
+
+    if args.repeat < 1 or args.scale < 1:
+        print("エラー: --repeat と --scale は 1 以上を指定してください。")
+        return 1
+
+    records = scaled_records(load_records(PUBLIC_DIR / "records-data.json"), args.scale)
+    if not records:
+        print("エラー: 計測に使う成長記録がありません。")
+        return 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = Path(temp_dir) / BENCH_DATA_NAME
+        write_direct(data_file, records)
+        size = data_file.stat().st_size
+        try:
+            timings = bench_writers(data_file, records, args.repeat)
+        finally:
+            # 旧版とロックファイルは .tool-state 側に作られるので、計測用の分を片付ける
+            shutil.rmtree(snapshot_dir_for(data_file), ignore_errors=True)
+            lock_file_for(data_file).unlink(missing_ok=True)
+
+    baseline = statistics.median(timings["直接書き込み"]) * 1000
+    print(f"{'方式':<20}{'中央値':>10}{'直接書き込み比':>10}")
+    for name, samples in timings.items():
+        median = statistics.median(samples) * 1000
+        ratio = median / baseline if baseline else 0.0
+        print(f"{name:<22}{median:>10.2f}ms{ratio:>10.1f}x")
+    print(f"{len(records)} 件 / {format_bytes(size)} / 各 {args.repeat} 回の中央値 / Python {sys.version.split()[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
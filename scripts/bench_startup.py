@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+CLI 起動時間ベンチマーク
+
+records_tool / shop_tool の CLI コマンドを別プロセスで繰り返し起動し、
+以前のように Tk を先に読み込んだ場合と、現在の遅延読み込みの場合の所要時間（中央値）を比べる。
+データは一時ディレクトリへ複製して使うため、リポジトリのデータや Git 履歴は変更しない。
+
+Usage:
+  python scripts/bench_startup.py
+  python scripts/bench_startup.py --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from homepage_tools.locking import lock_file_for
+from homepage_tools.snapshots import snapshot_dir_for
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent
+RECORDS_TOOL = SCRIPTS_DIR / "records_tool.py"
+SHOP_TOOL = SCRIPTS_DIR / "shop_tool.py"
+BENCH_YOUTUBE_URL = "https://youtu.be/dQw4w9WgXcQ"
+BENCH_MODES = ("eager", "lazy")
+# .tool-state の旧版やロックはファイル名ごとに作られるので、本物のデータと重ならない名前で複製する
+BENCH_DATA_NAMES = {"records-data.json": "bench-records.json", "works-data.json": "bench-works.json"}
+
+# run_path はスクリプトのディレクトリを sys.path に足さないので、直接実行と同じになるよう先頭に入れる
+LAUNCHER = """
+import os
+import runpy
+import sys
+
+if sys.argv[1] == "eager":
+    import tkinter
+    import tkinter.filedialog
+    import tkinter.messagebox
+    import tkinter.ttk
+
+script = sys.argv[2]
+sys.argv = sys.argv[2:]
+sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+runpy.run_path(script, run_name="__main__")
+"""
+
+
+def run_tool(mode: str, script: Path, args: list[str]) -> float:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", LAUNCHER, mode, str(script), *args],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{script.name} {' '.join(args)} が失敗しました:\n{result.stdout}{result.stderr}")
+    return elapsed
+
+
+def loads_tkinter(script: Path, args: list[str]) -> bool:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(script), *args],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    return any(line.rstrip().endswith("tkinter") for line in result.stderr.splitlines())
+
+
+def last_record_id(data_file: Path) -> int:
+    with data_file.open("r", encoding="utf-8") as f:
+        return max(int(item["id"]) for item in json.load(f))
+
+
+def run_commands(work_dir: Path, mode: str) -> dict[str, float]:
+    records_file = work_dir / BENCH_DATA_NAMES["records-data.json"]
+    records_args = ["--data-file", str(records_file)]
+    samples = {
+        "records list": run_tool(mode, RECORDS_TOOL, [*records_args, "list"]),
+        "records add": run_tool(
+            mode,
+            RECORDS_TOOL,
+            [*records_args, "add", "--title", "ベンチ", "--description", "起動時間計測", "--youtube", BENCH_YOUTUBE_URL],
+        ),
+    }
+    samples["records delete"] = run_tool(
+        mode, RECORDS_TOOL, [*records_args, "delete", "--id", str(last_record_id(records_file))]
+    )
+    samples["shop list"] = run_tool(
+        mode, SHOP_TOOL, ["--data-file", str(work_dir / BENCH_DATA_NAMES["works-data.json"]), "list", "--type", "games"]
+    )
+    return samples
+
+
+def bench_commands(work_dir: Path, repeat: int) -> dict[str, dict[str, list[float]]]:
+    timings: dict[str, dict[str, list[float]]] = {mode: {} for mode in BENCH_MODES}
+
+    # 1回目はディスクキャッシュを温めるだけで計測しない。負荷の揺れが片方に偏らないよう、毎回交互に実行する
+    for index in range(repeat + 1):
+        for mode in BENCH_MODES:
+            samples = run_commands(work_dir, mode)
+            if index == 0:
+                continue
+            for name, elapsed in samples.items():
+                timings[mode].setdefault(name, []).append(elapsed)
+
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CLI コマンドの起動時間を Tk の先読みあり/なしで比較します。")
+    parser.add_argument("--repeat", type=int, default=10, help="各コマンドの計測回数（デフォルト: 10）")
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        print("エラー: --repeat は 1 以上を指定してください。")
+        return 1
+
+    for script, tool_args in ((RECORDS_TOOL, ["list"]), (SHOP_TOOL, ["list"])):
+        if loads_tkinter(script, tool_args):
+            print(f"警告: {script.name} {' '.join(tool_args)} で tkinter が読み込まれています。")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        for name, bench_name in BENCH_DATA_NAMES.items():
+            shutil.copy2(ROOT_DIR / "public" / name, work_dir / bench_name)
+
+        try:
+            timings = bench_commands(work_dir, args.repeat)
+        except RuntimeError as exc:
+            print(f"エラー: {exc}")
+            return 1
+        finally:
+            # 旧版とロックファイルは .tool-state 側に作られるので、計測用の分を片付ける
+            for bench_name in BENCH_DATA_NAMES.values():
+                shutil.rmtree(snapshot_dir_for(work_dir / bench_name), ignore_errors=True)
+                lock_file_for(work_dir / bench_name).unlink(missing_ok=True)
+
+    print(f"{'コマンド':<12}{'Tk先読み':>9}{'遅延読込':>7}{'短縮':>9}")
+    for name, eager in timings["eager"].items():
+        before = statistics.median(eager) * 1000
+        after = statistics.median(timings["lazy"][name]) * 1000
+        ratio = (before - after) / before * 100 if before else 0.0
+        print(f"{name:<16}{before:>9.1f}ms{after:>9.1f}ms{before - after:>9.1f}ms ({ratio:.0f}%)")
+    print(f"各 {args.repeat} 回の中央値 / Python {sys.version.split()[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""records_tool / shop_tool で共有するデータ層。"""
@@ -0,0 +1,204 @@
+"""レスポンシブ用の派生画像（WebP / AVIF）とマニフェスト。"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+from .paths import PUBLIC_DIR, STATE_DIR
+from .normalize import unique_strings
+from .images import DERIVED_DIR_NAME, file_sha256, resolve_public_image_path
+from .storage import replace_file
+
+
+IMAGE_MANIFEST_FILE = PUBLIC_DIR / "image-manifest.json"
+# mtime はクローンごとに変わるのでマニフェストには入れず、手元の作業用ファイルに持つ
+DERIVE_STAT_FILE = STATE_DIR / "derive-stat.json"
+DERIVABLE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+DERIVED_WIDTHS = (480, 960, 1600)
+THUMBNAIL_WIDTH = 240
+DERIVED_FORMATS = ("webp", "avif")
+DERIVED_QUALITY = 80
+
+
+def is_derivable_image(path: Path) -> bool:
+    return path.suffix.lower() in DERIVABLE_EXTENSIONS
+
+
+def load_image_manifest(manifest_file: Path) -> dict[str, Any]:
+    if not manifest_file.exists():
+        return {"version": 1, "images": {}}
+    with manifest_file.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("images"), dict):
+        return {"version": 1, "images": {}}
+    return data
+
+
+def save_image_manifest(manifest_file: Path, manifest: dict[str, Any]) -> None:
+    manifest["images"] = dict(sorted(manifest["images"].items()))
+    for entry in manifest["images"].values():
+        # 以前のマニフェストに入っていた手元の mtime は書き出さない
+        if isinstance(entry, dict):
+            entry.pop("mtimeNs", None)
+    replace_file(manifest_file, (json.dumps(manifest, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+
+def manifest_variant_paths(entry: dict[str, Any]) -> list[str]:
+    variants = list(entry.get("variants", [])) + list(entry.get("thumbnails", []))
+    return [variant["path"] for variant in variants if isinstance(variant, dict) and isinstance(variant.get("path"), str)]
+
+
+def load_derive_stats(stat_file: Path) -> dict[str, Any]:
+    """画像参照ごとの [サイズ, mtime, 内容のハッシュ]。ハッシュを計算し直さずに変更の有無を判断するのに使う。"""
+    try:
+        with stat_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_derive_stats(stat_file: Path, stats: dict[str, Any]) -> None:
+    replace_file(stat_file, json.dumps(stats, ensure_ascii=False).encode("utf-8"))
+
+
+def derived_widths(width: int) -> list[int]:
+    """DERIVED_WIDTHS のうち元より小さい幅と、最大幅に届かない元画像ならその幅そのもの。"""
+    widths = [derived for derived in DERIVED_WIDTHS if derived < width]
+    if width <= DERIVED_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def is_manifest_entry_complete(public_dir: Path, entry: Any) -> bool:
+    if not isinstance(entry, dict) or not isinstance(entry.get("width"), int):
+        return False
+    widths = {variant.get("width") for variant in entry.get("variants", []) if isinstance(variant, dict)}
+    if widths != set(derived_widths(entry["width"])):
+        return False
+    return all((public_dir / path).is_file() for path in manifest_variant_paths(entry))
+
+
+def encode_variant(image: Any, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=DERIVED_QUALITY)
+    return buffer.getvalue()
+
+
+def render_variants(
+    public_dir: Path,
+    image: Any,
+    widths: list[int],
+    content_hash: str,
+    label: str,
+    unsupported: set[str],
+) -> list[dict[str, Any]]:
+    from PIL import Image
+
+    derived_dir = public_dir / DERIVED_DIR_NAME
+    derived_dir.mkdir(parents=True, exist_ok=True)
+    variants: list[dict[str, Any]] = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in DERIVED_FORMATS:
+            if fmt in unsupported:
+                continue
+            try:
+                payload = encode_variant(resized, fmt)
+            except (KeyError, OSError):
+                # AVIF などエンコーダが無い形式はスキップする
+                unsupported.add(fmt)
+                continue
+            target = derived_dir / f"{content_hash[:16]}-{label or width}.{fmt}"
+            target.write_bytes(payload)
+            variants.append(
+                {
+                    "path": target.relative_to(public_dir).as_posix(),
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "bytes": len(payload),
+                    "hash": hashlib.sha256(payload).hexdigest(),
+                }
+            )
+    return variants
+
+
+def build_image_derivatives(
+    public_dir: Path,
+    manifest: dict[str, Any],
+    image_refs: list[str],
+    unsupported: set[str],
+) -> tuple[list[str], list[str], list[str]]:
+    """画像参照ごとに派生画像を生成し、(生成, スキップ, エラー) を返す。"""
+    from PIL import Image
+
+    entries: dict[str, Any] = manifest["images"]
+    stats = load_derive_stats(DERIVE_STAT_FILE)
+    generated: list[str] = []
+    skipped: list[str] = []
+    errors: list[str] = []
+
+    for image_ref in unique_strings(image_refs):
+        source = resolve_public_image_path(public_dir, image_ref)
+        if source is None or not source.is_file():
+            errors.append(f"{image_ref}: public 配下に見つかりません。")
+            continue
+        if not is_derivable_image(source):
+            skipped.append(image_ref)
+            continue
+
+        stat = source.stat()
+        previous = entries.get(image_ref)
+        cached = stats.get(image_ref)
+        if isinstance(cached, list) and len(cached) == 3 and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            content_hash = cached[2]
+        else:
+            content_hash = file_sha256(source)
+            stats[image_ref] = [stat.st_size, stat.st_mtime_ns, content_hash]
+        if (
+            isinstance(previous, dict)
+            and previous.get("hash") == content_hash
+            and is_manifest_entry_complete(public_dir, previous)
+        ):
+            skipped.append(image_ref)
+            continue
+
+        try:
+            with Image.open(source) as opened:
+                opened.load()
+                image = opened.convert("RGBA" if "A" in opened.getbands() else "RGB")
+        except Exception as exc:  # noqa: BLE001
+            errors.append(f"{image_ref}: 画像を読み込めません: {exc}")
+            continue
+
+        variants = render_variants(public_dir, image, derived_widths(image.width), content_hash, "", unsupported)
+        thumbnails = render_variants(
+            public_dir, image, [min(THUMBNAIL_WIDTH, image.width)], content_hash, "thumb", unsupported
+        )
+
+        entry = {
+            "hash": content_hash,
+            "bytes": stat.st_size,
+            "width": image.width,
+            "height": image.height,
+            "variants": variants,
+            "thumbnails": thumbnails,
+        }
+        entries[image_ref] = entry
+        if isinstance(previous, dict):
+            # 派生画像は内容のハッシュで名前が決まるので、同じ内容の別の画像参照と共有していることがある
+            in_use = {
+                path for other in entries.values() if isinstance(other, dict) for path in manifest_variant_paths(other)
+            }
+            for path in set(manifest_variant_paths(previous)) - in_use:
+                (public_dir / path).unlink(missing_ok=True)
+        generated.append(image_ref)
+
+    save_derive_stats(DERIVE_STAT_FILE, stats)
+    return (generated, skipped, errors)
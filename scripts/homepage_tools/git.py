@@ -0,0 +1,230 @@
+"""Git の commit/push と、GUI 用のバックグラウンド同期。"""
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from .paths import ROOT_DIR
+from .normalize import unique_strings
+
+
+GIT_SYNC_DEBOUNCE_SECONDS = 1.5
+
+
+def run_git_command(git_root: Path, args: list[str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        ["git", "-C", str(git_root), *args],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+
+
+def find_git_root(start_dir: Path) -> Path | None:
+    result = subprocess.run(
+        ["git", "-C", str(start_dir), "rev-parse", "--show-toplevel"],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if result.returncode != 0:
+        return None
+
+    git_root_text = result.stdout.strip()
+    if not git_root_text:
+        return None
+
+    git_root = Path(git_root_text).resolve()
+    return git_root if git_root.exists() else None
+
+
+def format_git_failure(prefix: str, result: subprocess.CompletedProcess[str]) -> str:
+    details = (result.stderr or result.stdout or "").strip()
+    return f"{prefix}: {details}" if details else prefix
+
+
+def parse_porcelain_paths(output: str) -> list[str]:
+    """git status --porcelain -z の出力から変更のあるパスを取り出す。"""
+    paths: list[str] = []
+    tokens = output.split("\0")
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+        if len(token) < 4:
+            continue
+        paths.append(token[3:])
+        if token[0] in "RC":
+            # リネーム/コピーは直後に元のパスが続く
+            index += 1
+    return paths
+
+
+class GitSession:
+    """Git のルートをプロセス内でキャッシュし、commit/push の各ステップの所要時間を記録する。"""
+
+    def __init__(self, start_dir: Path):
+        self.start_dir = start_dir
+        self.root: Path | None = None
+        self.lock = threading.Lock()
+        self.timings: list[tuple[str, float]] = []
+        self.last_timings: list[tuple[str, float]] = []
+
+    def _run(self, step: str, args: list[str]) -> subprocess.CompletedProcess[str]:
+        assert self.root is not None
+        started = time.perf_counter()
+        result = run_git_command(self.root, args)
+        self.timings.append((step, time.perf_counter() - started))
+        return result
+
+    def resolve_root(self) -> Path | None:
+        if self.root is None:
+            started = time.perf_counter()
+            self.root = find_git_root(self.start_dir)
+            self.timings.append(("rev-parse", time.perf_counter() - started))
+        return self.root
+
+    def relative_paths(self, paths: list[Path]) -> list[str]:
+        assert self.root is not None
+        relative_paths: list[str] = []
+        seen: set[str] = set()
+        for path in paths:
+            resolved = path.resolve()
+            try:
+                rel = resolved.relative_to(self.root).as_posix()
+            except ValueError:
+                continue
+
+            if rel in seen:
+                continue
+            seen.add(rel)
+            relative_paths.append(rel)
+        return relative_paths
+
+    def commit_and_push(self, paths: list[Path], commit_message: str) -> tuple[bool, str]:
+        with self.lock:
+            self.timings = []
+            try:
+                return self._commit_and_push(paths, commit_message)
+            finally:
+                self.last_timings = list(self.timings)
+
+    def _commit_and_push(self, paths: list[Path], commit_message: str) -> tuple[bool, str]:
+        if self.resolve_root() is None:
+            return (False, "Gitリポジトリが見つかりません。")
+
+        relative_paths = self.relative_paths(paths)
+        if not relative_paths:
+            return (False, "コミット対象のファイルが見つかりません。")
+
+        # 変更の有無と対象パスを1回の status で調べ、変更のあるパスだけを add/commit する
+        status_result = self._run(
+            "status",
+            ["status", "--porcelain", "-z", "--untracked-files=all", "--", *relative_paths],
+        )
+        if status_result.returncode != 0:
+            return (False, format_git_failure("差分確認に失敗しました", status_result))
+        changed_paths = parse_porcelain_paths(status_result.stdout)
+        if not changed_paths:
+            return (False, "コミット対象に変更がありません。")
+
+        add_result = self._run("add", ["add", "-A", "--", *changed_paths])
+        if add_result.returncode != 0:
+            return (False, format_git_failure("git add に失敗しました", add_result))
+
+        commit_result = self._run("commit", ["commit", "-m", commit_message, "--", *changed_paths])
+        if commit_result.returncode != 0:
+            return (False, format_git_failure("git commit に失敗しました", commit_result))
+
+        push_result = self._run("push", ["push"])
+        if push_result.returncode != 0:
+            return (False, format_git_failure("git push に失敗しました", push_result))
+
+        return (True, f"Git commit/push 完了: {commit_message}")
+
+    def timing_summary(self) -> str:
+        return " / ".join(f"{step} {seconds * 1000:.0f}ms" for step, seconds in self.last_timings)
+
+
+GIT_SESSION = GitSession(ROOT_DIR)
+
+
+def git_commit_and_push(paths: list[Path], commit_message: str) -> tuple[bool, str]:
+    return GIT_SESSION.commit_and_push(paths, commit_message)
+
+
+class GitSyncWorker:
+    """Git の commit/push を別スレッドで実行する。短時間に積まれた依頼は1回の commit/push にまとめる。"""
+
+    def __init__(self, debounce_seconds: float = GIT_SYNC_DEBOUNCE_SECONDS):
+        self.debounce_seconds = debounce_seconds
+        self.jobs: queue.Queue[tuple[list[Path], str, Callable[[], None] | None] | None] = queue.Queue()
+        self.results: queue.Queue[tuple[bool, str]] = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.thread = threading.Thread(target=self._run, name="git-sync", daemon=True)
+        self.thread.start()
+
+    def submit(
+        self,
+        paths: list[Path],
+        commit_message: str,
+        on_success: Callable[[], None] | None = None,
+    ) -> None:
+        """on_success は commit/push が成功したときにワーカースレッド上で呼ばれる。"""
+        with self.lock:
+            self.pending += 1
+        self.jobs.put((paths, commit_message, on_success))
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return self.pending
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.jobs.put(None)
+        self.thread.join(timeout)
+
+    def _collect_batch(
+        self,
+        first: tuple[list[Path], str, Callable[[], None] | None],
+    ) -> tuple[list[tuple[list[Path], str, Callable[[], None] | None]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.debounce_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                return (batch, False)
+            if job is None:
+                return (batch, True)
+            batch.append(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            batch, stop_requested = self._collect_batch(job)
+            paths = [path for job_paths, _, _ in batch for path in job_paths]
+            messages = unique_strings([message for _, message, _ in batch])
+            try:
+                result = git_commit_and_push(paths, ", ".join(messages))
+                if result[0]:
+                    for _, _, on_success in batch:
+                        if on_success is not None:
+                            on_success()
+            except Exception as exc:  # noqa: BLE001
+                result = (False, f"Git同期でエラーが発生しました: {exc}")
+            with self.lock:
+                self.pending -= len(batch)
+            self.results.put(result)
+            if stop_requested:
+                return
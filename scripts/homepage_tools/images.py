@@ -0,0 +1,326 @@
+"""public/ 配下の画像一覧（増分インデックス）と画像ファイルの取り込み。"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from .paths import STATE_DIR
+from .normalize import normalize_image_reference
+
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".svg", ".avif"}
+DERIVED_DIR_NAME = "_derived"
+IMAGE_INDEX_FILE = STATE_DIR / "public-image-index.json"
+IMAGE_INDEX_VERSION = 1
+IMAGE_INDEX_RACY_NS = 2_000_000_000
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def resolve_public_image_path(public_dir: Path, image_ref: str) -> Path | None:
+    normalized = normalize_image_reference(image_ref)
+    if not normalized:
+        return None
+
+    target = (public_dir / normalized).resolve()
+    try:
+        target.relative_to(public_dir.resolve())
+    except ValueError:
+        return None
+
+    return target
+
+
+def is_image_file(path: Path) -> bool:
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def read_image_size(path: Path) -> tuple[int, int] | None:
+    """画像ヘッダーだけを読んで (幅, 高さ) を返す。未対応の形式は None。"""
+    try:
+        with path.open("rb") as f:
+            head = f.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:2] == b"BM":
+                width, height = struct.unpack("<ii", head[18:26])
+                return (width, abs(height))
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8X":
+                    return (int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1)
+                if chunk == b"VP8 ":
+                    width, height = struct.unpack("<HH", head[26:30])
+                    return (width & 0x3FFF, height & 0x3FFF)
+                if chunk == b"VP8L":
+                    bits = int.from_bytes(head[21:25], "little")
+                    return ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+                return None
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    if marker[1] in JPEG_SOF_MARKERS:
+                        f.read(3)
+                        height, width = struct.unpack(">HH", f.read(4))
+                        return (width, height)
+                    length = struct.unpack(">H", f.read(2))[0]
+                    f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+class PublicImageIndex:
+    """public 配下の画像一覧をディスクにキャッシュし、ディレクトリの mtime が変わった所だけ走査し直す。
+
+    サーバーでは複数のスレッドから使われるので、一覧を読み書きする操作は lock の中で行う。
+    """
+
+    def __init__(self, public_dir: Path, index_file: Path):
+        self.public_dir = public_dir
+        self.index_file = index_file
+        self.dirs: dict[str, dict[str, Any]] = {}
+        self.files: dict[str, dict[str, Any]] = {}
+        self.dirty = False
+        # 一覧が変わるたびに増える。監視側はこれを覚えておき、他の呼び出しで refresh された変化も取りこぼさない
+        self.generation = 0
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with self.index_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != IMAGE_INDEX_VERSION:
+            return
+        if data.get("publicDir") != str(self.public_dir.resolve()):
+            return
+        if isinstance(data.get("dirs"), dict) and isinstance(data.get("files"), dict):
+            self.dirs = data["dirs"]
+            self.files = data["files"]
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            payload = {
+                "version": IMAGE_INDEX_VERSION,
+                "publicDir": str(self.public_dir.resolve()),
+                "dirs": self.dirs,
+                "files": self.files,
+            }
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.index_file.with_name(f"{self.index_file.name}.{os.getpid()}.tmp")
+            with temp_file.open("w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(temp_file, self.index_file)
+            self.dirty = False
+
+    def refresh(self) -> bool:
+        """変更のあったディレクトリだけを走査し直し、一覧が変わったかを返す。"""
+        with self.lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        if not self.public_dir.exists():
+            changed = bool(self.files)
+            self.dirs = {}
+            self.files = {}
+            self.dirty = self.dirty or changed
+            self.generation += changed
+            return changed
+
+        changed = False
+        visited: set[str] = set()
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            visited.add(rel_dir)
+            try:
+                mtime_ns = (self.public_dir / rel_dir).stat().st_mtime_ns
+            except OSError:
+                continue
+            cached = self.dirs.get(rel_dir)
+            if cached is None or cached.get("mtimeNs") != mtime_ns:
+                try:
+                    changed = self._scan_dir(rel_dir, mtime_ns) or changed
+                except OSError:
+                    continue
+                # 一覧が同じでも mtime やファイルのサイズは更新しているので、次回また走査しないよう保存する
+                self.dirty = True
+            pending.extend(self.dirs[rel_dir]["subdirs"])
+
+        for rel_dir in set(self.dirs) - visited:
+            for image_ref in self.dirs.pop(rel_dir)["files"]:
+                self.files.pop(image_ref, None)
+            changed = True
+
+        self.dirty = self.dirty or changed
+        self.generation += changed
+        self.save()
+        return changed
+
+    def _scan_dir(self, rel_dir: str, mtime_ns: int) -> bool:
+        subdirs: list[str] = []
+        names: list[str] = []
+        with os.scandir(self.public_dir / rel_dir) as entries:
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if rel != DERIVED_DIR_NAME:
+                        subdirs.append(rel)
+                    continue
+                if not entry.is_file() or not is_image_file(Path(entry.name)):
+                    continue
+                stat = entry.stat()
+                previous = self.files.get(rel)
+                if not previous or previous.get("size") != stat.st_size or previous.get("mtimeNs") != stat.st_mtime_ns:
+                    self.files[rel] = {"size": stat.st_size, "mtimeNs": stat.st_mtime_ns}
+                names.append(rel)
+
+        previous_dir = self.dirs.get(rel_dir, {})
+        for image_ref in set(previous_dir.get("files", [])) - set(names):
+            self.files.pop(image_ref, None)
+
+        # mtime の分解能内に再度変更される可能性があるため、直近の変更は次回も走査し直す
+        if time.time_ns() - mtime_ns < IMAGE_INDEX_RACY_NS:
+            mtime_ns = -1
+        self.dirs[rel_dir] = {"mtimeNs": mtime_ns, "subdirs": sorted(subdirs), "files": sorted(names)}
+        return previous_dir.get("files") != sorted(names) or previous_dir.get("subdirs") != sorted(subdirs)
+
+    def list_images(self) -> list[str]:
+        with self.lock:
+            return sorted(self.files)
+
+    def to_ref(self, image_ref: str) -> str | None:
+        target = resolve_public_image_path(self.public_dir, image_ref)
+        if target is None:
+            return None
+        return target.relative_to(self.public_dir.resolve()).as_posix()
+
+    def exists(self, image_ref: str) -> bool:
+        ref = self.to_ref(image_ref)
+        with self.lock:
+            return ref is not None and ref in self.files
+
+    def info(self, image_ref: str) -> dict[str, Any] | None:
+        """ファイルを stat し直したうえで、ハッシュと寸法を必要に応じて計算して返す。"""
+        ref = self.to_ref(image_ref)
+        with self.lock:
+            entry = self.files.get(ref) if ref else None
+            if entry is None:
+                return None
+            path = self.public_dir / ref
+            try:
+                stat = path.stat()
+            except OSError:
+                return None
+            if entry.get("size") != stat.st_size or entry.get("mtimeNs") != stat.st_mtime_ns:
+                entry.clear()
+                entry.update({"size": stat.st_size, "mtimeNs": stat.st_mtime_ns})
+                self.dirty = True
+            if "hash" not in entry:
+                entry["hash"] = file_sha256(path)
+                size = read_image_size(path)
+                entry["width"], entry["height"] = size if size else (None, None)
+                self.dirty = True
+            return dict(entry)
+
+    def file_hash(self, image_ref: str) -> str | None:
+        entry = self.info(image_ref)
+        return entry["hash"] if entry else None
+
+    def refs_with_size(self, size: int) -> list[str]:
+        with self.lock:
+            return [image_ref for image_ref, entry in self.files.items() if entry.get("size") == size]
+
+
+_public_image_index: PublicImageIndex | None = None
+_public_image_index_lock = threading.Lock()
+
+
+def get_public_image_index(public_dir: Path) -> PublicImageIndex:
+    global _public_image_index
+    with _public_image_index_lock:
+        if _public_image_index is None or _public_image_index.public_dir != public_dir:
+            _public_image_index = PublicImageIndex(public_dir, IMAGE_INDEX_FILE)
+        index = _public_image_index
+    index.refresh()
+    return index
+
+
+def list_public_images(public_dir: Path) -> list[str]:
+    return get_public_image_index(public_dir).list_images()
+
+
+def safe_public_target(public_dir: Path, source_name: str) -> Path:
+    candidate = public_dir / source_name
+    if not candidate.exists():
+        return candidate
+
+    stem = candidate.stem
+    suffix = candidate.suffix
+    counter = 1
+    while True:
+        next_candidate = public_dir / f"{stem}_{counter}{suffix}"
+        if not next_candidate.exists():
+            return next_candidate
+        counter += 1
+
+
+def find_identical_public_image(public_dir: Path, source: Path) -> str | None:
+    """source と同じ内容の画像が public 配下にあればその参照を返す。"""
+    index = get_public_image_index(public_dir)
+    source_hash = ""
+    try:
+        for image_ref in index.refs_with_size(source.stat().st_size):
+            source_hash = source_hash or file_sha256(source)
+            if index.file_hash(image_ref) == source_hash:
+                return image_ref
+        return None
+    finally:
+        index.save()
+
+
+def import_image_to_public(public_dir: Path, source: Path) -> tuple[str, bool]:
+    """public 外の画像を取り込み、(参照, コピーしたか) を返す。同一内容の既存画像があれば再利用する。"""
+    existing = find_identical_public_image(public_dir, source)
+    if existing is not None:
+        return (existing, False)
+
+    target = safe_public_target(public_dir, source.name)
+    shutil.copy2(source, target)
+    return (target.relative_to(public_dir).as_posix(), True)
+
+
+def image_exists_in_public(public_dir: Path, image_ref: str) -> bool:
+    """1件だけ確かめる。続けて何件も確かめるときは get_public_image_index で1度だけ更新し、exists を引く。"""
+    return get_public_image_index(public_dir).exists(image_ref)
+
+
+def image_file_exists(public_dir: Path, image_ref: str) -> bool:
+    """インデックスを更新せず、1件だけ直接 stat して確かめる。数件を確かめるだけの追記向け。"""
+    target = resolve_public_image_path(public_dir, image_ref)
+    return target is not None and is_image_file(target) and target.is_file()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
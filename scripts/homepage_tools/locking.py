@@ -0,0 +1,143 @@
+"""データファイルの助言ロックと、メタ情報のリビジョンによる競合検出。"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import IO, Iterator
+
+from .paths import state_path_for
+from .storage import load_data_meta, save_data_meta
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+LOCK_TIMEOUT_SECONDS = 10.0
+LOCK_RETRY_SECONDS = 0.05
+
+_registry_lock = threading.Lock()
+_thread_locks: dict[Path, threading.RLock] = {}
+_lock_depths: dict[Path, int] = {}
+_lock_handles: dict[Path, IO[str]] = {}
+
+
+class DataLockTimeout(Exception):
+    pass
+
+
+class RevisionConflict(Exception):
+    def __init__(self, data_file: Path, expected: int, current: int):
+        super().__init__(
+            f"{data_file.name} は読み込んだ後に他のツールで更新されています（リビジョン {expected} → {current}）。"
+        )
+        self.expected = expected
+        self.current = current
+
+
+def lock_file_for(data_file: Path) -> Path:
+    return state_path_for(data_file, ".lock")
+
+
+def try_lock_handle(handle: IO[str]) -> bool:
+    try:
+        if os.name == "nt":
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def unlock_handle(handle: IO[str]) -> None:
+    if os.name == "nt":
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def read_lock_owner(lock_file: Path) -> str:
+    try:
+        return lock_file.read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def acquire_lock_handle(data_file: Path, deadline: float) -> IO[str]:
+    lock_file = lock_file_for(data_file)
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    handle = lock_file.open("a+", encoding="utf-8")
+    while not try_lock_handle(handle):
+        if time.monotonic() >= deadline:
+            handle.close()
+            owner = read_lock_owner(lock_file)
+            owner_text = f"（pid={owner}）" if owner else ""
+            raise DataLockTimeout(f"{data_file.name} は他のプロセス{owner_text}が保存中です。しばらくしてから再実行してください。")
+        time.sleep(LOCK_RETRY_SECONDS)
+
+    # 待たされた側が誰を待っているか分かるよう、保持中のプロセスを書いておく
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+@contextlib.contextmanager
+def data_file_lock(data_file: Path, timeout: float = LOCK_TIMEOUT_SECONDS) -> Iterator[None]:
+    """読み込み→確認→書き込みを他のプロセスと排他する。同じスレッドからは入れ子で取得できる。"""
+    key = data_file.resolve()
+    deadline = time.monotonic() + timeout
+    with _registry_lock:
+        thread_lock = _thread_locks.setdefault(key, threading.RLock())
+    if not thread_lock.acquire(timeout=timeout):
+        raise DataLockTimeout(f"{data_file.name} は同じプロセスの別の処理が保存中です。")
+
+    try:
+        depth = _lock_depths.get(key, 0)
+        if depth == 0:
+            _lock_handles[key] = acquire_lock_handle(data_file, deadline)
+        _lock_depths[key] = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depths[key] -= 1
+            if _lock_depths[key] == 0:
+                handle = _lock_handles.pop(key)
+                unlock_handle(handle)
+                handle.close()
+    finally:
+        thread_lock.release()
+
+
+def read_revision(data_file: Path) -> int:
+    """保存のたびに 1 ずつ増える番号。データを読む前に取得しておき、保存時に expected_revision として渡す。"""
+    revision = load_data_meta(data_file).get("revision")
+    return revision if isinstance(revision, int) and revision >= 0 else 0
+
+
+def check_revision(data_file: Path, expected_revision: int | None) -> int:
+    """ロック中に呼ぶ。現在のリビジョンを返し、expected_revision と食い違えば RevisionConflict を送出する。"""
+    current = read_revision(data_file)
+    if expected_revision is not None and expected_revision != current:
+        raise RevisionConflict(data_file, expected_revision, current)
+    return current
+
+
+def store_revision(data_file: Path, revision: int) -> None:
+    """ロック中、データを置き換える前に呼ぶ。
+
+    途中で落ちても番号が進んだだけになり、古い番号を持つ側の保存は競合として止まる。
+    逆の順だとデータだけが変わって番号が据え置かれ、古い番号のままの保存が上書きしてしまう。
+    """
+    meta = load_data_meta(data_file)
+    meta["revision"] = revision
+    save_data_meta(data_file, meta)
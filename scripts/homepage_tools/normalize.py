@@ -0,0 +1,136 @@
+"""入力値の正規化（文字列リスト、画像参照、YouTube URL）。"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple
+from urllib.parse import parse_qs, urlparse
+
+
+YOUTUBE_EMBED_PREFIX = "https://www.youtube.com/embed/"
+YOUTUBE_URL_CACHE_SIZE = 4096
+
+
+def unique_strings(values: list[str]) -> list[str]:
+    result: list[str] = []
+    seen: set[str] = set()
+    for value in values:
+        item = value.strip()
+        if not item or item in seen:
+            continue
+        seen.add(item)
+        result.append(item)
+    return result
+
+
+def normalize_image_reference(image_value: Any) -> str:
+    if not isinstance(image_value, str):
+        return ""
+    return image_value.strip().replace("\\", "/").lstrip("/")
+
+
+class YoutubeUrl(NamedTuple):
+    """YouTube URL の解析結果。kind は watch / shorts / embed / youtu.be、不正なときは embed_url が空で reason に理由が入る。"""
+
+    embed_url: str
+    video_id: str
+    kind: str
+    reason: str
+
+
+def youtube_embed(video_id: str, kind: str) -> YoutubeUrl:
+    if not video_id:
+        return YoutubeUrl("", "", kind, "動画IDがありません")
+    return YoutubeUrl(f"{YOUTUBE_EMBED_PREFIX}{video_id}", video_id, kind, "")
+
+
+@lru_cache(maxsize=YOUTUBE_URL_CACHE_SIZE)
+def parse_youtube_text(raw: str) -> YoutubeUrl:
+    if raw.startswith(YOUTUBE_EMBED_PREFIX):
+        return youtube_embed(raw.replace(YOUTUBE_EMBED_PREFIX, "").split("?")[0].strip("/"), "embed")
+
+    try:
+        parsed = urlparse(raw)
+    except ValueError:
+        return YoutubeUrl("", "", "", "URLとして解釈できません")
+
+    host = parsed.netloc.lower().replace("www.", "")
+    path = parsed.path.strip("/")
+
+    if host == "youtu.be":
+        return youtube_embed(path.split("/")[0] if path else "", "youtu.be")
+
+    if host in {"youtube.com", "m.youtube.com"}:
+        if parsed.path == "/watch":
+            return youtube_embed(parse_qs(parsed.query).get("v", [""])[0], "watch")
+
+        if parsed.path.startswith("/embed/"):
+            return youtube_embed(path.replace("embed/", "").split("/")[0], "embed")
+
+        if parsed.path.startswith("/shorts/"):
+            return youtube_embed(path.replace("shorts/", "").split("/")[0], "shorts")
+
+        return YoutubeUrl("", "", "", "watch / shorts / embed / youtu.be 以外の形式です")
+
+    return YoutubeUrl("", "", "", "YouTube の URL ではありません")
+
+
+def parse_youtube_url(value: Any) -> YoutubeUrl:
+    if not isinstance(value, str):
+        return YoutubeUrl("", "", "", "文字列ではありません")
+
+    raw = value.strip()
+    if not raw:
+        return YoutubeUrl("", "", "", "空です")
+
+    # 保存のたびに全件を正規化し直すので、同じ文字列は urlparse / parse_qs を通さずキャッシュから返す
+    return parse_youtube_text(raw)
+
+
+def parse_youtube_urls(values: Iterable[Any]) -> list[YoutubeUrl]:
+    return [parse_youtube_url(value) for value in values]
+
+
+def normalize_youtube_urls(values: Iterable[Any]) -> list[str]:
+    """正規化できた URL だけを重複なしで返す。"""
+    return unique_strings([result.embed_url for result in parse_youtube_urls(values) if result.embed_url])
+
+
+def normalize_youtube_url(value: Any) -> str:
+    return parse_youtube_url(value).embed_url
+
+
+def normalize_str_list(value: Any) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(item).strip() for item in value if isinstance(item, str) and item.strip()]
+
+
+def to_text(value: Any, fallback: str = "") -> str:
+    return value.strip() if isinstance(value, str) else fallback
+
+
+def to_number(value: Any, fallback: float = 0) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return fallback
+
+
+def to_bool(value: Any, fallback: bool = False) -> bool:
+    return bool(value) if isinstance(value, bool) else fallback
+
+
+def to_string_list(value: Any) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    return [to_text(item) for item in value if isinstance(item, str) and to_text(item)]
+
+
+def split_lines(value: str) -> list[str]:
+    values: list[str] = []
+    for line in value.splitlines():
+        for chunk in line.split(","):
+            text = chunk.strip()
+            if text:
+                values.append(text)
+    return unique_strings(values)
@@ -0,0 +1,43 @@
+"""リポジトリのルートと public/ などの基準パス。"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+
+def resolve_root_dir() -> Path:
+    if getattr(sys, "frozen", False):
+        exe_dir = Path(sys.executable).resolve().parent
+        if (exe_dir / "public").exists():
+            return exe_dir
+        if (exe_dir.parent / "public").exists():
+            return exe_dir.parent
+        return Path.cwd()
+    return Path(__file__).resolve().parents[2]
+
+
+ROOT_DIR = resolve_root_dir()
+PUBLIC_DIR = ROOT_DIR / "public"
+STATE_DIR = ROOT_DIR / ".tool-state"
+
+
+def state_path_for(data_file: Path, suffix: str, directory: Path = STATE_DIR) -> Path:
+    """データファイルごとの作業用ファイル（ロック・ジャーナル・旧版など）のパス。
+
+    ファイル名だけだと --data-file で指定した同名の別ファイルと混ざるので、絶対パスの短いハッシュを付ける。
+    ファイル名だけで作られていた以前のものは、public 直下の（既定の）データファイルの分として引き継ぐ。
+    """
+    resolved = data_file.resolve()
+    digest = hashlib.sha1(str(resolved).encode("utf-8")).hexdigest()[:8]
+    path = directory / f"{data_file.stem}-{digest}{suffix}"
+    legacy = directory / f"{data_file.stem}{suffix}"
+    if resolved.parent == PUBLIC_DIR.resolve() and not path.exists() and legacy.exists():
+        try:
+            os.replace(legacy, path)
+        except OSError:
+            # 他のプロセスが先に引き継いだ
+            pass
+    return path
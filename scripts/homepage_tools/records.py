@@ -0,0 +1,497 @@
+"""成長記録データ（records-data.json）の読み書き。"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+from .paths import PUBLIC_DIR, state_path_for
+from .normalize import normalize_image_reference, normalize_str_list, normalize_youtube_urls, unique_strings
+from .validation import (
+    dropped_item_issue,
+    FieldRule,
+    Finding,
+    Issue,
+    validate_items,
+    ValidationError,
+    ValidationReport,
+)
+from .images import image_file_exists
+from .derive import IMAGE_MANIFEST_FILE, load_image_manifest
+from .locking import check_revision, data_file_lock, read_revision, store_revision
+from .snapshots import keep_snapshot
+from .storage import (
+    compact_json_bytes,
+    load_data_meta,
+    load_json,
+    meta_file_for,
+    minified_artifact_paths,
+    minified_file_for,
+    next_id,
+    replace_file,
+    save_data_meta,
+    write_if_changed,
+    write_minified_artifacts,
+)
+from .search import (
+    encode_search_index,
+    search_index_file_for,
+    search_index_paths,
+    SearchIndex,
+    write_search_index_artifacts,
+)
+
+
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+SHARD_PAGE_SIZE = 50
+
+
+RECORD_SCHEMA: dict[str, FieldRule] = {
+    "id": FieldRule("id", missing="error"),
+    "title": FieldRule("text", missing="error"),
+    "date": FieldRule("date"),
+    "description": FieldRule("text", missing="error"),
+    "images": FieldRule("image_list"),
+    "youtubeUrls": FieldRule("youtube_list"),
+    "image": FieldRule("legacy", default="images にまとめられます"),
+    "youtubeUrl": FieldRule("legacy", default="youtubeUrls にまとめられます"),
+}
+
+
+def record_media_findings(item: dict[str, Any]) -> list[Finding]:
+    # normalize_record と同じ判定。どちらも無いレコードは読み込み時に除外される
+    images = normalize_str_list(item.get("images")) + [normalize_image_reference(item.get("image"))]
+    youtube_urls = normalize_youtube_urls(normalize_str_list(item.get("youtubeUrls")) + [item.get("youtubeUrl")])
+    if any(images) or youtube_urls:
+        return []
+    return [("error", "", "画像か YouTube が1件以上必要です（読み込み時に除外されます）")]
+
+
+def validate_records(data: Any, image_exists: Callable[[str], bool] | None = None) -> ValidationReport:
+    """読み込み前の JSON をそのまま検査する。正規化で黙って落ちる・補われる箇所もすべて報告する。"""
+    report = ValidationReport()
+    if not isinstance(data, list):
+        report.issues.append(Issue("error", "records", "", "配列ではありません", None))
+        return report
+    validate_items(report, "records", "record", RECORD_SCHEMA, data, (record_media_findings,), image_exists=image_exists)
+    return report
+
+
+def check_records_before_save(
+    records: list[Any], changed_ids: set[int] | None, image_exists: Callable[[str], bool] | None = None
+) -> None:
+    """正規化する前の records を受け取り、changed_ids のレコードにエラーがあれば ValidationError を送出する。
+
+    既存の問題では保存を止めない。全件を検査するが、内容が前回と同じレコードはキャッシュから結果を取るので、
+    実際に調べるのは変わった分だけになる。
+    """
+    if not changed_ids:
+        return
+    errors = validate_records(records, image_exists).errors_for(changed_ids)
+    if errors:
+        raise ValidationError(errors)
+
+
+def check_records_kept(records: list[Any], normalized: list[dict[str, Any]], changed_ids: set[int] | None) -> None:
+    """変更したレコードが正規化で落ちていれば ValidationError を送出する。changed_ids に含まれる削除は対象外。"""
+    if not changed_ids:
+        return
+    given = {item["id"] for item in records if isinstance(item, dict) and item.get("id") in changed_ids}
+    dropped = sorted(given - {record["id"] for record in normalized})
+    if dropped:
+        raise ValidationError([dropped_item_issue(f"records id={record_id}", record_id) for record_id in dropped])
+
+
+def normalize_record(item: Any) -> dict[str, Any] | None:
+    if not isinstance(item, dict):
+        return None
+    if not isinstance(item.get("id"), int):
+        return None
+    if not isinstance(item.get("title"), str):
+        return None
+    if not isinstance(item.get("description"), str):
+        return None
+
+    legacy_image = normalize_image_reference(item.get("image"))
+
+    images = unique_strings(
+        [normalize_image_reference(value) for value in normalize_str_list(item.get("images"))]
+        + ([legacy_image] if legacy_image else [])
+    )
+    youtube_urls = normalize_youtube_urls(normalize_str_list(item.get("youtubeUrls")) + [item.get("youtubeUrl")])
+
+    if not images and not youtube_urls:
+        return None
+
+    return {
+        "id": int(item["id"]),
+        "title": item["title"].strip(),
+        "date": str(item.get("date", "")).strip() if item.get("date") else "",
+        "description": item["description"].strip(),
+        "images": images,
+        "youtubeUrls": youtube_urls,
+    }
+
+
+def journal_file_for(data_file: Path) -> Path:
+    return state_path_for(data_file, ".journal.jsonl")
+
+
+def read_journal(data_file: Path) -> list[dict[str, Any]]:
+    journal_file = journal_file_for(data_file)
+    if not journal_file.exists():
+        return []
+
+    entries: list[dict[str, Any]] = []
+    with journal_file.open("r", encoding="utf-8") as f:
+        for line in f:
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                entry = json.loads(text)
+            except json.JSONDecodeError:
+                # 追記途中で中断された末尾行は読み飛ばす
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+    return entries
+
+
+def apply_journal(records: list[dict[str, Any]], entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    by_id = {int(record["id"]): record for record in records}
+    for entry in entries:
+        op = entry.get("op")
+        if op == "put":
+            record = normalize_record(entry.get("record"))
+            if record is not None:
+                by_id[record["id"]] = record
+        elif op == "delete" and isinstance(entry.get("id"), int):
+            by_id.pop(entry["id"], None)
+    return sorted(by_id.values(), key=lambda x: x["id"])
+
+
+def append_journal(data_file: Path, entries: list[dict[str, Any]], expected_revision: int | None = None) -> int:
+    """ジャーナルに操作を追記し、新しいリビジョンを返す。コンパクションが必要なサイズに達していれば続けて畳み込む。
+
+    追記もリビジョンを進めるので、追記前に読み込んだ側の save_records は RevisionConflict になる。
+    """
+    # 追記した時点で弾いておかないと、後のコンパクションで保存できなくなる。
+    # 確かめる画像は数件なので、public 全体のインデックスは更新せずに直接 stat する
+    check_records_before_save(
+        [entry["record"] for entry in entries if entry.get("op") == "put"],
+        journal_entry_ids(entries),
+        functools.partial(image_file_exists, PUBLIC_DIR),
+    )
+    journal_file = journal_file_for(data_file)
+    journal_file.parent.mkdir(parents=True, exist_ok=True)
+    # コンパクションがジャーナルを読んでから消すまでの間に追記が紛れ込まないようにする
+    with data_file_lock(data_file):
+        revision = check_revision(data_file, expected_revision) + 1
+        store_revision(data_file, revision)
+        with journal_file.open("a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        if size >= JOURNAL_COMPACT_BYTES:
+            compact_records(data_file)
+            revision = read_revision(data_file)
+    return revision
+
+
+def journal_put(record: dict[str, Any]) -> dict[str, Any]:
+    return {"op": "put", "record": record}
+
+
+def journal_delete(record_id: int) -> dict[str, Any]:
+    return {"op": "delete", "id": record_id}
+
+
+def journal_image_refs(entries: list[dict[str, Any]]) -> list[str]:
+    refs: list[str] = []
+    for entry in entries:
+        record = entry.get("record") if entry.get("op") == "put" else None
+        if isinstance(record, dict):
+            refs.extend(normalize_str_list(record.get("images")))
+    return unique_strings(refs)
+
+
+def normalize_records(data: Any) -> list[dict[str, Any]] | None:
+    """配列でなければ None。正規化できない要素は落とす。"""
+    if not isinstance(data, list):
+        return None
+
+    records: list[dict[str, Any]] = []
+    for item in data:
+        normalized = normalize_record(item)
+        if normalized is None:
+            continue
+        records.append(normalized)
+
+    return records
+
+
+def load_snapshot(data_file: Path) -> list[dict[str, Any]]:
+    if not data_file.exists():
+        return []
+
+    records = load_json(data_file, normalize_records)
+    if records is None:
+        raise ValueError(f"{data_file} の形式が不正です（配列ではありません）")
+
+    return records
+
+
+def index_raw_records(data_file: Path) -> dict[int, dict[str, Any]]:
+    """正規化せずに、ジャーナルを反映した id ごとの要素を返す。1件の存在確認や id の払い出し用。"""
+    by_id: dict[int, dict[str, Any]] = {}
+    if data_file.exists():
+        with data_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            by_id = {item["id"]: item for item in data if isinstance(item, dict) and isinstance(item.get("id"), int)}
+    for entry in read_journal(data_file):
+        record = entry.get("record")
+        if entry.get("op") == "put" and isinstance(record, dict) and isinstance(record.get("id"), int):
+            by_id[record["id"]] = record
+        elif entry.get("op") == "delete" and isinstance(entry.get("id"), int):
+            by_id.pop(entry["id"], None)
+    return by_id
+
+
+def load_records(data_file: Path) -> list[dict[str, Any]]:
+    records = load_snapshot(data_file)
+    entries = read_journal(data_file)
+    return apply_journal(records, entries) if entries else records
+
+
+def save_records(
+    data_file: Path,
+    records: list[dict[str, Any]],
+    changed_ids: set[int] | None = None,
+    expected_revision: int | None = None,
+) -> int:
+    """全件を書き出し、新しいリビジョンを返す。分割出力が有効なら changed_ids を含むシャードだけを更新する（None なら全シャード）。
+
+    expected_revision を渡すと、読み込み後に他で保存されていた場合は書き込まずに RevisionConflict を送出する。
+    """
+    # 正規化すると問題のある項目が黙って落ちたり補われたりするので、受け取ったままの内容を検査する
+    check_records_before_save(records, changed_ids)
+    normalized = normalize_records(records) or []
+    check_records_kept(records, normalized, changed_ids)
+    normalized.sort(key=lambda x: x["id"])
+
+    with data_file_lock(data_file):
+        current = check_revision(data_file, expected_revision)
+        # 未反映の操作ログのうち、今回変更していない id の分は書き出す内容に残してからログを消す
+        entries = [
+            entry for entry in read_journal(data_file) if not journal_entry_ids([entry]) & (changed_ids or set())
+        ]
+        if entries:
+            normalized = apply_journal(normalized, entries)
+        payload = (json.dumps(normalized, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+        keep_snapshot(data_file, current)
+        revision = current + 1
+        store_revision(data_file, revision)
+        replace_file(data_file, payload)
+        journal_file_for(data_file).unlink(missing_ok=True)
+
+        if (shard_dir_for(data_file) / "index.json").exists():
+            # 一緒に書き出したジャーナル分のシャードも更新する
+            shard_ids = changed_ids | journal_entry_ids(entries) if changed_ids is not None else None
+            write_record_shards(data_file, normalized, shard_ids)
+        if minified_file_for(data_file).exists():
+            write_minified_artifacts(data_file, normalized)
+        if search_index_file_for(data_file).exists():
+            write_records_search_index(data_file, normalized)
+    return revision
+
+
+def merge_records(
+    latest: list[dict[str, Any]], ours: dict[int, dict[str, Any]], changed_ids: set[int]
+) -> list[dict[str, Any]]:
+    """最新のデータに、こちらで変更した id だけを重ねる。ours に無い id は削除として扱う。"""
+    merged = {int(record["id"]): record for record in latest}
+    for record_id in changed_ids:
+        if record_id in ours:
+            merged[record_id] = ours[record_id]
+        else:
+            merged.pop(record_id, None)
+    return sorted(merged.values(), key=lambda x: x["id"])
+
+
+def journal_entry_ids(entries: list[dict[str, Any]]) -> set[int]:
+    ids: set[int] = set()
+    for entry in entries:
+        record = entry.get("record")
+        if entry.get("op") == "put" and isinstance(record, dict) and isinstance(record.get("id"), int):
+            ids.add(record["id"])
+        elif entry.get("op") == "delete" and isinstance(entry.get("id"), int):
+            ids.add(entry["id"])
+    return ids
+
+
+def compact_records(data_file: Path) -> list[str]:
+    """ジャーナルをスナップショットへ畳み込み、追記されていた画像参照を返す。"""
+    with data_file_lock(data_file):
+        entries = read_journal(data_file)
+        if not entries:
+            return []
+        save_records(data_file, apply_journal(load_snapshot(data_file), entries), journal_entry_ids(entries))
+    return journal_image_refs(entries)
+
+
+def shard_dir_for(data_file: Path) -> Path:
+    return data_file.with_suffix("")
+
+
+def data_commit_paths(data_file: Path) -> list[Path]:
+    shard_dir = shard_dir_for(data_file)
+    artifacts = [
+        path
+        for path in [meta_file_for(data_file), *minified_artifact_paths(data_file), *search_index_paths(data_file)]
+        if path.exists()
+    ]
+    return [data_file, *artifacts, shard_dir] if shard_dir.exists() else [data_file, *artifacts]
+
+
+def shard_page_of(record_id: int) -> int:
+    # ページはID範囲で固定し、追加・削除で他のページがずれないようにする
+    return (record_id - 1) // SHARD_PAGE_SIZE + 1
+
+
+def record_thumbnail(record: dict[str, Any], manifest: dict[str, Any]) -> str:
+    images = record.get("images", [])
+    if not images:
+        return ""
+    entry = manifest["images"].get(images[0])
+    thumbnails = entry.get("thumbnails", []) if isinstance(entry, dict) else []
+    webp = [thumb["path"] for thumb in thumbnails if thumb.get("format") == "webp"]
+    return webp[0] if webp else images[0]
+
+
+def write_record_shards(
+    data_file: Path,
+    records: list[dict[str, Any]],
+    changed_ids: set[int] | None = None,
+) -> list[Path]:
+    """一覧用インデックス、ID範囲ごとのページ、レコード詳細を書き出し、変更したパスを返す。"""
+    shard_dir = shard_dir_for(data_file)
+    pages_dir = shard_dir / "pages"
+    items_dir = shard_dir / "items"
+    by_id = {int(record["id"]): record for record in records}
+    manifest = load_image_manifest(IMAGE_MANIFEST_FILE)
+
+    pages: dict[int, list[dict[str, Any]]] = {}
+    for record in records:
+        pages.setdefault(shard_page_of(int(record["id"])), []).append(record)
+
+    if changed_ids is None:
+        target_pages = set(pages)
+        target_ids = set(by_id)
+        for stale in pages_dir.glob("*.json") if pages_dir.exists() else []:
+            if stale.stem.isdigit() and int(stale.stem) not in pages:
+                target_pages.add(int(stale.stem))
+        for stale in items_dir.glob("*.json") if items_dir.exists() else []:
+            if stale.stem.isdigit():
+                target_ids.add(int(stale.stem))
+    else:
+        target_pages = {shard_page_of(record_id) for record_id in changed_ids}
+        target_ids = set(changed_ids)
+
+    written: list[Path] = []
+    for page in sorted(target_pages):
+        page_file = pages_dir / f"{page:04d}.json"
+        if page in pages:
+            if write_if_changed(page_file, compact_json_bytes(pages[page])):
+                written.append(page_file)
+        elif page_file.exists():
+            page_file.unlink()
+            written.append(page_file)
+
+    for record_id in sorted(target_ids):
+        item_file = items_dir / f"{record_id}.json"
+        if record_id in by_id:
+            if write_if_changed(item_file, compact_json_bytes(by_id[record_id])):
+                written.append(item_file)
+        elif item_file.exists():
+            item_file.unlink()
+            written.append(item_file)
+
+    index = {
+        "version": 1,
+        "pageSize": SHARD_PAGE_SIZE,
+        "count": len(records),
+        "pages": [f"pages/{page:04d}.json" for page in sorted(pages)],
+        "records": [
+            {
+                "id": record["id"],
+                "title": record["title"],
+                "date": record.get("date", ""),
+                "thumbnail": record_thumbnail(record, manifest),
+                "videos": len(record.get("youtubeUrls", [])),
+            }
+            for record in records
+        ],
+    }
+    index_file = shard_dir / "index.json"
+    if write_if_changed(index_file, compact_json_bytes(index)):
+        written.append(index_file)
+    return written
+
+
+def allocate_record_ids(
+    data_file: Path, records_by_id: dict[int, dict[str, Any]] | None = None, count: int = 1
+) -> list[int]:
+    """メタ情報の nextId から id を払い出す。削除した id は再利用しない。
+
+    records_by_id を省くと、nextId がある限りデータを読まずに払い出す（ジャーナルへの追記用）。
+    """
+    with data_file_lock(data_file):
+        meta = load_data_meta(data_file)
+        candidate = meta.get("nextId")
+        if not isinstance(candidate, int) or candidate < 1:
+            if records_by_id is None:
+                records_by_id = index_raw_records(data_file)
+            candidate = next_id(list(records_by_id.values()))
+        records_by_id = records_by_id or {}
+
+        allocated: list[int] = []
+        while len(allocated) < count:
+            if candidate not in records_by_id:
+                allocated.append(candidate)
+            candidate += 1
+        meta["nextId"] = candidate
+        save_data_meta(data_file, meta)
+    return allocated
+
+
+def collect_record_image_refs(records: list[dict[str, Any]]) -> list[str]:
+    return unique_strings([image_ref for record in records for image_ref in record.get("images", [])])
+
+
+def record_search_fields(record: dict[str, Any]) -> list[str]:
+    return [str(record.get("title", "")), str(record.get("description", ""))]
+
+
+def build_records_search_index(records: list[dict[str, Any]]) -> SearchIndex:
+    index = SearchIndex()
+    for record in records:
+        index.add(int(record["id"]), record_search_fields(record))
+    return index
+
+
+EXPORT_SEARCH_INDEXES: dict[Path, SearchIndex] = {}
+
+
+def write_records_search_index(data_file: Path, records: list[dict[str, Any]]) -> list[tuple[Path, int]]:
+    # GUI から保存が続く場合に備え、前回の索引を使い回して変わったレコードだけ n-gram を作り直す
+    index = EXPORT_SEARCH_INDEXES.setdefault(data_file.resolve(), SearchIndex())
+    index.sync({int(record["id"]): record_search_fields(record) for record in records})
+    return write_search_index_artifacts(data_file, encode_search_index(index))
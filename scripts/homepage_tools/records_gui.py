@@ -0,0 +1,743 @@
+"""成長記録データの管理 GUI。"""
+
+from __future__ import annotations
+
+import queue
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import filedialog, messagebox, ttk
+from typing import Any
+
+from .paths import PUBLIC_DIR
+from .normalize import normalize_image_reference, parse_youtube_url, unique_strings
+from .git import GIT_SESSION, GitSyncWorker
+from .staging import (
+    build_publish_message,
+    discard_pending_changes,
+    load_pending_changes,
+    pending_change_paths,
+    stage_change,
+)
+from .images import (
+    get_public_image_index,
+    image_exists_in_public,
+    import_image_to_public,
+    list_public_images,
+    resolve_public_image_path,
+)
+from .locking import DataLockTimeout, read_revision, RevisionConflict
+from .search import SearchIndex
+from .storage import DataMetaError
+from .validation import ValidationError
+from .records import (
+    allocate_record_ids,
+    append_journal,
+    build_records_search_index,
+    compact_records,
+    data_commit_paths,
+    journal_delete,
+    journal_entry_ids,
+    journal_file_for,
+    journal_put,
+    load_records,
+    merge_records,
+    record_search_fields,
+    save_records,
+)
+from .watch import diff_rows, FileWatcher
+from .widgets import GIT_SYNC_POLL_MS, PREVIEW_POLL_MS, SEARCH_DEBOUNCE_MS, ThumbnailCache, VirtualTreeview
+
+
+class RecordsGui:
+    def __init__(self, root: tk.Tk, data_file: Path, journal: bool = False, stage: bool = False):
+        self.root = root
+        self.data_file = data_file
+        self.journal = journal
+        self.stage_initial = stage or journal
+        self.public_dir = PUBLIC_DIR
+        self.git_worker = GitSyncWorker()
+        self.last_git_message = ""
+        self.thumbnails = ThumbnailCache(self.public_dir)
+        self.preview_ref = ""
+        self.preview_image: tk.PhotoImage | None = None
+        self.records: dict[int, dict[str, Any]] = {}
+        self.revision = 0
+        self.search_index = SearchIndex()
+        self.search_after_id: str | None = None
+
+        self.form_images: list[str] = []
+        self.form_youtube_urls: list[str] = []
+
+        self.root.title("成長記録データ管理")
+        self.root.geometry("1120x720")
+        self.root.minsize(960, 620)
+
+        self._build_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_git_results()
+        self.poll_previews()
+        self.refresh_records()
+        self.watcher = FileWatcher([data_file, journal_file_for(data_file)], self.public_dir)
+        self.root.after(self.watcher.delay_ms, self.poll_files)
+
+    def _build_ui(self) -> None:
+        wrapper = ttk.Frame(self.root, padding=12)
+        wrapper.pack(fill=tk.BOTH, expand=True)
+
+        top_bar = ttk.Frame(wrapper)
+        top_bar.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(top_bar, text="データファイル:").pack(side=tk.LEFT)
+        ttk.Label(top_bar, text=str(self.data_file), foreground="#555").pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(top_bar, text="再読み込み", command=self.refresh_records).pack(side=tk.RIGHT)
+        ttk.Button(top_bar, text="公開", command=self.publish_changes).pack(side=tk.RIGHT, padx=(0, 6))
+        self.stage_var = tk.BooleanVar(value=self.stage_initial)
+        ttk.Checkbutton(
+            top_bar,
+            text="まとめて公開",
+            variable=self.stage_var,
+            state="disabled" if self.journal else "normal",
+        ).pack(side=tk.RIGHT, padx=(0, 6))
+
+        main_area = ttk.Panedwindow(wrapper, orient=tk.HORIZONTAL)
+        main_area.pack(fill=tk.BOTH, expand=True)
+
+        list_frame = ttk.Frame(main_area, padding=8)
+        form_frame = ttk.Frame(main_area, padding=8)
+        main_area.add(list_frame, weight=3)
+        main_area.add(form_frame, weight=2)
+
+        search_row = ttk.Frame(list_frame)
+        search_row.pack(side=tk.TOP, fill=tk.X, pady=(0, 6))
+        ttk.Label(search_row, text="検索").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.schedule_search())
+        ttk.Entry(search_row, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 6))
+        ttk.Button(search_row, text="クリア", command=lambda: self.search_var.set("")).pack(side=tk.LEFT)
+
+        self.tree = VirtualTreeview(
+            list_frame,
+            columns=(
+                ("id", "ID", 70, tk.CENTER),
+                ("title", "タイトル", 290, tk.W),
+                ("images", "画像", 80, tk.CENTER),
+                ("youtube", "YouTube", 80, tk.CENTER),
+            ),
+            row_values=lambda record: (
+                record["id"],
+                record["title"],
+                len(record.get("images", [])),
+                len(record.get("youtubeUrls", [])),
+            ),
+            on_select=self.on_select_record,
+            height=22,
+        )
+        self.tree.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        ttk.Label(form_frame, text="タイトル").pack(anchor=tk.W)
+        self.title_entry = ttk.Entry(form_frame)
+        self.title_entry.pack(fill=tk.X, pady=(0, 8))
+
+        ttk.Label(form_frame, text="日付（YYYY-MM-DD、省略可）").pack(anchor=tk.W)
+        self.date_entry = ttk.Entry(form_frame)
+        self.date_entry.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(form_frame, text="画像ファイル（public配下）").pack(anchor=tk.W)
+        image_entry_row = ttk.Frame(form_frame)
+        image_entry_row.pack(fill=tk.X, pady=(0, 6))
+
+        self.image_var = tk.StringVar(value="")
+        self.image_combo = ttk.Combobox(image_entry_row, textvariable=self.image_var)
+        self.image_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        ttk.Button(image_entry_row, text="参照...", command=self.browse_image).pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(image_entry_row, text="更新", command=self.refresh_image_candidates).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(image_entry_row, text="追加", command=self.add_image_from_input).pack(side=tk.LEFT, padx=(6, 0))
+
+        image_list_row = ttk.Frame(form_frame)
+        image_list_row.pack(fill=tk.X, pady=(0, 10))
+
+        self.image_listbox = tk.Listbox(image_list_row, height=4)
+        self.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        image_list_actions = ttk.Frame(image_list_row)
+        image_list_actions.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
+        ttk.Button(image_list_actions, text="削除", command=self.remove_selected_image).pack(fill=tk.X)
+        ttk.Button(image_list_actions, text="クリア", command=self.clear_images).pack(fill=tk.X, pady=(6, 0))
+        self.preview_label = ttk.Label(image_list_row, anchor=tk.CENTER, justify=tk.CENTER, width=18)
+        self.preview_label.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
+        self.image_listbox.bind("<<ListboxSelect>>", self.on_select_preview)
+
+        ttk.Label(form_frame, text="YouTube URL").pack(anchor=tk.W)
+        youtube_entry_row = ttk.Frame(form_frame)
+        youtube_entry_row.pack(fill=tk.X, pady=(0, 6))
+
+        self.youtube_var = tk.StringVar(value="")
+        self.youtube_entry = ttk.Entry(youtube_entry_row, textvariable=self.youtube_var)
+        self.youtube_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(youtube_entry_row, text="追加", command=self.add_youtube_from_input).pack(side=tk.LEFT, padx=(8, 0))
+
+        youtube_list_row = ttk.Frame(form_frame)
+        youtube_list_row.pack(fill=tk.X, pady=(0, 10))
+
+        self.youtube_listbox = tk.Listbox(youtube_list_row, height=4)
+        self.youtube_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        youtube_list_actions = ttk.Frame(youtube_list_row)
+        youtube_list_actions.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
+        ttk.Button(youtube_list_actions, text="削除", command=self.remove_selected_youtube).pack(fill=tk.X)
+        ttk.Button(youtube_list_actions, text="クリア", command=self.clear_youtube).pack(fill=tk.X, pady=(6, 0))
+
+        ttk.Label(form_frame, text="説明").pack(anchor=tk.W)
+        self.description_text = tk.Text(form_frame, height=9, wrap=tk.WORD)
+        self.description_text.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+
+        button_row = ttk.Frame(form_frame)
+        button_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Button(button_row, text="新規追加", command=self.add_record_from_form).pack(side=tk.LEFT)
+        ttk.Button(button_row, text="選択行を更新", command=self.update_selected_record).pack(side=tk.LEFT, padx=6)
+        ttk.Button(button_row, text="選択行を削除", command=self.delete_selected_record).pack(side=tk.LEFT, padx=6)
+        ttk.Button(button_row, text="入力クリア", command=self.clear_form).pack(side=tk.LEFT)
+
+        self.status_var = tk.StringVar(value="")
+        self.sync_status_var = tk.StringVar(value="")
+        ttk.Label(form_frame, textvariable=self.status_var, foreground="#555").pack(anchor=tk.W)
+        ttk.Label(form_frame, textvariable=self.sync_status_var, foreground="#555").pack(anchor=tk.W)
+
+        self.refresh_image_candidates()
+
+    def refresh_records(self) -> None:
+        try:
+            # リビジョンを先に読む。間に他の保存が入っても、古い番号を持つ側に倒れて競合として検出できる
+            revision = read_revision(self.data_file)
+            records = load_records(self.data_file)
+            records.sort(key=lambda x: int(x["id"]))
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("読み込みエラー", str(exc))
+            return
+
+        self.revision = revision
+        self.show_records(records)
+
+    def poll_files(self) -> None:
+        changed = self.watcher.poll()
+        if self.public_dir in changed:
+            self.refresh_image_candidates()
+        if any(path != self.public_dir for path in changed):
+            self.reload_external_changes()
+        self.root.after(self.watcher.delay_ms, self.poll_files)
+
+    def reload_external_changes(self) -> None:
+        """git pull や他のツールによる変更を取り込み、変わった行だけを更新する。自分の保存なら差分は出ない。"""
+        try:
+            revision = read_revision(self.data_file)
+            records = load_records(self.data_file)
+        except Exception as exc:  # noqa: BLE001
+            self.status_var.set(f"外部の変更を読み込めませんでした: {exc}")
+            return
+
+        self.revision = revision
+        latest = {int(record["id"]): record for record in records}
+        upserts, removed = diff_rows(self.records, latest)
+        if not upserts and not removed:
+            return
+
+        self.records = latest
+        for record in upserts:
+            self.search_index.add(int(record["id"]), record_search_fields(record))
+            self.tree.upsert(record)
+        for record_id in removed:
+            self.search_index.remove(record_id)
+            self.tree.remove(record_id)
+        self.apply_search()
+        self.status_var.set(f"外部の変更を読み込みました: 追加・更新 {len(upserts)} 件 / 削除 {len(removed)} 件")
+
+    def show_records(self, records: list[dict[str, Any]]) -> None:
+        self.records = {int(record["id"]): record for record in records}
+        self.search_index = build_records_search_index(records)
+        self.tree.set_rows(records)
+        self.apply_search()
+
+    def schedule_search(self) -> None:
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self) -> None:
+        self.search_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            if self.tree.filter_ids is not None:
+                self.tree.set_filter(None)
+            self.status_var.set(f"件数: {len(self.records)}")
+            return
+
+        started = time.perf_counter()
+        matches = self.search_index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.tree.set_filter(matches)
+        self.status_var.set(f"検索: {len(matches)}件 / 全{len(self.records)}件（{elapsed_ms:.1f} ms）")
+
+    def refresh_image_candidates(self) -> None:
+        images = list_public_images(self.public_dir)
+        self.image_combo["values"] = images
+        if not self.image_var.get().strip() and images:
+            self.image_var.set(images[0])
+
+    def refresh_form_media_listboxes(self) -> None:
+        self.image_listbox.delete(0, tk.END)
+        for image in self.form_images:
+            self.image_listbox.insert(tk.END, image)
+
+        self.youtube_listbox.delete(0, tk.END)
+        for url in self.form_youtube_urls:
+            self.youtube_listbox.insert(tk.END, url)
+
+        if self.preview_ref not in self.form_images:
+            self.show_preview(self.form_images[0] if self.form_images else "")
+
+        self.status_var.set(f"編集中メディア: 画像 {len(self.form_images)} / 動画 {len(self.form_youtube_urls)}")
+
+    def add_image_reference(self, image_ref: str, show_messages: bool = True) -> bool:
+        normalized = normalize_image_reference(image_ref)
+        if not normalized:
+            if show_messages:
+                messagebox.showwarning("入力不足", "画像ファイル名を入力してください。")
+            return False
+
+        if not image_exists_in_public(self.public_dir, normalized):
+            if show_messages:
+                messagebox.showwarning(
+                    "画像が見つかりません",
+                    "指定した画像が public 配下に見つかりません。",
+                )
+            return False
+
+        if normalized in self.form_images:
+            if show_messages:
+                messagebox.showinfo("重複", "その画像はすでに追加されています。")
+            return False
+
+        self.form_images.append(normalized)
+        self.refresh_form_media_listboxes()
+        return True
+
+    def add_image_from_input(self) -> None:
+        if self.add_image_reference(self.image_var.get()):
+            self.image_var.set("")
+
+    def resolve_or_copy_image_ref(self, selected: str) -> tuple[str | None, bool]:
+        selected_path = Path(selected).resolve()
+        public_root = self.public_dir.resolve()
+
+        try:
+            image_ref = selected_path.relative_to(public_root).as_posix()
+            return (image_ref, False)
+        except ValueError:
+            try:
+                return import_image_to_public(self.public_dir, selected_path)
+            except Exception as exc:  # noqa: BLE001
+                messagebox.showerror("コピーエラー", f"画像のコピーに失敗しました:\n{exc}")
+                return (None, False)
+
+    def browse_image(self) -> None:
+        selected_items = filedialog.askopenfilenames(
+            title="画像ファイルを選択（複数選択可）",
+            initialdir=str(self.public_dir),
+            filetypes=[
+                ("画像ファイル", "*.png *.jpg *.jpeg *.webp *.gif *.bmp *.svg *.avif"),
+                ("すべてのファイル", "*.*"),
+            ],
+        )
+        if not selected_items:
+            return
+
+        added_count = 0
+        copied_refs: list[str] = []
+        skipped_count = 0
+
+        for selected in selected_items:
+            image_ref, copied = self.resolve_or_copy_image_ref(selected)
+            if not image_ref:
+                skipped_count += 1
+                continue
+
+            if copied:
+                copied_refs.append(image_ref)
+
+            if self.add_image_reference(image_ref, show_messages=False):
+                added_count += 1
+            else:
+                skipped_count += 1
+
+        if copied_refs:
+            max_display = 5
+            displayed = copied_refs[:max_display]
+            copied_text = "\n".join(f"public/{item}" for item in displayed)
+            if len(copied_refs) > max_display:
+                copied_text += f"\n... 他 {len(copied_refs) - max_display} 件"
+            messagebox.showinfo("画像をコピーしました", copied_text)
+
+        if added_count == 0:
+            messagebox.showinfo("追加なし", "追加できる画像がありませんでした。")
+        else:
+            suffix = f"（未追加 {skipped_count} 件）" if skipped_count > 0 else ""
+            self.status_var.set(f"画像を {added_count} 件追加しました{suffix}")
+
+        self.image_var.set("")
+        self.refresh_image_candidates()
+
+    def commit_paths(self, image_refs: list[str] | None = None) -> list[Path]:
+        paths = data_commit_paths(self.data_file)
+        for image_ref in image_refs or []:
+            target = resolve_public_image_path(self.public_dir, image_ref)
+            if target and target.exists() and target.is_file():
+                paths.append(target)
+        return paths
+
+    def sync_git(self, commit_message: str, image_refs: list[str] | None = None) -> None:
+        self.git_worker.submit(self.commit_paths(image_refs), commit_message)
+        self.update_sync_status()
+
+    def sync_or_stage(self, action: str, record_id: int, title: str, image_refs: list[str] | None = None) -> str:
+        if not self.stage_var.get():
+            self.sync_git(action, image_refs)
+            return "Git同期待ち"
+        try:
+            count = stage_change(
+                self.data_file,
+                {"action": action, "id": record_id, "title": title},
+                self.commit_paths(image_refs),
+            )
+        except DataLockTimeout as exc:
+            messagebox.showerror("記録エラー", f"保存はできましたが、未公開の変更として記録できませんでした。\n{exc}")
+            return "未公開の記録に失敗"
+        return f"未公開 {count} 件"
+
+    def publish_changes(self) -> None:
+        try:
+            image_refs = compact_records(self.data_file)
+            changes = load_pending_changes(self.data_file)
+        except (ValidationError, DataLockTimeout, DataMetaError, OSError, ValueError) as exc:
+            messagebox.showerror("公開エラー", str(exc))
+            self.refresh_records()
+            return
+        # 畳み込むとリビジョンが進むので、画像の有無にかかわらず読み込み直す。古い番号のままだと次の保存が競合になる
+        self.refresh_records()
+        if not changes and not image_refs:
+            self.status_var.set("公開する変更はありません。")
+            return
+
+        paths = self.commit_paths(image_refs) + pending_change_paths(changes)
+        data_file = self.data_file
+        self.git_worker.submit(
+            paths,
+            build_publish_message("records", changes),
+            on_success=lambda: discard_pending_changes(data_file, len(changes)),
+        )
+        self.update_sync_status()
+        self.status_var.set(f"{len(changes)} 件の変更を公開します。 / Git同期待ち")
+
+    def on_select_preview(self, _event: Any = None) -> None:
+        selected = self.image_listbox.curselection()
+        if selected:
+            self.show_preview(self.form_images[selected[0]])
+
+    def show_preview(self, image_ref: str) -> None:
+        self.preview_ref = image_ref
+        if not image_ref:
+            self.preview_image = None
+            self.preview_label.configure(image="", text="")
+            return
+        if not self.thumbnails.available:
+            self.preview_label.configure(image="", text="プレビューには\nPillow が必要です")
+            return
+
+        image = self.thumbnails.get(image_ref)
+        if image is None:
+            self.preview_label.configure(image="", text="読み込み中...")
+            self.thumbnails.request(image_ref)
+            return
+        self.preview_image = image
+        self.preview_label.configure(image=image, text="")
+
+    def poll_previews(self) -> None:
+        for image_ref, error in self.thumbnails.poll():
+            if image_ref != self.preview_ref:
+                continue
+            if error:
+                self.preview_label.configure(image="", text="プレビュー不可")
+            else:
+                self.show_preview(image_ref)
+        self.root.after(PREVIEW_POLL_MS, self.poll_previews)
+
+    def poll_git_results(self) -> None:
+        while True:
+            try:
+                git_ok, git_message = self.git_worker.results.get_nowait()
+            except queue.Empty:
+                break
+            first_line = git_message.splitlines()[0] if git_message else ""
+            self.last_git_message = first_line if git_ok else f"失敗: {first_line}"
+            if not git_ok:
+                messagebox.showwarning("Git同期", git_message)
+        self.update_sync_status()
+        self.root.after(GIT_SYNC_POLL_MS, self.poll_git_results)
+
+    def update_sync_status(self) -> None:
+        pending = self.git_worker.pending_count()
+        timing = GIT_SESSION.timing_summary()
+        timing_text = f"（{timing}）" if timing and self.last_git_message else ""
+        self.sync_status_var.set(f"Git: 待機 {pending} 件 / 最終: {self.last_git_message or '-'}{timing_text}")
+
+    def on_close(self) -> None:
+        pending = self.git_worker.pending_count()
+        if pending > 0:
+            wait = messagebox.askyesno(
+                "Git同期",
+                f"未完了のGit同期が {pending} 件あります。完了を待ってから終了しますか？",
+            )
+            if wait:
+                self.sync_status_var.set("Git同期の完了を待っています...")
+                self.root.update_idletasks()
+                self.git_worker.stop()
+        self.thumbnails.stop()
+        self.root.destroy()
+
+    def store_change(self, entries: list[dict[str, Any]]) -> bool:
+        """保存できたかを返す。他のツールと競合して今回の変更を破棄した場合は False。"""
+        try:
+            if not self.journal:
+                self.revision = save_records(
+                    self.data_file, list(self.records.values()), journal_entry_ids(entries), self.revision
+                )
+                return True
+            self.revision = append_journal(self.data_file, entries, self.revision)
+            return True
+        except RevisionConflict:
+            return self.resolve_conflict(journal_entry_ids(entries))
+        except ValidationError as exc:
+            messagebox.showerror("入力エラー", str(exc))
+            self.refresh_records()
+            return False
+        except (DataLockTimeout, DataMetaError) as exc:
+            messagebox.showerror("保存エラー", str(exc))
+            self.refresh_records()
+            return False
+
+    def resolve_conflict(self, changed_ids: set[int]) -> bool:
+        merge = messagebox.askyesno(
+            "保存の競合",
+            "このウィンドウで読み込んだ後に、他のツールがデータを保存しています。\n\n"
+            "はい: 最新のデータに今回の変更を重ねて保存します。\n"
+            "いいえ: 今回の変更を破棄し、最新のデータを読み込み直します。",
+        )
+        if merge:
+            try:
+                revision = read_revision(self.data_file)
+                merged = merge_records(load_records(self.data_file), self.records, changed_ids)
+                self.revision = save_records(self.data_file, merged, changed_ids, revision)
+            except (RevisionConflict, DataLockTimeout, DataMetaError, ValidationError) as exc:
+                messagebox.showerror("保存エラー", f"{exc}\nもう一度操作してください。")
+            else:
+                self.show_records(merged)
+                return True
+        self.refresh_records()
+        self.status_var.set("最新のデータを読み込み直しました。今回の変更は保存されていません。")
+        return False
+
+    def remove_selected_image(self) -> None:
+        selected = self.image_listbox.curselection()
+        if not selected:
+            return
+        idx = selected[0]
+        del self.form_images[idx]
+        self.refresh_form_media_listboxes()
+
+    def clear_images(self) -> None:
+        self.form_images = []
+        self.refresh_form_media_listboxes()
+
+    def add_youtube_reference(self, value: str) -> bool:
+        parsed = parse_youtube_url(value)
+        normalized = parsed.embed_url
+        if not value.strip():
+            messagebox.showwarning("入力不足", "YouTube URL を入力してください。")
+            return False
+        if not normalized:
+            messagebox.showwarning("入力エラー", f"YouTube URL の形式が不正です（{parsed.reason}）。")
+            return False
+        if normalized in self.form_youtube_urls:
+            messagebox.showinfo("重複", "そのYouTube URLはすでに追加されています。")
+            return False
+
+        self.form_youtube_urls.append(normalized)
+        self.refresh_form_media_listboxes()
+        return True
+
+    def add_youtube_from_input(self) -> None:
+        if self.add_youtube_reference(self.youtube_var.get()):
+            self.youtube_var.set("")
+
+    def remove_selected_youtube(self) -> None:
+        selected = self.youtube_listbox.curselection()
+        if not selected:
+            return
+        idx = selected[0]
+        del self.form_youtube_urls[idx]
+        self.refresh_form_media_listboxes()
+
+    def clear_youtube(self) -> None:
+        self.form_youtube_urls = []
+        self.refresh_form_media_listboxes()
+
+    def on_select_record(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            return
+
+        selected_id = int(selected[0])
+        record = self.records.get(selected_id)
+        if not record:
+            return
+
+        self.title_entry.delete(0, tk.END)
+        self.title_entry.insert(0, record["title"])
+
+        self.date_entry.delete(0, tk.END)
+        self.date_entry.insert(0, record.get("date", ""))
+
+        self.description_text.delete("1.0", tk.END)
+        self.description_text.insert("1.0", record["description"])
+
+        self.form_images = list(record.get("images", []))
+        self.form_youtube_urls = list(record.get("youtubeUrls", []))
+        self.refresh_form_media_listboxes()
+        self.status_var.set(f"選択中: id={selected_id}")
+
+    def clear_form(self) -> None:
+        self.title_entry.delete(0, tk.END)
+        self.date_entry.delete(0, tk.END)
+        self.image_var.set("")
+        self.youtube_var.set("")
+        self.description_text.delete("1.0", tk.END)
+        self.form_images = []
+        self.form_youtube_urls = []
+        self.refresh_form_media_listboxes()
+        self.tree.clear_selection()
+        self.status_var.set("入力をクリアしました。")
+
+    def validate_form(self) -> tuple[str, str] | None:
+        title = self.title_entry.get().strip()
+        description = self.description_text.get("1.0", tk.END).strip()
+
+        if not title:
+            messagebox.showwarning("入力不足", "タイトルを入力してください。")
+            return None
+        if not description:
+            messagebox.showwarning("入力不足", "説明を入力してください。")
+            return None
+        if not self.form_images and not self.form_youtube_urls:
+            messagebox.showwarning("入力不足", "画像またはYouTubeを1件以上追加してください。")
+            return None
+
+        index = get_public_image_index(self.public_dir)
+        for image in self.form_images:
+            if not index.exists(image):
+                messagebox.showwarning("画像が見つかりません", f"public/{image} が見つかりません。")
+                return None
+
+        return (title, description)
+
+    def build_record_from_form(self, record_id: int) -> dict[str, Any] | None:
+        validated = self.validate_form()
+        if validated is None:
+            return None
+
+        title, description = validated
+        date_val = self.date_entry.get().strip()
+        return {
+            "id": record_id,
+            "title": title,
+            "date": date_val,
+            "description": description,
+            "images": unique_strings(self.form_images),
+            "youtubeUrls": unique_strings(self.form_youtube_urls),
+        }
+
+    def add_record_from_form(self) -> None:
+        record = self.build_record_from_form(0)
+        if record is None:
+            return
+
+        try:
+            record["id"] = allocate_record_ids(self.data_file, self.records)[0]
+        except (DataLockTimeout, DataMetaError) as exc:
+            messagebox.showerror("保存エラー", str(exc))
+            return
+        self.records[record["id"]] = record
+        if not self.store_change([journal_put(record)]):
+            return
+        self.search_index.add(record["id"], record_search_fields(record))
+        self.tree.upsert(record)
+        if self.search_var.get().strip():
+            self.apply_search()
+        self.tree.select(record["id"])
+        state = self.sync_or_stage("add", record["id"], record["title"], record.get("images", []))
+        self.status_var.set(f'追加しました: id={record["id"]} / {state}')
+
+    def update_selected_record(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("選択なし", "更新するレコードを選択してください。")
+            return
+
+        selected_id = int(selected[0])
+        record = self.build_record_from_form(selected_id)
+        if record is None:
+            return
+
+        if selected_id not in self.records:
+            messagebox.showerror("更新エラー", f"id={selected_id} が見つかりません。")
+            return
+        self.records[selected_id] = record
+
+        if not self.store_change([journal_put(record)]):
+            return
+        self.search_index.add(selected_id, record_search_fields(record))
+        self.tree.upsert(record)
+        if self.search_var.get().strip():
+            self.apply_search()
+            self.tree.select(selected_id)
+        state = self.sync_or_stage("update", selected_id, record["title"], record.get("images", []))
+        self.status_var.set(f"id={selected_id} を更新しました。 / {state}")
+
+    def delete_selected_record(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("選択なし", "削除するレコードを選択してください。")
+            return
+
+        selected_id = int(selected[0])
+        target = self.records.get(selected_id)
+        if not target:
+            messagebox.showerror("削除エラー", f"id={selected_id} が見つかりません。")
+            return
+
+        confirmed = messagebox.askyesno(
+            "確認",
+            f'id={selected_id}「{target["title"]}」を削除しますか？',
+        )
+        if not confirmed:
+            return
+
+        del self.records[selected_id]
+        if not self.store_change([journal_delete(selected_id)]):
+            return
+        self.search_index.remove(selected_id)
+        self.tree.remove(selected_id)
+        self.clear_form()
+        state = self.sync_or_stage("delete", selected_id, target["title"])
+        self.status_var.set(f"id={selected_id} を削除しました。 / {state}")
@@ -0,0 +1,135 @@
+"""n-gram 転置インデックスによる全文検索と、その書き出し。"""
+
+from __future__ import annotations
+
+import gzip
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any
+
+from .storage import compact_json_bytes, write_if_changed
+
+
+SEARCH_EXPORT_VERSION = 1
+SEARCH_SEPARATOR_PATTERN = re.compile(r"[\s、。，．・,.!?！？「」『』（）()\[\]【】/:;\-_]+")
+
+
+def normalize_search_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def search_ngrams(word: str) -> set[str]:
+    """区切り文字で分けた語ごとに 1文字と 2文字の n-gram を作る。分かち書きのない日本語でも部分一致で引ける。"""
+    terms: set[str] = set()
+    for part in SEARCH_SEPARATOR_PATTERN.split(word):
+        terms.update(part)
+        terms.update(part[index : index + 2] for index in range(len(part) - 1))
+    return terms
+
+
+def search_query_terms(word: str) -> set[str]:
+    terms: set[str] = set()
+    for part in SEARCH_SEPARATOR_PATTERN.split(word):
+        if len(part) == 1:
+            terms.add(part)
+        else:
+            terms.update(part[index : index + 2] for index in range(len(part) - 1))
+    return terms
+
+
+class SearchIndex:
+    """id をキーにした転置インデックス。n-gram で候補を絞り込み、正規化済み本文の部分一致で確定する。"""
+
+    def __init__(self) -> None:
+        self.postings: dict[str, set[int]] = {}
+        self.documents: dict[int, str] = {}
+        self.document_terms: dict[int, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, doc_id: int, fields: list[str]) -> None:
+        self.remove(doc_id)
+        text = normalize_search_text("\n".join(fields))
+        terms = search_ngrams(text)
+        self.documents[doc_id] = text
+        self.document_terms[doc_id] = terms
+        for term in terms:
+            self.postings.setdefault(term, set()).add(doc_id)
+
+    def sync(self, documents: dict[int, list[str]]) -> int:
+        """本文が変わった文書だけを索引し直し、消えた文書を取り除く。索引し直した件数を返す。"""
+        for doc_id in self.documents.keys() - documents.keys():
+            self.remove(doc_id)
+        updated = 0
+        for doc_id, fields in documents.items():
+            if self.documents.get(doc_id) != normalize_search_text("\n".join(fields)):
+                self.add(doc_id, fields)
+                updated += 1
+        return updated
+
+    def remove(self, doc_id: int) -> None:
+        terms = self.document_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        del self.documents[doc_id]
+        for term in terms:
+            doc_ids = self.postings.get(term)
+            if doc_ids is None:
+                continue
+            doc_ids.discard(doc_id)
+            if not doc_ids:
+                del self.postings[term]
+
+    def search(self, query: str) -> list[int]:
+        words = normalize_search_text(query).split()
+        if not words:
+            return []
+
+        terms: set[str] = set()
+        for word in words:
+            terms |= search_query_terms(word)
+
+        candidates: set[int] | None = None
+        for term in sorted(terms, key=lambda value: len(self.postings.get(value, ()))):
+            doc_ids = self.postings.get(term)
+            if not doc_ids:
+                return []
+            candidates = set(doc_ids) if candidates is None else candidates & doc_ids
+            if not candidates:
+                return []
+
+        pool = self.documents.keys() if candidates is None else candidates
+        return sorted(doc_id for doc_id in pool if all(word in self.documents[doc_id] for word in words))
+
+
+def search_index_file_for(data_file: Path) -> Path:
+    return data_file.with_suffix(".search.json")
+
+
+def search_index_paths(data_file: Path) -> list[Path]:
+    search_file = search_index_file_for(data_file)
+    return [search_file, search_file.with_name(f"{search_file.name}.gz")]
+
+
+def encode_search_index(index: SearchIndex) -> dict[str, Any]:
+    """ids の並び順を文書番号とし、各 n-gram の文書番号リストを差分符号化して返す。"""
+    ids = sorted(index.documents)
+    positions = {doc_id: position for position, doc_id in enumerate(ids)}
+    terms: dict[str, list[int]] = {}
+    for term in sorted(index.postings):
+        numbers = sorted(positions[doc_id] for doc_id in index.postings[term])
+        terms[term] = [numbers[0], *(current - previous for previous, current in zip(numbers, numbers[1:]))]
+    return {"ids": ids, "terms": terms}
+
+
+def write_search_index_artifacts(data_file: Path, payload_data: dict[str, Any]) -> list[tuple[Path, int]]:
+    payload = compact_json_bytes(
+        {"version": SEARCH_EXPORT_VERSION, "separator": SEARCH_SEPARATOR_PATTERN.pattern, **payload_data}
+    )
+    search_file, gz_file = search_index_paths(data_file)
+    write_if_changed(search_file, payload)
+    gz_payload = gzip.compress(payload, compresslevel=9, mtime=0)
+    write_if_changed(gz_file, gz_payload)
+    return [(search_file, len(payload)), (gz_file, len(gz_payload))]
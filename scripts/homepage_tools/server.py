@@ -0,0 +1,544 @@
+"""records / works をメモリに常駐させ、localhost で JSON API を提供するサーバー。
+
+  GET    /                          データ集合ごとの件数とリビジョン
+  GET    /records?q=検索語          一覧（q を付けると検索）
+  POST   /records                   追加（id は払い出す）
+  GET    /records/<id>              1件取得
+  PUT    /records/<id>              置き換え（If-Match で競合を検出）
+  DELETE /records/<id>              削除
+  *      /works/<type>[/<id>]       works の各タイプも同じ操作
+  POST   /flush                     たまった変更をすぐ書き出す
+
+GET は ETag を返し、If-None-Match が一致すれば 304 を返す。検査で弾いた内容には 422 を返す。
+変更はまとめてファイルへ書き出し、publish で公開できるよう未公開の変更として記録する。
+書き出せない変更は残して再試行し、理由を GET / の flushErrors と POST /flush の 422 で返す。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import signal
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from .paths import PUBLIC_DIR
+from .staging import stage_changes
+from .locking import data_file_lock, DataLockTimeout, read_revision, RevisionConflict
+from .storage import compact_json_bytes, DataMetaError
+from .search import SearchIndex
+from .validation import ValidationError, ValidationReport
+from .records import (
+    allocate_record_ids,
+    data_commit_paths as records_commit_paths,
+    load_records,
+    merge_records,
+    normalize_record,
+    record_search_fields,
+    save_records,
+    validate_records,
+)
+from .works import (
+    WORK_TYPE_INFO,
+    allocate_item_id,
+    data_commit_paths as works_commit_paths,
+    index_works_by_id,
+    item_search_fields,
+    load_works_data,
+    merge_works,
+    normalize_game_item,
+    normalize_tool_item,
+    save_works_data,
+    validate_works,
+)
+
+
+SERVER_HOST = "127.0.0.1"
+SERVER_FLUSH_SECONDS = 0.5
+SERVER_MAX_BODY_BYTES = 1024 * 1024
+# 再起動でリビジョンが 0 に戻っても、前回の ETag と一致しないようにする
+SERVER_EPOCH = format(time.time_ns(), "x")
+HTTP_REASONS = {
+    200: "OK",
+    201: "Created",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    412: "Precondition Failed",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str, headers: dict[str, str] | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def item_etag(item: dict[str, Any]) -> str:
+    return '"' + hashlib.sha1(compact_json_bytes(item)).hexdigest()[:16] + '"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def error_message(report: ValidationReport) -> str:
+    return " / ".join(str(issue) for issue in report.errors)
+
+
+def validate_record(record: dict[str, Any]) -> str:
+    return error_message(validate_records([record]))
+
+
+def validate_work_item(type_key: str, item: dict[str, Any]) -> str:
+    return error_message(validate_works({type_key: [item]}))
+
+
+class Collection:
+    """records、または works の1タイプ分。id 索引と検索索引を変更のたびに更新する。"""
+
+    def __init__(
+        self,
+        name: str,
+        items: list[dict[str, Any]],
+        normalize: Callable[[Any], dict[str, Any] | None],
+        validate: Callable[[dict[str, Any]], str],
+        search_fields: Callable[[dict[str, Any]], list[str]],
+        allocate: Callable[[dict[int, dict[str, Any]]], int],
+        invalid_message: str,
+    ):
+        self.name = name
+        self.items = {int(item["id"]): item for item in items}
+        self.normalize = normalize
+        self.validate = validate
+        self.search_fields = search_fields
+        self.allocate = allocate
+        self.invalid_message = invalid_message
+        self.index = SearchIndex()
+        for item_id, item in self.items.items():
+            self.index.add(item_id, search_fields(item))
+        self.revision = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.name.replace("/", "-")}-{SERVER_EPOCH}-{self.revision}"'
+
+    def list(self, query: str) -> list[dict[str, Any]]:
+        item_ids = self.index.search(query) if query.strip() else self.items.keys()
+        return [self.items[item_id] for item_id in sorted(item_ids)]
+
+    def get(self, item_id: int) -> dict[str, Any]:
+        item = self.items.get(item_id)
+        if item is None:
+            raise ApiError(404, f"{self.name} に id={item_id} は見つかりません。")
+        return item
+
+    def build(self, item_id: int, payload: Any) -> dict[str, Any]:
+        """送られた内容を検査して正規化する。ファイルや画像一覧を見るので、イベントループの外で呼ぶ。"""
+        if not isinstance(payload, dict):
+            raise ApiError(400, "JSON オブジェクトを送ってください。")
+        raw = {**payload, "id": item_id}
+        # 正規化すると問題のある項目が黙って落ちたり補われたりするので、送られたままの内容を検査する
+        message = self.validate(raw)
+        if message:
+            raise ApiError(422, message)
+        item = self.normalize(raw)
+        if item is None:
+            raise ApiError(422, self.invalid_message)
+        # 書き出し時の検査と同じ内容を調べておき、その時はキャッシュから結果が取れるようにする
+        message = self.validate(item)
+        if message:
+            raise ApiError(422, message)
+        return item
+
+    def put(self, item: dict[str, Any]) -> None:
+        self.items[item["id"]] = item
+        self.index.add(item["id"], self.search_fields(item))
+        self.revision += 1
+
+    async def add(self, payload: Any) -> dict[str, Any]:
+        # id は CLI / GUI と同じメタ情報から払い出す。検証で弾いた分は欠番になるが、重複も再利用もしない。
+        # ロック待ちや画像の確認でイベントループを止めないよう、払い出しと検査はスレッドで行う
+        item_id = await asyncio.to_thread(self.allocate, dict(self.items))
+        item = await asyncio.to_thread(self.build, item_id, payload)
+        self.put(item)
+        return item
+
+    async def update(self, item_id: int, payload: Any) -> dict[str, Any]:
+        current = self.get(item_id)
+        item = await asyncio.to_thread(self.build, item_id, payload)
+        if self.items.get(item_id) is not current:
+            raise ApiError(412, f"id={item_id} は他の変更で更新されています。取得し直してください。")
+        self.put(item)
+        return item
+
+    def delete(self, item_id: int) -> dict[str, Any]:
+        item = self.get(item_id)
+        del self.items[item_id]
+        self.index.remove(item_id)
+        self.revision += 1
+        return item
+
+    def absorb(self, latest: dict[int, dict[str, Any]], keep: set[int]) -> None:
+        """他のツールが保存した内容を取り込む。keep の id はこちらの未書き出しの変更なので触らない。"""
+        for item_id in self.items.keys() - latest.keys() - keep:
+            del self.items[item_id]
+            self.index.remove(item_id)
+        for item_id, item in latest.items():
+            if item_id not in keep and self.items.get(item_id) != item:
+                self.items[item_id] = item
+                self.index.add(item_id, self.search_fields(item))
+        self.revision += 1
+
+
+class ApiStore:
+    """両データを保持し、HTTP リクエストを処理する。変更は一定間隔でまとめて書き出す。"""
+
+    def __init__(self, records_file: Path, works_file: Path):
+        self.records_file = records_file
+        self.works_file = works_file
+        self.collections: dict[str, Collection] = {}
+        self.revisions = {"records": read_revision(records_file), "works": read_revision(works_file)}
+
+        self.collections["records"] = Collection(
+            "records",
+            load_records(records_file),
+            normalize_record,
+            validate_record,
+            record_search_fields,
+            lambda items: allocate_record_ids(records_file, items)[0],
+            "title / description と、images か youtubeUrls のどちらかが1件以上必要です。",
+        )
+
+        works = load_works_data(works_file)
+        for type_key, info in WORK_TYPE_INFO.items():
+            self.collections[f"works/{type_key}"] = Collection(
+                f"works/{type_key}",
+                works[type_key],
+                normalize_game_item if info["kind"] == "game" else normalize_tool_item,
+                partial(validate_work_item, type_key),
+                item_search_fields,
+                partial(allocate_item_id, works_file, type_key),
+                "データの形式が不正です。",
+            )
+
+        # まだ書き出していない変更。records は id、works は (タイプ, id) の集合
+        self.dirty: dict[str, set[Any]] = {"records": set(), "works": set()}
+        self.pending: dict[str, list[tuple[dict[str, Any], list[Path]]]] = {"records": [], "works": []}
+        # 書き出せずに残っている変更の理由。解消するまで GET / と POST /flush で返す
+        self.flush_errors: dict[str, str] = {}
+        self.flush_lock = asyncio.Lock()
+        self.write_lock = threading.Lock()
+
+    def summary(self) -> dict[str, Any]:
+        summary: dict[str, Any] = {
+            name: {"count": len(collection.items), "revision": collection.revision}
+            for name, collection in self.collections.items()
+        }
+        if self.flush_errors:
+            summary["flushErrors"] = dict(self.flush_errors)
+        return summary
+
+    def record_change(self, name: str, action: str, item: dict[str, Any]) -> None:
+        if name == "records":
+            paths = [PUBLIC_DIR / image_ref for image_ref in item["images"]] if action != "delete" else []
+            self.pending["records"].append(({"action": action, "id": item["id"], "title": item["title"]}, paths))
+            self.dirty["records"].add(item["id"])
+            return
+        type_key = name.split("/", 1)[1]
+        change = {"action": action, "type": type_key, "id": item["id"], "title": item.get("title", "")}
+        self.pending["works"].append((change, []))
+        self.dirty["works"].add((type_key, item["id"]))
+
+    def collect(self, kind: str) -> Any:
+        """書き出す内容を確定させる。要素は置き換えるだけで書き換えないので、浅い複製で足りる。"""
+        if kind == "records":
+            return list(self.collections["records"].items.values())
+        return {type_key: list(self.collections[f"works/{type_key}"].items.values()) for type_key in WORK_TYPE_INFO}
+
+    def take_snapshot(self) -> list[tuple[str, Any, set[Any], list[tuple[dict[str, Any], list[Path]]]]]:
+        snapshot = []
+        for kind in ("records", "works"):
+            if not self.dirty[kind]:
+                continue
+            snapshot.append((kind, self.collect(kind), self.dirty[kind], self.pending[kind]))
+            self.dirty[kind] = set()
+            self.pending[kind] = []
+        return snapshot
+
+    def write_records(
+        self, items: list[dict[str, Any]], changed_ids: set[int], changes: list[tuple[dict[str, Any], list[Path]]]
+    ) -> list[dict[str, Any]] | None:
+        """書き出し、他のツールの保存と競合したときは重ねた結果を返す。"""
+        merged = None
+        with data_file_lock(self.records_file):
+            try:
+                self.revisions["records"] = save_records(self.records_file, items, changed_ids, self.revisions["records"])
+            except RevisionConflict:
+                revision = read_revision(self.records_file)
+                ours = {int(item["id"]): item for item in items}
+                merged = merge_records(load_records(self.records_file), ours, changed_ids)
+                self.revisions["records"] = save_records(self.records_file, merged, changed_ids, revision)
+            commit_paths = records_commit_paths(self.records_file)
+            stage_changes(self.records_file, [(change, commit_paths + paths) for change, paths in changes])
+        return merged
+
+    def write_works(
+        self,
+        works: dict[str, list[dict[str, Any]]],
+        changed: set[tuple[str, int]],
+        changes: list[tuple[dict[str, Any], list[Path]]],
+    ) -> dict[str, list[dict[str, Any]]] | None:
+        merged = None
+        with data_file_lock(self.works_file):
+            try:
+                self.revisions["works"] = save_works_data(self.works_file, works, self.revisions["works"], changed)
+            except RevisionConflict:
+                revision = read_revision(self.works_file)
+                merged = merge_works(load_works_data(self.works_file), index_works_by_id(works), changed)
+                self.revisions["works"] = save_works_data(self.works_file, merged, revision, changed)
+            commit_paths = works_commit_paths(self.works_file)
+            stage_changes(self.works_file, [(change, commit_paths + paths) for change, paths in changes])
+        return merged
+
+    def write_entry(self, kind: str, data: Any, changed: set[Any], changes: list[tuple[dict[str, Any], list[Path]]]) -> Any:
+        with self.write_lock:
+            if kind == "records":
+                return self.write_records(data, changed, changes)
+            return self.write_works(data, changed, changes)
+
+    def absorb(self, kind: str, merged: Any) -> None:
+        print(f"警告: {kind} は他のツールでも保存されていたため、その内容に今回の変更を重ねて書き出しました。")
+        if kind == "records":
+            latest = {int(item["id"]): item for item in merged}
+            self.collections["records"].absorb(latest, self.dirty["records"])
+            return
+        for type_key in WORK_TYPE_INFO:
+            latest = {int(item["id"]): item for item in merged.get(type_key, [])}
+            keep = {item_id for changed_type, item_id in self.dirty["works"] if changed_type == type_key}
+            self.collections[f"works/{type_key}"].absorb(latest, keep)
+
+    async def flush(self) -> None:
+        async with self.flush_lock:
+            for kind, data, changed, changes in self.take_snapshot():
+                try:
+                    merged = await asyncio.to_thread(self.write_entry, kind, data, changed, changes)
+                except (OSError, DataLockTimeout, DataMetaError, ValidationError) as exc:
+                    # 全件を書き出す方式なので、次回の書き出しでまとめて再試行すればよい。
+                    # 受け付けた後に画像が消えた場合などの検査エラーも、画像を戻せば次回で書き出せる
+                    if self.flush_errors.get(kind) != str(exc):
+                        print(f"警告: {kind} の書き出しに失敗しました。解消するまで再試行します: {exc}")
+                    self.flush_errors[kind] = str(exc)
+                    self.dirty[kind] |= changed
+                    self.pending[kind] = changes + self.pending[kind]
+                    continue
+                if self.flush_errors.pop(kind, None):
+                    print(f"{kind} の書き出しに成功しました。")
+                if merged is not None:
+                    self.absorb(kind, merged)
+
+    def flush_now(self) -> None:
+        """終了時用。実行中のバックグラウンド書き出しが終わるのを待ってから、残りを書き出す。"""
+        for kind, data, changed, changes in self.take_snapshot():
+            try:
+                self.write_entry(kind, data, changed, changes)
+            except (OSError, DataLockTimeout, DataMetaError, ValidationError) as exc:
+                print(f"エラー: {kind} の変更 {len(changes)} 件を書き出せないまま終了します: {exc}")
+
+    async def flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(SERVER_FLUSH_SECONDS)
+            if any(self.dirty.values()):
+                await self.flush()
+
+    def resolve(self, parts: list[str]) -> tuple[Collection, int | None]:
+        if parts and parts[0] == "records" and len(parts) <= 2:
+            name, rest = "records", parts[1:]
+        elif len(parts) in (2, 3) and parts[0] == "works":
+            name, rest = f"works/{parts[1]}", parts[2:]
+        else:
+            raise ApiError(404, "そのパスはありません。")
+
+        collection = self.collections.get(name)
+        if collection is None:
+            raise ApiError(404, f"{name} はありません。")
+        if not rest:
+            return (collection, None)
+        try:
+            return (collection, int(rest[0]))
+        except ValueError as exc:
+            raise ApiError(404, f"id '{rest[0]}' は数値ではありません。") from exc
+
+    async def dispatch(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, Any, dict[str, str]]:
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+
+        if not parts:
+            if method != "GET":
+                raise ApiError(405, "GET のみ使えます。", {"Allow": "GET"})
+            return (200, self.summary(), {})
+        if parts == ["flush"]:
+            if method != "POST":
+                raise ApiError(405, "POST のみ使えます。", {"Allow": "POST"})
+            await self.flush()
+            if self.flush_errors:
+                raise ApiError(422, " / ".join(f"{kind}: {message}" for kind, message in self.flush_errors.items()))
+            return (200, self.summary(), {})
+
+        collection, item_id = self.resolve(parts)
+        if item_id is None:
+            if method == "GET":
+                if etag_matches(headers.get("if-none-match"), collection.etag):
+                    return (304, None, {"ETag": collection.etag})
+                query = parse_qs(url.query).get("q", [""])[0]
+                items = collection.list(query)
+                payload = {"items": items, "count": len(items), "revision": collection.revision}
+                return (200, payload, {"ETag": collection.etag})
+            if method == "POST":
+                item = await collection.add(parse_json_body(body))
+                self.record_change(collection.name, "add", item)
+                location = f"/{collection.name}/{item['id']}"
+                return (201, item, {"ETag": item_etag(item), "Location": location})
+            raise ApiError(405, "GET / POST のみ使えます。", {"Allow": "GET, POST"})
+
+        if method == "GET":
+            item = collection.get(item_id)
+            etag = item_etag(item)
+            if etag_matches(headers.get("if-none-match"), etag):
+                return (304, None, {"ETag": etag})
+            return (200, item, {"ETag": etag})
+        if method in ("PUT", "DELETE"):
+            current = collection.get(item_id)
+            if_match = headers.get("if-match")
+            if if_match and not etag_matches(if_match, item_etag(current)):
+                raise ApiError(412, f"id={item_id} は他の変更で更新されています。取得し直してください。")
+            if method == "PUT":
+                item = await collection.update(item_id, parse_json_body(body))
+                self.record_change(collection.name, "update", item)
+                return (200, item, {"ETag": item_etag(item)})
+            item = collection.delete(item_id)
+            self.record_change(collection.name, "delete", item)
+            return (200, item, {})
+        raise ApiError(405, "GET / PUT / DELETE のみ使えます。", {"Allow": "GET, PUT, DELETE"})
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ApiError as exc:
+                    writer.write(build_response(exc.status, {"error": str(exc)}, exc.headers, keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+
+                method, target, version, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    status, payload, extra_headers = await self.dispatch(method, target, headers, body)
+                except ApiError as exc:
+                    status, payload, extra_headers = exc.status, {"error": str(exc)}, exc.headers
+                except DataLockTimeout as exc:
+                    status, payload, extra_headers = 503, {"error": str(exc)}, {"Retry-After": "1"}
+                except DataMetaError as exc:
+                    # 直すまで保存できないので、内容をそのまま返して気付けるようにする
+                    status, payload, extra_headers = 500, {"error": str(exc)}, {}
+                except Exception as exc:
+                    # 1件の失敗でサーバー全体を止めない
+                    print(f"エラー: {method} {target}: {exc}")
+                    status, payload, extra_headers = 500, {"error": "サーバー内部でエラーが発生しました。"}, {}
+
+                writer.write(build_response(status, payload, extra_headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        except asyncio.CancelledError:
+            # 終了時に待機中の keep-alive 接続が取り消されるのは正常な終わり方として扱う
+            return
+        finally:
+            writer.close()
+
+
+def parse_json_body(body: bytes) -> Any:
+    try:
+        return json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ApiError(400, f"JSON として読み込めません: {exc}") from exc
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[str, str, str, dict[str, str], bytes] | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ApiError(400, "リクエスト行が不正です。")
+    method, target, version = parts
+
+    headers: dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError as exc:
+        raise ApiError(400, "Content-Length が不正です。") from exc
+    if length > SERVER_MAX_BODY_BYTES:
+        raise ApiError(413, "リクエスト本文が大きすぎます。")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return (method.upper(), target, version, headers, body)
+
+
+def build_response(status: int, payload: Any, headers: dict[str, str], keep_alive: bool) -> bytes:
+    body = b"" if payload is None else compact_json_bytes(payload)
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Unknown')}"]
+    if body:
+        lines.append("Content-Type: application/json; charset=utf-8")
+    lines.append(f"Content-Length: {len(body)}")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve(records_file: Path, works_file: Path, port: int) -> None:
+    store = ApiStore(records_file, works_file)
+    server = await asyncio.start_server(store.handle_connection, SERVER_HOST, port)
+    flusher = asyncio.create_task(store.flush_periodically())
+    counts = ", ".join(f"{name} {len(collection.items)}件" for name, collection in store.collections.items())
+    print(f"http://{SERVER_HOST}:{port}/ で待ち受けています（Ctrl+C で終了）")
+    print(f"読み込み: {counts}")
+
+    # 自動化から kill で止められても、たまった変更を書き出してから終わる（Windows では未対応）
+    stopped = asyncio.Event()
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        flusher.cancel()
+        store.flush_now()
@@ -0,0 +1,896 @@
+"""SHOP データの管理 GUI。"""
+
+from __future__ import annotations
+
+import queue
+import time
+import tkinter as tk
+from pathlib import Path
+from tkinter import filedialog, messagebox, ttk
+from typing import Any
+
+from .paths import PUBLIC_DIR
+from .normalize import normalize_image_reference, parse_youtube_url, split_lines, unique_strings
+from .git import GIT_SESSION, GitSyncWorker
+from .staging import (
+    build_publish_message,
+    discard_pending_changes,
+    load_pending_changes,
+    pending_change_paths,
+    stage_change,
+)
+from .images import IMAGE_EXTENSIONS, import_image_to_public, list_public_images, resolve_public_image_path
+from .locking import DataLockTimeout, read_revision, RevisionConflict
+from .search import SearchIndex
+from .storage import DataMetaError
+from .validation import ValidationError
+from .works import (
+    COLOR_CLASS_OPTIONS,
+    WORK_TYPE_INFO,
+    allocate_item_id,
+    build_works_search_indexes,
+    data_commit_paths,
+    index_works_by_id,
+    is_image_reference,
+    item_search_fields,
+    load_works_data,
+    merge_works,
+    save_works_data,
+)
+from .watch import diff_rows, FileWatcher
+from .widgets import GIT_SYNC_POLL_MS, PREVIEW_POLL_MS, SEARCH_DEBOUNCE_MS, ThumbnailCache, VirtualTreeview
+
+
+class ShopGui:
+    def __init__(self, root: tk.Tk, data_file: Path, stage: bool = False):
+        self.root = root
+        self.data_file = data_file
+        self.stage_initial = stage
+        self.public_dir = PUBLIC_DIR
+        self.git_worker = GitSyncWorker()
+        self.last_git_message = ""
+        self.thumbnails = ThumbnailCache(self.public_dir)
+        self.preview_ref = ""
+        self.preview_image: tk.PhotoImage | None = None
+        self.revision = read_revision(data_file)
+        works = load_works_data(data_file)
+        self.works_by_id = index_works_by_id(works)
+        self.search_indexes = build_works_search_indexes(works)
+        self.search_after_id: str | None = None
+        self.public_images: list[str] = []
+        self.form_trailer_urls: list[str] = []
+        self.form_screenshots: list[str] = []
+
+        self.root.title("SHOPデータ管理")
+        self.root.geometry("1280x780")
+        self.root.minsize(1080, 680)
+
+        self.type_label_to_key = {info["label"]: key for key, info in WORK_TYPE_INFO.items()}
+        self.type_labels = [info["label"] for info in WORK_TYPE_INFO.values()]
+
+        self._build_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_git_results()
+        self.poll_previews()
+        self.refresh_public_images()
+        self.refresh_list()
+        self.watcher = FileWatcher([data_file], self.public_dir)
+        self.root.after(self.watcher.delay_ms, self.poll_files)
+
+    def _build_ui(self) -> None:
+        wrapper = ttk.Frame(self.root, padding=12)
+        wrapper.pack(fill=tk.BOTH, expand=True)
+
+        top = ttk.Frame(wrapper)
+        top.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(top, text="データファイル:").pack(side=tk.LEFT)
+        ttk.Label(top, text=str(self.data_file), foreground="#555").pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(top, text="再読み込み", command=self.reload_data).pack(side=tk.RIGHT)
+        ttk.Button(top, text="公開", command=self.publish_changes).pack(side=tk.RIGHT, padx=(0, 6))
+        self.stage_var = tk.BooleanVar(value=self.stage_initial)
+        ttk.Checkbutton(top, text="まとめて公開", variable=self.stage_var).pack(side=tk.RIGHT, padx=(0, 6))
+
+        type_row = ttk.Frame(wrapper)
+        type_row.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(type_row, text="タイプ").pack(side=tk.LEFT)
+        self.type_var = tk.StringVar(value=self.type_labels[0])
+        self.type_combo = ttk.Combobox(type_row, state="readonly", textvariable=self.type_var, values=self.type_labels, width=16)
+        self.type_combo.pack(side=tk.LEFT, padx=(8, 0))
+        self.type_combo.bind("<<ComboboxSelected>>", self.on_type_change)
+
+        main = ttk.Panedwindow(wrapper, orient=tk.HORIZONTAL)
+        main.pack(fill=tk.BOTH, expand=True)
+
+        left = ttk.Frame(main, padding=8)
+        right = ttk.Frame(main, padding=8)
+        main.add(left, weight=3)
+        main.add(right, weight=2)
+
+        search_row = ttk.Frame(left)
+        search_row.pack(side=tk.TOP, fill=tk.X, pady=(0, 6))
+        ttk.Label(search_row, text="検索").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.schedule_search())
+        ttk.Entry(search_row, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 6))
+        ttk.Button(search_row, text="クリア", command=lambda: self.search_var.set("")).pack(side=tk.LEFT)
+
+        self.tree = VirtualTreeview(
+            left,
+            columns=(
+                ("id", "ID", 60, tk.CENTER),
+                ("title", "タイトル", 300, tk.W),
+                ("price", "価格", 90, tk.E),
+                ("media", "メディア", 120, tk.CENTER),
+            ),
+            row_values=self.item_row_values,
+            on_select=self.on_select_row,
+            height=24,
+        )
+        self.tree.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+
+        form = right
+
+        ttk.Label(form, text="タイトル").pack(anchor=tk.W)
+        self.title_entry = ttk.Entry(form)
+        self.title_entry.pack(fill=tk.X, pady=(0, 8))
+
+        ttk.Label(form, text="カテゴリ表示名").pack(anchor=tk.W)
+        self.category_entry = ttk.Entry(form)
+        self.category_entry.pack(fill=tk.X, pady=(0, 8))
+
+        common_row = ttk.Frame(form)
+        common_row.pack(fill=tk.X, pady=(0, 8))
+        ttk.Label(common_row, text="価格").pack(side=tk.LEFT)
+        self.price_entry = ttk.Entry(common_row, width=10)
+        self.price_entry.pack(side=tk.LEFT, padx=(6, 16))
+
+        ttk.Label(common_row, text="色クラス").pack(side=tk.LEFT)
+        self.color_var = tk.StringVar(value=COLOR_CLASS_OPTIONS[0])
+        self.color_combo = ttk.Combobox(
+            common_row,
+            state="readonly",
+            textvariable=self.color_var,
+            values=COLOR_CLASS_OPTIONS,
+        )
+        self.color_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
+
+        ttk.Label(form, text="BOOTH URL").pack(anchor=tk.W)
+        self.booth_url_entry = ttk.Entry(form)
+        self.booth_url_entry.pack(fill=tk.X, pady=(0, 8))
+
+        self.main_visual_label_var = tk.StringVar(value="画像/アイコン")
+        ttk.Label(form, textvariable=self.main_visual_label_var).pack(anchor=tk.W)
+        self.main_visual_entry = ttk.Entry(form)
+        self.main_visual_entry.pack(fill=tk.X, pady=(0, 8))
+
+        extra_row = ttk.Frame(form)
+        extra_row.pack(fill=tk.X, pady=(0, 8))
+        self.rating_label = ttk.Label(extra_row, text="評価")
+        self.rating_label.pack(side=tk.LEFT)
+        self.rating_entry = ttk.Entry(extra_row, width=10)
+        self.rating_entry.pack(side=tk.LEFT, padx=(6, 16))
+
+        self.in_development_var = tk.BooleanVar(value=False)
+        self.in_development_check = ttk.Checkbutton(extra_row, text="開発中", variable=self.in_development_var)
+        self.in_development_check.pack(side=tk.LEFT, padx=(0, 12))
+
+        self.show_price_status_var = tk.BooleanVar(value=False)
+        self.show_price_status_check = ttk.Checkbutton(
+            extra_row,
+            text="価格欄に「非販売」を表示",
+            variable=self.show_price_status_var,
+        )
+        self.show_price_status_check.pack(side=tk.LEFT, padx=(0, 12))
+
+        self.is_new_var = tk.BooleanVar(value=False)
+        self.is_new_check = ttk.Checkbutton(extra_row, text="NEW", variable=self.is_new_var)
+        self.is_new_check.pack(side=tk.LEFT)
+
+        self.extra_list_label_var = tk.StringVar(value="タグ/機能（改行区切り）")
+        ttk.Label(form, textvariable=self.extra_list_label_var).pack(anchor=tk.W)
+        self.extra_list_text = tk.Text(form, height=4, wrap=tk.WORD)
+        self.extra_list_text.pack(fill=tk.X, pady=(0, 8))
+
+        ttk.Label(form, text="説明").pack(anchor=tk.W)
+        self.description_text = tk.Text(form, height=5, wrap=tk.WORD)
+        self.description_text.pack(fill=tk.X, pady=(0, 8))
+
+        trailer_entry_row = ttk.Frame(form)
+        trailer_entry_row.pack(fill=tk.X)
+        ttk.Label(trailer_entry_row, text="YouTube URL").pack(side=tk.LEFT)
+        self.trailer_input_var = tk.StringVar(value="")
+        self.trailer_input = ttk.Entry(trailer_entry_row, textvariable=self.trailer_input_var)
+        self.trailer_input.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        ttk.Button(trailer_entry_row, text="追加", command=self.add_trailer_url).pack(side=tk.LEFT, padx=(8, 0))
+
+        trailer_list_row = ttk.Frame(form)
+        trailer_list_row.pack(fill=tk.X, pady=(4, 8))
+        self.trailer_listbox = tk.Listbox(trailer_list_row, height=3)
+        self.trailer_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        trailer_actions = ttk.Frame(trailer_list_row)
+        trailer_actions.pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(trailer_actions, text="削除", command=self.remove_trailer_url).pack(fill=tk.X)
+        ttk.Button(trailer_actions, text="クリア", command=self.clear_trailer_urls).pack(fill=tk.X, pady=(6, 0))
+
+        screenshot_entry_row = ttk.Frame(form)
+        screenshot_entry_row.pack(fill=tk.X)
+        ttk.Label(screenshot_entry_row, text="スクショ/画像").pack(side=tk.LEFT)
+        self.screenshot_input_var = tk.StringVar(value="")
+        self.screenshot_input = ttk.Combobox(screenshot_entry_row, textvariable=self.screenshot_input_var)
+        self.screenshot_input.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        ttk.Button(screenshot_entry_row, text="参照...", command=self.browse_screenshot).pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(screenshot_entry_row, text="追加", command=self.add_screenshot).pack(side=tk.LEFT, padx=(6, 0))
+
+        screenshot_list_row = ttk.Frame(form)
+        screenshot_list_row.pack(fill=tk.X, pady=(4, 8))
+        self.screenshot_listbox = tk.Listbox(screenshot_list_row, height=3)
+        self.screenshot_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        screenshot_actions = ttk.Frame(screenshot_list_row)
+        screenshot_actions.pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(screenshot_actions, text="削除", command=self.remove_screenshot).pack(fill=tk.X)
+        ttk.Button(screenshot_actions, text="クリア", command=self.clear_screenshots).pack(fill=tk.X, pady=(6, 0))
+        self.preview_label = ttk.Label(screenshot_list_row, anchor=tk.CENTER, justify=tk.CENTER, width=18)
+        self.preview_label.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
+        self.screenshot_listbox.bind("<<ListboxSelect>>", self.on_select_preview)
+
+        button_row = ttk.Frame(form)
+        button_row.pack(fill=tk.X, pady=(8, 4))
+        ttk.Button(button_row, text="新規追加", command=self.add_item).pack(side=tk.LEFT)
+        ttk.Button(button_row, text="選択行を更新", command=self.update_item).pack(side=tk.LEFT, padx=6)
+        ttk.Button(button_row, text="選択行を削除", command=self.delete_item).pack(side=tk.LEFT, padx=6)
+        ttk.Button(button_row, text="入力クリア", command=self.clear_form).pack(side=tk.LEFT, padx=6)
+
+        self.status_var = tk.StringVar(value="")
+        self.sync_status_var = tk.StringVar(value="")
+        ttk.Label(form, textvariable=self.status_var, foreground="#555").pack(anchor=tk.W, pady=(2, 0))
+        ttk.Label(form, textvariable=self.sync_status_var, foreground="#555").pack(anchor=tk.W)
+
+        self.update_dynamic_labels()
+
+    def commit_paths(self, image_refs: list[str] | None = None) -> list[Path]:
+        paths = data_commit_paths(self.data_file)
+        for image_ref in image_refs or []:
+            target = resolve_public_image_path(self.public_dir, image_ref)
+            if target and target.exists() and target.is_file():
+                paths.append(target)
+        return paths
+
+    def sync_git(self, commit_message: str, image_refs: list[str] | None = None) -> None:
+        self.git_worker.submit(self.commit_paths(image_refs), commit_message)
+        self.update_sync_status()
+
+    def sync_or_stage(self, action: str, item: dict[str, Any], image_refs: list[str] | None = None) -> str:
+        if not self.stage_var.get():
+            self.sync_git(action, image_refs)
+            return "Git同期待ち"
+        change = {
+            "action": action,
+            "type": self.get_selected_type_key(),
+            "id": item["id"],
+            "title": item.get("title", ""),
+        }
+        try:
+            count = stage_change(self.data_file, change, self.commit_paths(image_refs))
+        except DataLockTimeout as exc:
+            messagebox.showerror("記録エラー", f"保存はできましたが、未公開の変更として記録できませんでした。\n{exc}")
+            return "未公開の記録に失敗"
+        return f"未公開 {count} 件"
+
+    def publish_changes(self) -> None:
+        try:
+            changes = load_pending_changes(self.data_file)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("公開エラー", str(exc))
+            return
+        if not changes:
+            self.status_var.set("公開する変更はありません。")
+            return
+
+        data_file = self.data_file
+        self.git_worker.submit(
+            data_commit_paths(self.data_file) + pending_change_paths(changes),
+            build_publish_message("works", changes),
+            on_success=lambda: discard_pending_changes(data_file, len(changes)),
+        )
+        self.update_sync_status()
+        self.status_var.set(f"{len(changes)} 件の変更を公開します。 / Git同期待ち")
+
+    def on_select_preview(self, _event: Any = None) -> None:
+        selected = self.screenshot_listbox.curselection()
+        if selected:
+            self.show_preview(self.form_screenshots[selected[0]])
+
+    def show_preview(self, image_ref: str) -> None:
+        self.preview_ref = image_ref
+        if not image_ref or not is_image_reference(image_ref):
+            self.preview_image = None
+            self.preview_label.configure(image="", text="")
+            return
+        if not self.thumbnails.available:
+            self.preview_label.configure(image="", text="プレビューには\nPillow が必要です")
+            return
+
+        image = self.thumbnails.get(image_ref)
+        if image is None:
+            self.preview_label.configure(image="", text="読み込み中...")
+            self.thumbnails.request(image_ref)
+            return
+        self.preview_image = image
+        self.preview_label.configure(image=image, text="")
+
+    def poll_previews(self) -> None:
+        for image_ref, error in self.thumbnails.poll():
+            if image_ref != self.preview_ref:
+                continue
+            if error:
+                self.preview_label.configure(image="", text="プレビュー不可")
+            else:
+                self.show_preview(image_ref)
+        self.root.after(PREVIEW_POLL_MS, self.poll_previews)
+
+    def poll_git_results(self) -> None:
+        while True:
+            try:
+                git_ok, git_message = self.git_worker.results.get_nowait()
+            except queue.Empty:
+                break
+            first_line = git_message.splitlines()[0] if git_message else ""
+            self.last_git_message = first_line if git_ok else f"失敗: {first_line}"
+            if not git_ok:
+                messagebox.showwarning("Git同期", git_message)
+        self.update_sync_status()
+        self.root.after(GIT_SYNC_POLL_MS, self.poll_git_results)
+
+    def update_sync_status(self) -> None:
+        pending = self.git_worker.pending_count()
+        timing = GIT_SESSION.timing_summary()
+        timing_text = f"（{timing}）" if timing and self.last_git_message else ""
+        self.sync_status_var.set(f"Git: 待機 {pending} 件 / 最終: {self.last_git_message or '-'}{timing_text}")
+
+    def on_close(self) -> None:
+        pending = self.git_worker.pending_count()
+        if pending > 0:
+            wait = messagebox.askyesno(
+                "Git同期",
+                f"未完了のGit同期が {pending} 件あります。完了を待ってから終了しますか？",
+            )
+            if wait:
+                self.sync_status_var.set("Git同期の完了を待っています...")
+                self.root.update_idletasks()
+                self.git_worker.stop()
+        self.thumbnails.stop()
+        self.root.destroy()
+
+    def collect_commit_image_refs(self, item: dict[str, Any]) -> list[str]:
+        refs: list[str] = []
+
+        if self.is_game_type():
+            main_visual = item.get("image")
+        else:
+            main_visual = item.get("icon")
+        if isinstance(main_visual, str):
+            refs.append(main_visual)
+
+        screenshots = item.get("screenshots")
+        if isinstance(screenshots, list):
+            refs.extend(value for value in screenshots if isinstance(value, str))
+
+        return unique_strings(refs)
+
+    def save_works(self, changed: set[tuple[str, int]]) -> bool:
+        """保存できたかを返す。他のツールと競合して今回の変更を破棄した場合は False。"""
+        works = {type_key: list(items.values()) for type_key, items in self.works_by_id.items()}
+        try:
+            self.revision = save_works_data(self.data_file, works, self.revision, changed)
+            return True
+        except RevisionConflict:
+            return self.resolve_conflict(changed)
+        except ValidationError as exc:
+            messagebox.showerror("入力エラー", str(exc))
+            self.reload_data()
+            return False
+        except (DataLockTimeout, DataMetaError) as exc:
+            messagebox.showerror("保存エラー", str(exc))
+            self.reload_data()
+            return False
+
+    def resolve_conflict(self, changed: set[tuple[str, int]]) -> bool:
+        merge = messagebox.askyesno(
+            "保存の競合",
+            "このウィンドウで読み込んだ後に、他のツールがデータを保存しています。\n\n"
+            "はい: 最新のデータに今回の変更を重ねて保存します。\n"
+            "いいえ: 今回の変更を破棄し、最新のデータを読み込み直します。",
+        )
+        if merge:
+            try:
+                revision = read_revision(self.data_file)
+                merged = merge_works(load_works_data(self.data_file), self.works_by_id, changed)
+                self.revision = save_works_data(self.data_file, merged, revision, changed)
+            except (RevisionConflict, DataLockTimeout, DataMetaError, ValidationError) as exc:
+                messagebox.showerror("保存エラー", f"{exc}\nもう一度操作してください。")
+            else:
+                self.show_works(merged)
+                return True
+        self.reload_data()
+        self.status_var.set("最新のデータを読み込み直しました。今回の変更は保存されていません。")
+        return False
+
+    @property
+    def search_index(self) -> SearchIndex:
+        return self.search_indexes[self.get_selected_type_key()]
+
+    def reload_data(self) -> None:
+        self.revision = read_revision(self.data_file)
+        self.show_works(load_works_data(self.data_file))
+        self.status_var.set("再読み込みしました。")
+
+    def poll_files(self) -> None:
+        changed = self.watcher.poll()
+        if self.public_dir in changed:
+            self.refresh_public_images()
+        if self.data_file in changed:
+            self.reload_external_changes()
+        self.root.after(self.watcher.delay_ms, self.poll_files)
+
+    def reload_external_changes(self) -> None:
+        """git pull や他のツールによる変更を取り込み、変わった行だけを更新する。自分の保存なら差分は出ない。"""
+        try:
+            revision = read_revision(self.data_file)
+            works = load_works_data(self.data_file)
+        except Exception as exc:  # noqa: BLE001
+            self.status_var.set(f"外部の変更を読み込めませんでした: {exc}")
+            return
+
+        self.revision = revision
+        current_type = self.get_selected_type_key()
+        total_upserts = 0
+        total_removed = 0
+        for type_key, latest in index_works_by_id(works).items():
+            upserts, removed = diff_rows(self.works_by_id[type_key], latest)
+            if not upserts and not removed:
+                continue
+            self.works_by_id[type_key] = latest
+            index = self.search_indexes[type_key]
+            for item in upserts:
+                index.add(int(item["id"]), item_search_fields(item))
+            for item_id in removed:
+                index.remove(item_id)
+            if type_key == current_type:
+                for item in upserts:
+                    self.tree.upsert(item)
+                for item_id in removed:
+                    self.tree.remove(item_id)
+            total_upserts += len(upserts)
+            total_removed += len(removed)
+
+        if not total_upserts and not total_removed:
+            return
+        self.apply_search()
+        self.status_var.set(f"外部の変更を読み込みました: 追加・更新 {total_upserts} 件 / 削除 {total_removed} 件")
+
+    def show_works(self, works: dict[str, list[dict[str, Any]]]) -> None:
+        self.works_by_id = index_works_by_id(works)
+        self.search_indexes = build_works_search_indexes(works)
+        self.refresh_list()
+
+    def get_selected_type_key(self) -> str:
+        label = self.type_var.get()
+        return self.type_label_to_key.get(label, "games")
+
+    def is_game_type(self) -> bool:
+        type_key = self.get_selected_type_key()
+        return WORK_TYPE_INFO[type_key]["kind"] == "game"
+
+    def update_dynamic_labels(self) -> None:
+        if self.is_game_type():
+            self.main_visual_label_var.set("ゲーム画像/絵文字")
+            self.extra_list_label_var.set("タグ（改行区切り）")
+            self.rating_entry.configure(state="normal")
+            self.rating_label.configure(foreground="")
+            self.is_new_var.set(False)
+            self.is_new_check.configure(state="disabled")
+        else:
+            self.main_visual_label_var.set("アイコン/絵文字")
+            self.extra_list_label_var.set("機能（改行区切り）")
+            self.rating_entry.configure(state="disabled")
+            self.rating_label.configure(foreground="#888")
+            self.is_new_check.configure(state="normal")
+
+    def on_type_change(self, _event: Any = None) -> None:
+        self.update_dynamic_labels()
+        self.refresh_list()
+        self.clear_form()
+
+    def refresh_public_images(self) -> None:
+        self.public_images = list_public_images(self.public_dir)
+        self.screenshot_input["values"] = self.public_images
+
+    def refresh_list(self) -> None:
+        type_key = self.get_selected_type_key()
+        items = list(self.works_by_id[type_key].values())
+
+        self.tree.set_rows(items)
+        self.apply_search()
+
+    def schedule_search(self) -> None:
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self) -> None:
+        self.search_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            if self.tree.filter_ids is not None:
+                self.tree.set_filter(None)
+            self.status_var.set(f"{WORK_TYPE_INFO[self.get_selected_type_key()]['label']}: {len(self.tree.rows)}件")
+            return
+
+        started = time.perf_counter()
+        matches = self.search_index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.tree.set_filter(matches)
+        self.status_var.set(f"検索: {len(matches)}件 / 全{len(self.tree.rows)}件（{elapsed_ms:.1f} ms）")
+
+    def item_row_values(self, item: dict[str, Any]) -> tuple[Any, ...]:
+        media = f"V{len(item.get('trailerUrls', []))} / S{len(item.get('screenshots', []))}"
+        if self.is_item_in_development(item):
+            media = f"{media} / 開発中"
+        if self.is_item_show_price_status(item):
+            media = f"{media} / 非販売"
+        return (item["id"], item.get("title", ""), item.get("price", 0), media)
+
+    def refresh_media_listboxes(self) -> None:
+        self.trailer_listbox.delete(0, tk.END)
+        for value in self.form_trailer_urls:
+            self.trailer_listbox.insert(tk.END, value)
+
+        self.screenshot_listbox.delete(0, tk.END)
+        for value in self.form_screenshots:
+            self.screenshot_listbox.insert(tk.END, value)
+
+        if self.preview_ref not in self.form_screenshots:
+            self.show_preview(self.form_screenshots[0] if self.form_screenshots else "")
+
+    def set_color_value(self, color: str) -> None:
+        color_text = color.strip()
+        if not color_text:
+            self.color_var.set(COLOR_CLASS_OPTIONS[0])
+            return
+
+        values = list(self.color_combo.cget("values"))
+        if color_text not in values:
+            values.append(color_text)
+            self.color_combo.configure(values=values)
+        self.color_var.set(color_text)
+
+    def is_item_in_development(self, item: dict[str, Any]) -> bool:
+        return bool(item.get("inDevelopment", False))
+
+    def is_item_show_price_status(self, item: dict[str, Any]) -> bool:
+        return bool(item.get("showPriceStatus", False))
+
+    def on_select_row(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            return
+        item_id = int(selected[0])
+        type_key = self.get_selected_type_key()
+        item = self.works_by_id[type_key].get(item_id)
+        if item is None:
+            return
+
+        self.title_entry.delete(0, tk.END)
+        self.title_entry.insert(0, item.get("title", ""))
+
+        self.category_entry.delete(0, tk.END)
+        self.category_entry.insert(0, item.get("category", ""))
+
+        self.price_entry.delete(0, tk.END)
+        self.price_entry.insert(0, str(item.get("price", 0)))
+
+        self.set_color_value(item.get("color", ""))
+
+        self.booth_url_entry.delete(0, tk.END)
+        self.booth_url_entry.insert(0, item.get("boothUrl", ""))
+
+        self.main_visual_entry.delete(0, tk.END)
+        if self.is_game_type():
+            self.main_visual_entry.insert(0, item.get("image", ""))
+            self.rating_entry.configure(state="normal")
+            self.rating_entry.delete(0, tk.END)
+            self.rating_entry.insert(0, str(item.get("rating", 0)))
+            self.rating_entry.configure(state="normal")
+            self.is_new_var.set(False)
+            extra_values = item.get("tags", [])
+        else:
+            self.main_visual_entry.insert(0, item.get("icon", ""))
+            self.rating_entry.configure(state="normal")
+            self.rating_entry.delete(0, tk.END)
+            self.rating_entry.configure(state="disabled")
+            self.is_new_var.set(bool(item.get("isNew", False)))
+            extra_values = item.get("features", [])
+
+        self.extra_list_text.delete("1.0", tk.END)
+        self.extra_list_text.insert("1.0", "\n".join(extra_values if isinstance(extra_values, list) else []))
+
+        self.description_text.delete("1.0", tk.END)
+        self.description_text.insert("1.0", item.get("description", ""))
+        self.in_development_var.set(self.is_item_in_development(item))
+        self.show_price_status_var.set(self.is_item_show_price_status(item))
+
+        self.form_trailer_urls = list(item.get("trailerUrls", []))
+        self.form_screenshots = list(item.get("screenshots", []))
+        self.refresh_media_listboxes()
+        self.status_var.set(f"選択中: id={item_id}")
+
+    def clear_form(self) -> None:
+        self.title_entry.delete(0, tk.END)
+        self.category_entry.delete(0, tk.END)
+        self.price_entry.delete(0, tk.END)
+        self.price_entry.insert(0, "0")
+        self.set_color_value(COLOR_CLASS_OPTIONS[0])
+        self.booth_url_entry.delete(0, tk.END)
+        self.booth_url_entry.insert(0, "https://booth.pm/")
+        self.main_visual_entry.delete(0, tk.END)
+        self.rating_entry.configure(state="normal")
+        self.rating_entry.delete(0, tk.END)
+        if not self.is_game_type():
+            self.rating_entry.configure(state="disabled")
+        self.is_new_var.set(False)
+        self.in_development_var.set(False)
+        self.show_price_status_var.set(False)
+        self.extra_list_text.delete("1.0", tk.END)
+        self.description_text.delete("1.0", tk.END)
+        self.trailer_input_var.set("")
+        self.screenshot_input_var.set("")
+        self.form_trailer_urls = []
+        self.form_screenshots = []
+        self.refresh_media_listboxes()
+        self.tree.clear_selection()
+
+    def _parse_price(self) -> int | None:
+        raw = self.price_entry.get().strip()
+        if not raw:
+            return 0
+        try:
+            return int(raw)
+        except ValueError:
+            messagebox.showwarning("入力エラー", "価格は整数で入力してください。")
+            return None
+
+    def _parse_rating(self) -> float | None:
+        raw = self.rating_entry.get().strip()
+        if not raw:
+            return 0.0
+        try:
+            return float(raw)
+        except ValueError:
+            messagebox.showwarning("入力エラー", "評価は数値で入力してください。")
+            return None
+
+    def build_item_from_form(self, item_id: int) -> dict[str, Any] | None:
+        title = self.title_entry.get().strip()
+        description = self.description_text.get("1.0", tk.END).strip()
+        category = self.category_entry.get().strip()
+        color = self.color_var.get().strip() or COLOR_CLASS_OPTIONS[0]
+        booth_url = self.booth_url_entry.get().strip() or "https://booth.pm/"
+        main_visual = self.main_visual_entry.get().strip()
+        extra_values = split_lines(self.extra_list_text.get("1.0", tk.END))
+
+        if not title:
+            messagebox.showwarning("入力不足", "タイトルを入力してください。")
+            return None
+        if not description:
+            messagebox.showwarning("入力不足", "説明を入力してください。")
+            return None
+        if not category:
+            messagebox.showwarning("入力不足", "カテゴリ表示名を入力してください。")
+            return None
+
+        price = self._parse_price()
+        if price is None:
+            return None
+
+        trailer_urls = unique_strings(self.form_trailer_urls)
+        screenshots = unique_strings(self.form_screenshots)
+
+        if self.is_game_type():
+            rating = self._parse_rating()
+            if rating is None:
+                return None
+            return {
+                "id": item_id,
+                "title": title,
+                "description": description,
+                "category": category,
+                "rating": rating,
+                "price": price,
+                "image": main_visual or "🎮",
+                "tags": extra_values,
+                "color": color,
+                "boothUrl": booth_url,
+                "trailerUrls": trailer_urls,
+                "screenshots": screenshots,
+                "inDevelopment": bool(self.in_development_var.get()),
+                "showPriceStatus": bool(self.show_price_status_var.get()),
+            }
+
+        return {
+            "id": item_id,
+            "title": title,
+            "description": description,
+            "category": category,
+            "price": price,
+            "icon": main_visual or "🛠️",
+            "features": extra_values,
+            "color": color,
+            "boothUrl": booth_url,
+            "trailerUrls": trailer_urls,
+            "screenshots": screenshots,
+            "isNew": bool(self.is_new_var.get()),
+            "inDevelopment": bool(self.in_development_var.get()),
+            "showPriceStatus": bool(self.show_price_status_var.get()),
+        }
+
+    def add_item(self) -> None:
+        type_key = self.get_selected_type_key()
+        items = self.works_by_id[type_key]
+        item = self.build_item_from_form(0)
+        if item is None:
+            return
+
+        try:
+            item["id"] = allocate_item_id(self.data_file, type_key, items)
+        except (DataLockTimeout, DataMetaError) as exc:
+            messagebox.showerror("保存エラー", str(exc))
+            return
+        items[item["id"]] = item
+        if not self.save_works({(type_key, item["id"])}):
+            return
+        self.search_index.add(item["id"], item_search_fields(item))
+        self.tree.upsert(item)
+        if self.search_var.get().strip():
+            self.apply_search()
+        self.tree.select(item["id"])
+        state = self.sync_or_stage("add", item, self.collect_commit_image_refs(item))
+        self.status_var.set(f"追加しました: id={item['id']} / {state}")
+
+    def update_item(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("選択なし", "更新する項目を選択してください。")
+            return
+        selected_id = int(selected[0])
+        type_key = self.get_selected_type_key()
+        items = self.works_by_id[type_key]
+
+        item = self.build_item_from_form(selected_id)
+        if item is None:
+            return
+
+        if selected_id not in items:
+            messagebox.showerror("更新エラー", f"id={selected_id} が見つかりません。")
+            return
+        items[selected_id] = item
+
+        if not self.save_works({(type_key, selected_id)}):
+            return
+        self.search_index.add(selected_id, item_search_fields(item))
+        self.tree.upsert(item)
+        if self.search_var.get().strip():
+            self.apply_search()
+            self.tree.select(selected_id)
+        state = self.sync_or_stage("update", item, self.collect_commit_image_refs(item))
+        self.status_var.set(f"更新しました: id={selected_id} / {state}")
+
+    def delete_item(self) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showinfo("選択なし", "削除する項目を選択してください。")
+            return
+        selected_id = int(selected[0])
+        type_key = self.get_selected_type_key()
+        items = self.works_by_id[type_key]
+        target = items.get(selected_id)
+        if target is None:
+            messagebox.showerror("削除エラー", f"id={selected_id} が見つかりません。")
+            return
+
+        confirmed = messagebox.askyesno("確認", f'id={selected_id}「{target.get("title", "")}」を削除しますか？')
+        if not confirmed:
+            return
+
+        del items[selected_id]
+        if not self.save_works({(type_key, selected_id)}):
+            return
+        self.search_index.remove(selected_id)
+        self.tree.remove(selected_id)
+        self.clear_form()
+        state = self.sync_or_stage("delete", target)
+        self.status_var.set(f"削除しました: id={selected_id} / {state}")
+
+    def add_trailer_url(self) -> None:
+        raw = self.trailer_input_var.get().strip()
+        if not raw:
+            messagebox.showwarning("入力不足", "YouTube URL を入力してください。")
+            return
+
+        parsed = parse_youtube_url(raw)
+        normalized = parsed.embed_url
+        if not normalized:
+            messagebox.showwarning("入力エラー", f"YouTube URL の形式が不正です（{parsed.reason}）。")
+            return
+        if normalized in self.form_trailer_urls:
+            messagebox.showinfo("重複", "そのURLはすでに追加されています。")
+            return
+
+        self.form_trailer_urls.append(normalized)
+        self.trailer_input_var.set("")
+        self.refresh_media_listboxes()
+
+    def remove_trailer_url(self) -> None:
+        selected = self.trailer_listbox.curselection()
+        if not selected:
+            return
+        del self.form_trailer_urls[selected[0]]
+        self.refresh_media_listboxes()
+
+    def clear_trailer_urls(self) -> None:
+        self.form_trailer_urls = []
+        self.refresh_media_listboxes()
+
+    def _add_screenshot_value(self, value: str) -> None:
+        text = value.strip()
+        if not text:
+            messagebox.showwarning("入力不足", "スクショ値を入力してください。")
+            return
+        normalized = normalize_image_reference(text) if any(ext in text.lower() for ext in IMAGE_EXTENSIONS) else text
+        if normalized in self.form_screenshots:
+            messagebox.showinfo("重複", "その値はすでに追加されています。")
+            return
+        self.form_screenshots.append(normalized)
+        self.screenshot_input_var.set("")
+        self.refresh_media_listboxes()
+
+    def add_screenshot(self) -> None:
+        self._add_screenshot_value(self.screenshot_input_var.get())
+
+    def browse_screenshot(self) -> None:
+        selected = filedialog.askopenfilename(
+            title="スクリーンショット画像を選択",
+            initialdir=str(self.public_dir),
+            filetypes=[("画像ファイル", "*.png *.jpg *.jpeg *.webp *.gif *.bmp *.svg *.avif"), ("すべてのファイル", "*.*")],
+        )
+        if not selected:
+            return
+
+        selected_path = Path(selected).resolve()
+        public_root = self.public_dir.resolve()
+        try:
+            image_ref = selected_path.relative_to(public_root).as_posix()
+        except ValueError:
+            try:
+                image_ref, copied = import_image_to_public(self.public_dir, selected_path)
+            except Exception as exc:  # noqa: BLE001
+                messagebox.showerror("コピーエラー", f"画像のコピーに失敗しました:\n{exc}")
+                return
+            if copied:
+                messagebox.showinfo("画像をコピーしました", f"public/{image_ref} にコピーしました。")
+            else:
+                messagebox.showinfo("既存の画像を使用します", f"同じ内容の public/{image_ref} を参照します。")
+
+        self._add_screenshot_value(image_ref)
+        self.refresh_public_images()
+
+    def remove_screenshot(self) -> None:
+        selected = self.screenshot_listbox.curselection()
+        if not selected:
+            return
+        del self.form_screenshots[selected[0]]
+        self.refresh_media_listboxes()
+
+    def clear_screenshots(self) -> None:
+        self.form_screenshots = []
+        self.refresh_media_listboxes()
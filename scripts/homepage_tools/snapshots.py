@@ -0,0 +1,59 @@
+"""保存前のデータファイルを数世代残し、rollback で戻せるようにする。"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+from .paths import STATE_DIR, state_path_for
+from .locking import read_revision
+from .storage import format_bytes
+
+
+SNAPSHOT_KEEP = 10
+
+
+def snapshot_dir_for(data_file: Path) -> Path:
+    return state_path_for(data_file, "", STATE_DIR / "snapshots")
+
+
+def list_snapshots(data_file: Path) -> list[tuple[int, Path]]:
+    """(リビジョン, パス) を古い順に返す。"""
+    snapshot_dir = snapshot_dir_for(data_file)
+    if not snapshot_dir.is_dir():
+        return []
+    snapshots = [(int(path.stem), path) for path in snapshot_dir.glob("*.json") if path.stem.isdigit()]
+    return sorted(snapshots)
+
+
+def keep_snapshot(data_file: Path, revision: int) -> None:
+    """ロック中、置き換える直前に呼ぶ。今の内容を revision の版として残し、SNAPSHOT_KEEP 件を超えた古い版は消す。"""
+    if not data_file.exists():
+        return
+    snapshot_dir = snapshot_dir_for(data_file)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    # ハードリンクだとエディタがその場で上書きしたときに旧版まで書き換わるので、複製しておく
+    shutil.copy2(data_file, snapshot_dir / f"{revision:08d}.json")
+    for _, path in list_snapshots(data_file)[:-SNAPSHOT_KEEP]:
+        path.unlink(missing_ok=True)
+
+
+def read_snapshot(data_file: Path, revision: int) -> Any:
+    path = snapshot_dir_for(data_file) / f"{revision:08d}.json"
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_snapshots(data_file: Path) -> None:
+    snapshots = list_snapshots(data_file)
+    if not snapshots:
+        print("戻せる版はありません。")
+        return
+    for revision, path in reversed(snapshots):
+        stat = path.stat()
+        saved_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime))
+        print(f"  リビジョン {revision} | {saved_at} | {format_bytes(stat.st_size)}")
+    print(f"現在のリビジョン: {read_revision(data_file)}（戻すには --revision を指定してください）")
@@ -0,0 +1,89 @@
+"""未公開の変更をためて、publish で1回の commit にまとめる仕組み。"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from .paths import ROOT_DIR, state_path_for
+from .locking import data_file_lock
+from .storage import replace_file
+
+
+def pending_file_for(data_file: Path) -> Path:
+    return state_path_for(data_file, ".pending.json")
+
+
+def to_root_relative(path: Path) -> str:
+    resolved = path.resolve()
+    try:
+        return resolved.relative_to(ROOT_DIR.resolve()).as_posix()
+    except ValueError:
+        return str(resolved)
+
+
+def load_pending_changes(data_file: Path) -> list[dict[str, Any]]:
+    pending_file = pending_file_for(data_file)
+    if not pending_file.exists():
+        return []
+    with pending_file.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+
+
+def write_pending_changes(data_file: Path, changes: list[dict[str, Any]]) -> None:
+    """データファイルのロック中に呼ぶ。途中で落ちても、前の内容か新しい内容のどちらかが残る。"""
+    pending_file = pending_file_for(data_file)
+    if not changes:
+        pending_file.unlink(missing_ok=True)
+        return
+    replace_file(pending_file, (json.dumps(changes, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+
+def stage_change(data_file: Path, change: dict[str, Any], paths: list[Path]) -> int:
+    """未公開の変更として記録し、未公開件数を返す。"""
+    return stage_changes(data_file, [(change, paths)])
+
+
+def stage_changes(data_file: Path, entries: list[tuple[dict[str, Any], list[Path]]]) -> int:
+    """複数の変更を1回の書き込みで記録し、未公開件数を返す。"""
+    # 他のプロセスの追記と読み込み→書き込みが入れ違わないよう、データの保存と同じロックを取る
+    with data_file_lock(data_file):
+        changes = load_pending_changes(data_file)
+        for change, paths in entries:
+            changes.append({**change, "paths": [to_root_relative(path) for path in paths]})
+        write_pending_changes(data_file, changes)
+        return len(changes)
+
+
+def discard_pending_changes(data_file: Path, count: int) -> None:
+    # 公開処理の間に追加された変更は残す
+    with data_file_lock(data_file):
+        write_pending_changes(data_file, load_pending_changes(data_file)[count:])
+
+
+def pending_change_paths(changes: list[dict[str, Any]]) -> list[Path]:
+    paths: list[Path] = []
+    for change in changes:
+        for value in change.get("paths", []):
+            path = Path(value)
+            paths.append(path if path.is_absolute() else ROOT_DIR / path)
+    return paths
+
+
+def build_publish_message(label: str, changes: list[dict[str, Any]]) -> str:
+    counts: dict[str, int] = {}
+    for change in changes:
+        action = str(change.get("action", "update"))
+        counts[action] = counts.get(action, 0) + 1
+
+    summary = ", ".join(f"{action} {count}" for action, count in counts.items())
+    lines = [f"publish {label}: {summary}" if summary else f"publish {label}"]
+    if changes:
+        lines.append("")
+    for change in changes:
+        type_text = f'{change["type"]} ' if change.get("type") else ""
+        id_text = f'id={change["id"]} ' if "id" in change else ""
+        lines.append(f'- {change.get("action", "update")} {type_text}{id_text}{change.get("title", "")}'.rstrip())
+    return "\n".join(lines)
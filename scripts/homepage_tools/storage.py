@@ -0,0 +1,141 @@
+"""JSON の書き出し・読み込み・本番用成果物・メタ情報。"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+def fsync_directory(directory: Path) -> None:
+    # rename 自体をディスクに確定させる。Windows ではディレクトリを開けないので何もしない
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_file(path: Path, payload: bytes) -> None:
+    """同じディレクトリの一時ファイルに書き、fsync してから置き換える。
+
+    読み手が書きかけの内容を見ることはなく、途中で落ちても旧版か新版のどちらかが残る。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_file.open("wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+    except BaseException:
+        temp_file.unlink(missing_ok=True)
+        raise
+    fsync_directory(path.parent)
+
+
+def write_if_changed(path: Path, payload: bytes) -> bool:
+    if path.exists() and path.stat().st_size == len(payload) and path.read_bytes() == payload:
+        return False
+    replace_file(path, payload)
+    return True
+
+
+def compact_json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_json(data_file: Path, normalize: Callable[[Any], T]) -> T:
+    """JSON を読み込み normalize に通した結果を返す。呼び出し側が自由に書き換えられるよう、毎回新しく作る。"""
+    with data_file.open("r", encoding="utf-8") as f:
+        return normalize(json.load(f))
+
+
+def minified_file_for(data_file: Path) -> Path:
+    return data_file.with_suffix(".min.json")
+
+
+def minified_artifact_paths(data_file: Path) -> list[Path]:
+    min_file = minified_file_for(data_file)
+    return [min_file, min_file.with_name(f"{min_file.name}.gz"), min_file.with_name(f"{min_file.name}.br")]
+
+
+def write_minified_artifacts(data_file: Path, data: Any) -> list[tuple[Path, int | None]]:
+    """本番配信用の最小化JSONと .gz / .br を書き出し、(パス, サイズ) を返す。brotli が無ければサイズは None。"""
+    payload = compact_json_bytes(data)
+    min_file, gz_file, br_file = minified_artifact_paths(data_file)
+    write_if_changed(min_file, payload)
+    # mtime=0 で同じ内容なら同じバイト列にし、無駄な差分を出さない
+    gz_payload = gzip.compress(payload, compresslevel=9, mtime=0)
+    write_if_changed(gz_file, gz_payload)
+    results: list[tuple[Path, int | None]] = [(min_file, len(payload)), (gz_file, len(gz_payload))]
+
+    try:
+        import brotli
+    except ImportError:
+        results.append((br_file, None))
+        return results
+    br_payload = brotli.compress(payload, quality=11)
+    write_if_changed(br_file, br_payload)
+    results.append((br_file, len(br_payload)))
+    return results
+
+
+def print_size_report(data_file: Path, artifacts: list[tuple[Path, int | None]]) -> None:
+    source_size = data_file.stat().st_size if data_file.exists() else 0
+    width = max(len(path.name) for path, _ in [(data_file, 0), *artifacts])
+    print(f"{data_file.name:<{width}}  {format_bytes(source_size):>10}")
+    for path, size in artifacts:
+        if size is None:
+            print(f"{path.name:<{width}}  {'-':>10}  （brotli 未インストールのためスキップ）")
+            continue
+        ratio = f"{size / source_size:.0%}" if source_size else "-"
+        print(f"{path.name:<{width}}  {format_bytes(size):>10}  {ratio:>5}")
+
+
+def next_id(records: list[dict[str, Any]]) -> int:
+    if not records:
+        return 1
+    return max(int(record["id"]) for record in records) + 1
+
+
+def meta_file_for(data_file: Path) -> Path:
+    return data_file.with_suffix(".meta.json")
+
+
+class DataMetaError(Exception):
+    pass
+
+
+def load_data_meta(data_file: Path) -> dict[str, Any]:
+    """読めない場合は DataMetaError を送出する。空として扱うとリビジョンが 0 に戻り、競合を見逃すため。"""
+    meta_file = meta_file_for(data_file)
+    if not meta_file.exists():
+        return {}
+    try:
+        with meta_file.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError) as exc:
+        raise DataMetaError(f"{meta_file} を読み込めませんでした。修復するまで保存できません: {exc}") from exc
+    return meta if isinstance(meta, dict) else {}
+
+
+def save_data_meta(data_file: Path, meta: dict[str, Any]) -> None:
+    payload = (json.dumps(meta, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+    write_if_changed(meta_file_for(data_file), payload)
+
+
+def format_bytes(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.2f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
@@ -0,0 +1,321 @@
+"""項目ごとの規則（スキーマ）でデータを検査し、エラーと警告の一覧を返す。
+
+スキーマ自体は records.py / works.py の正規化処理の隣に置き、ここでは規則の解釈と結果のキャッシュだけを持つ。
+画像の実在確認は内容が同じでも public 側の状態で変わるので、キャッシュには参照だけを残し毎回確かめる。
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple
+
+from .paths import PUBLIC_DIR, STATE_DIR
+from .normalize import normalize_image_reference, parse_youtube_url
+from .images import get_public_image_index, IMAGE_EXTENSIONS
+from .storage import compact_json_bytes
+
+
+# 規則や文言を変えたら上げる。古い検査結果はまとめて捨てられる
+VALIDATION_CACHE_VERSION = 2
+VALIDATION_CACHE_FILE = STATE_DIR / "validation-cache.json"
+VALIDATION_CACHE_MAX_ITEMS = 5000
+# フロントエンドは 2026-2-16 のような 0 埋めなしの日付も読める
+DATE_PATTERN = re.compile(r"^\d{4}-\d{1,2}-\d{1,2}$")
+SEVERITY_LABELS = {"error": "エラー", "warning": "警告"}
+
+# (重大度, 項目名, 内容)
+Finding = tuple[str, str, str]
+
+
+class FieldRule(NamedTuple):
+    """kind: id / text / date / number / bool / text_list / image / image_list / youtube_list / url / choice / legacy
+
+    missing: 無い・空のときの重大度（None なら省略可）。default: 省略時や変換時に使われる値の説明。
+    """
+
+    kind: str
+    missing: str | None = None
+    default: str = ""
+    choices: tuple[str, ...] = ()
+    minimum: float | None = None
+    maximum: float | None = None
+
+
+class Issue(NamedTuple):
+    severity: str
+    location: str
+    field: str
+    message: str
+    key: Any
+
+    def __str__(self) -> str:
+        return f"{self.location}: {self.field} {self.message}" if self.field else f"{self.location}: {self.message}"
+
+
+class ValidationReport:
+    def __init__(self) -> None:
+        self.issues: list[Issue] = []
+        self.checked = 0
+        self.cached = 0
+
+    @property
+    def errors(self) -> list[Issue]:
+        return [issue for issue in self.issues if issue.severity == "error"]
+
+    @property
+    def warnings(self) -> list[Issue]:
+        return [issue for issue in self.issues if issue.severity == "warning"]
+
+    def errors_for(self, keys: Iterable[Any]) -> list[Issue]:
+        key_set = set(keys)
+        return [issue for issue in self.errors if issue.key in key_set]
+
+
+class ValidationError(Exception):
+    def __init__(self, issues: list[Issue]):
+        lines = [str(issue) for issue in issues[:5]]
+        if len(issues) > 5:
+            lines.append(f"ほか {len(issues) - 5} 件")
+        super().__init__("保存する内容に問題があります:\n" + "\n".join(lines))
+        self.issues = issues
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def missing_message(rule: FieldRule) -> str:
+    return f"がありません（省略時: {rule.default}）" if rule.default else "がありません"
+
+
+def looks_like_image(value: str) -> bool:
+    return Path(normalize_image_reference(value)).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def check_list(name: str, value: Any) -> tuple[list[Finding], list[str]]:
+    if not isinstance(value, list):
+        return ([("warning", name, "が配列ではありません（空として読み込まれます）")], [])
+    findings: list[Finding] = []
+    strings = [item.strip() for item in value if isinstance(item, str) and item.strip()]
+    if len(strings) != len(value):
+        findings.append(("warning", name, "に空や文字列でない要素があります（読み込み時に除外されます）"))
+    if len(set(strings)) != len(strings):
+        findings.append(("warning", name, "に重複した要素があります（読み込み時にまとめられます）"))
+    return (findings, strings)
+
+
+def check_field(name: str, rule: FieldRule, value: Any) -> tuple[list[Finding], list[str]]:
+    """(指摘, 実在を確かめる画像参照) を返す。"""
+    if value is None or value == [] or (isinstance(value, str) and not value.strip()):
+        return ([(rule.missing, name, missing_message(rule))] if rule.missing else [], [])
+
+    if rule.kind == "legacy":
+        return ([("warning", name, f"は旧形式の項目です（{rule.default}）")], [])
+
+    if rule.kind == "id":
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            return ([("error", name, "が正の整数ではありません（読み込み時に除外されます）")], [])
+        return ([], [])
+
+    if rule.kind == "number":
+        if not is_number(value):
+            return ([("warning", name, f"が数値ではありません（{rule.default or 0} として読み込まれます）")], [])
+        if rule.minimum is not None and value < rule.minimum:
+            return ([("warning", name, f"が {rule.minimum:g} 未満です（{value}）")], [])
+        if rule.maximum is not None and value > rule.maximum:
+            return ([("warning", name, f"が {rule.maximum:g} を超えています（{value}）")], [])
+        return ([], [])
+
+    if rule.kind == "bool":
+        if not isinstance(value, bool):
+            return ([("warning", name, "が true / false ではありません（false として読み込まれます）")], [])
+        return ([], [])
+
+    if rule.kind in ("text_list", "image_list", "youtube_list"):
+        findings, strings = check_list(name, value)
+        if rule.kind == "image_list":
+            # SHOP のスクリーンショットは絵文字や文字も使えるので、画像ファイルに見えるものだけ実在を確かめる
+            return (findings, [normalize_image_reference(item) for item in strings if looks_like_image(item)])
+        if rule.kind == "youtube_list":
+            for raw in strings:
+                parsed = parse_youtube_url(raw)
+                if not parsed.embed_url:
+                    message = f"の '{raw}' は YouTube URL として扱えません（{parsed.reason}）。読み込み時に除外されます"
+                    findings.append(("warning", name, message))
+        return (findings, [])
+
+    if not isinstance(value, str):
+        severity = rule.missing or "warning"
+        return ([(severity, name, "が文字列ではありません")], [])
+    text = value.strip()
+
+    if rule.kind == "date" and not DATE_PATTERN.match(text):
+        return ([("warning", name, f"が YYYY-MM-DD の形式ではありません（{text}）")], [])
+    if rule.kind == "image" and looks_like_image(text):
+        return ([], [normalize_image_reference(text)])
+    if rule.kind == "url" and not text.startswith(("https://", "http://")):
+        return ([("warning", name, f"が http(s):// で始まっていません（{text}）")], [])
+    if rule.kind == "choice" and text not in rule.choices:
+        return ([("warning", name, f"が想定外の値です（{text}）")], [])
+    if rule.kind == "youtube":
+        parsed = parse_youtube_url(text)
+        if not parsed.embed_url:
+            return ([("warning", name, f"が YouTube URL として扱えません（{parsed.reason}）")], [])
+    return ([], [])
+
+
+def check_item(
+    schema: dict[str, FieldRule], item: Any, item_rules: tuple[Callable[[dict[str, Any]], list[Finding]], ...]
+) -> tuple[list[Finding], list[tuple[str, str]]]:
+    """1件分を検査する。戻り値は (指摘, [(項目名, 画像参照)])。内容だけで決まるのでキャッシュできる。"""
+    if not isinstance(item, dict):
+        return ([("error", "", "オブジェクトではありません（読み込み時に除外されます）")], [])
+
+    findings: list[Finding] = []
+    image_refs: list[tuple[str, str]] = []
+    for name, rule in schema.items():
+        field_findings, refs = check_field(name, rule, item.get(name))
+        findings.extend(field_findings)
+        image_refs.extend((name, image_ref) for image_ref in refs)
+    for name in sorted(item.keys() - schema.keys()):
+        findings.append(("warning", name, "は未知の項目です（保存時に削除されます）"))
+    for rule in item_rules:
+        findings.extend(rule(item))
+    return (findings, image_refs)
+
+
+class ValidationCache:
+    """内容のハッシュごとの検査結果。ディスクに残し、次回以降は変わった要素だけを検査する。"""
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with self.cache_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != VALIDATION_CACHE_VERSION:
+            return
+        if isinstance(data.get("items"), dict):
+            self.entries = data["items"]
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            payload = compact_json_bytes({"version": VALIDATION_CACHE_VERSION, "items": self.entries})
+            self.dirty = False
+        # 消えても作り直せるキャッシュなので fsync はしない
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+        temp_file.write_bytes(payload)
+        os.replace(temp_file, self.cache_file)
+
+    def check(
+        self,
+        schema_name: str,
+        schema: dict[str, FieldRule],
+        item: Any,
+        item_rules: tuple[Callable[[dict[str, Any]], list[Finding]], ...],
+    ) -> tuple[list[Finding], list[tuple[str, str]], bool]:
+        """(指摘, 画像参照, キャッシュから取れたか) を返す。"""
+        digest = hashlib.sha1(schema_name.encode("utf-8") + b"\0" + compact_json_bytes(item)).hexdigest()
+        with self.lock:
+            entry = self.entries.pop(digest, None)
+            if entry is not None:
+                # 使ったものを末尾へ回し、上限を超えたら使われていない古いものから捨てる
+                self.entries[digest] = entry
+                return ([tuple(value) for value in entry["issues"]], [tuple(value) for value in entry["images"]], True)
+
+        findings, image_refs = check_item(schema, item, item_rules)
+        with self.lock:
+            self.entries[digest] = {"issues": findings, "images": image_refs}
+            while len(self.entries) > VALIDATION_CACHE_MAX_ITEMS:
+                del self.entries[next(iter(self.entries))]
+            self.dirty = True
+        return (findings, image_refs, False)
+
+
+_validation_cache: ValidationCache | None = None
+
+
+def get_validation_cache() -> ValidationCache:
+    global _validation_cache
+    if _validation_cache is None:
+        _validation_cache = ValidationCache(VALIDATION_CACHE_FILE)
+        # 保存のたびに書き出すと追記の軽さが損なわれるので、終了時にまとめて書き出す
+        atexit.register(_validation_cache.save)
+    return _validation_cache
+
+
+def validate_items(
+    report: ValidationReport,
+    label: str,
+    schema_name: str,
+    schema: dict[str, FieldRule],
+    items: list[Any],
+    item_rules: tuple[Callable[[dict[str, Any]], list[Finding]], ...] = (),
+    key_of: Callable[[int], Any] = lambda item_id: item_id,
+    image_exists: Callable[[str], bool] | None = None,
+) -> None:
+    """items を検査して report に足す。id の重複と画像の実在はキャッシュせずに毎回確かめる。
+
+    image_exists を渡すと、画像の実在をインデックスの代わりにそれで確かめる。
+    """
+    if image_exists is None:
+        # public の走査は1回の検査につき1度にし、あとは一覧を引くだけにする
+        image_exists = get_public_image_index(PUBLIC_DIR).exists
+    cache = get_validation_cache()
+    seen_ids: set[int] = set()
+    found: dict[str, bool] = {}
+
+    for index, item in enumerate(items):
+        findings, image_refs, cached = cache.check(schema_name, schema, item, item_rules)
+        report.checked += 1
+        report.cached += cached
+
+        item_id = item.get("id") if isinstance(item, dict) else None
+        valid_id = isinstance(item_id, int) and not isinstance(item_id, bool) and item_id > 0
+        location = f"{label} id={item_id}" if valid_id else f"{label}[{index}]"
+        key = key_of(item_id) if valid_id else None
+
+        if valid_id and item_id in seen_ids:
+            findings = [*findings, ("error", "id", "が重複しています（後の要素が前の要素を上書きします）")]
+        if valid_id:
+            seen_ids.add(item_id)
+        for name, image_ref in image_refs:
+            if image_ref not in found:
+                found[image_ref] = image_exists(image_ref)
+            if not found[image_ref]:
+                findings = [*findings, ("error", name, f"の public/{image_ref} が見つかりません")]
+
+        report.issues.extend(Issue(severity, location, name, message, key) for severity, name, message in findings)
+
+
+def save_validation_cache() -> None:
+    get_validation_cache().save()
+
+
+def dropped_item_issue(location: str, key: Any) -> Issue:
+    return Issue("error", location, "", "は正規化で除外されるため保存できません", key)
+
+
+def print_validation_report(report: ValidationReport) -> None:
+    for issue in sorted(report.issues, key=lambda issue: issue.severity != "error"):
+        print(f"{SEVERITY_LABELS[issue.severity]}: {issue}")
+    print(
+        f"検査: {report.checked} 件（前回から変化なし {report.cached} 件）"
+        f" / エラー {len(report.errors)} 件 / 警告 {len(report.warnings)} 件"
+    )
@@ -0,0 +1,60 @@
+"""GUI 用の軽量なファイル監視。stat を定期的に比べ、変化が無い間は間隔を延ばす。"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from .images import get_public_image_index
+
+
+WATCH_MIN_MS = 500
+WATCH_MAX_MS = 4000
+
+
+def file_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class FileWatcher:
+    """poll() のたびに変化したパスを返す。変化が無いと次の間隔 delay_ms を倍にし、WATCH_MAX_MS で止める。
+
+    public_dir は画像の追加・削除・改名だけを見る。全体を走査せず、画像一覧のインデックスが
+    ディレクトリの mtime から変わった所だけを調べ直す。
+    """
+
+    def __init__(self, files: list[Path], public_dir: Path | None = None):
+        self.signatures: dict[Path, Any] = {path: file_signature(path) for path in files}
+        self.public_dir = public_dir
+        self.public_generation = self.image_generation()
+        self.delay_ms = WATCH_MIN_MS
+
+    def image_generation(self) -> int:
+        return get_public_image_index(self.public_dir).generation if self.public_dir is not None else 0
+
+    def poll(self) -> list[Path]:
+        changed: list[Path] = []
+        for path, previous in self.signatures.items():
+            current = file_signature(path)
+            if current != previous:
+                self.signatures[path] = current
+                changed.append(path)
+        generation = self.image_generation()
+        if generation != self.public_generation:
+            self.public_generation = generation
+            changed.append(self.public_dir)
+        self.delay_ms = WATCH_MIN_MS if changed else min(self.delay_ms * 2, WATCH_MAX_MS)
+        return changed
+
+
+def diff_rows(
+    current: dict[int, dict[str, Any]], latest: dict[int, dict[str, Any]]
+) -> tuple[list[dict[str, Any]], list[int]]:
+    """(追加・変更された行, 消えた id) を返す。"""
+    upserts = [row for row_id, row in latest.items() if current.get(row_id) != row]
+    removed = sorted(current.keys() - latest.keys())
+    return (upserts, removed)
@@ -0,0 +1,328 @@
+"""両 GUI で共有する Tk ウィジェット。"""
+
+from __future__ import annotations
+
+import bisect
+import importlib.util
+import os
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from pathlib import Path
+from tkinter import ttk
+from typing import Any, Callable
+
+from .paths import STATE_DIR
+from .images import file_sha256
+
+
+THUMBNAIL_CACHE_DIR = STATE_DIR / "thumbs"
+PREVIEW_SIZE = (160, 120)
+PREVIEW_MEMORY_ITEMS = 64
+PREVIEW_POLL_MS = 100
+GIT_SYNC_POLL_MS = 300
+SEARCH_DEBOUNCE_MS = 150
+
+
+class VirtualTreeview:
+    """表示範囲の行だけを Treeview に実体化する一覧。行は id 昇順のインデックスで保持し、追加・更新・削除は差分で反映する。"""
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        columns: tuple[tuple[str, str, int, str], ...],
+        row_values: Callable[[dict[str, Any]], tuple[Any, ...]],
+        on_select: Callable[[], None],
+        height: int,
+    ):
+        self.row_values = row_values
+        self.on_select = on_select
+        self.rows: dict[int, dict[str, Any]] = {}
+        self.order: list[int] = []
+        self.filter_ids: set[int] | None = None
+        self.offset = 0
+        self.visible_count = height
+        self.measured = False
+        self.selected: int | None = None
+
+        self.tree = ttk.Treeview(
+            parent,
+            columns=tuple(key for key, _, _, _ in columns),
+            show="headings",
+            height=height,
+            selectmode="browse",
+        )
+        for key, text, width, anchor in columns:
+            self.tree.heading(key, text=text)
+            self.tree.column(key, width=width, anchor=anchor)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", lambda _event: self._fit_rows())
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda _event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda _event: self.scroll_rows(3))
+        self.tree.bind("<Up>", lambda _event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda _event: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda _event: self.move_selection(-self.visible_count))
+        self.tree.bind("<Next>", lambda _event: self.move_selection(self.visible_count))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def set_rows(self, rows: list[dict[str, Any]]) -> None:
+        self.rows = {int(row["id"]): row for row in rows}
+        self.order = self._filtered_order()
+        if self.selected not in self.rows:
+            self.selected = None
+        self.offset = self._clamp_offset(self.offset)
+        self.render()
+
+    def set_filter(self, row_ids: list[int] | None) -> None:
+        """None で絞り込みを解除する。絞り込み中に追加された行は次の set_filter まで表示しない。"""
+        self.filter_ids = None if row_ids is None else set(row_ids)
+        self.order = self._filtered_order()
+        self.offset = 0
+        self.render()
+
+    def upsert(self, row: dict[str, Any]) -> None:
+        row_id = int(row["id"])
+        if row_id in self.rows:
+            self.rows[row_id] = row
+            if self.tree.exists(str(row_id)):
+                self.tree.item(str(row_id), values=self.row_values(row))
+            return
+
+        self.rows[row_id] = row
+        if self.filter_ids is None or row_id in self.filter_ids:
+            bisect.insort(self.order, row_id)
+            self.render()
+
+    def remove(self, row_id: int) -> None:
+        if self.rows.pop(row_id, None) is None:
+            return
+        index = self._index_of(row_id)
+        if index is not None:
+            del self.order[index]
+        if self.selected == row_id:
+            self.selected = None
+        self.offset = self._clamp_offset(self.offset)
+        self.render()
+
+    def selection(self) -> tuple[str, ...]:
+        return () if self.selected is None else (str(self.selected),)
+
+    def select(self, row_id: int) -> None:
+        index = self._index_of(row_id)
+        if index is None:
+            return
+        self.selected = row_id
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count:
+            self.offset = self._clamp_offset(index - self.visible_count + 1)
+        self.render()
+
+    def clear_selection(self) -> None:
+        self.selected = None
+        self.tree.selection_remove(*self.tree.selection())
+
+    def move_selection(self, step: int) -> str:
+        if not self.order:
+            return "break"
+        if self.selected is None:
+            index = self.offset
+        else:
+            index = bisect.bisect_left(self.order, self.selected) + step
+        row_id = self.order[max(0, min(index, len(self.order) - 1))]
+        if row_id != self.selected:
+            self.select(row_id)
+            self.on_select()
+        return "break"
+
+    def render(self) -> None:
+        window = self.order[self.offset : self.offset + self.visible_count]
+        self.tree.delete(*self.tree.get_children())
+        for row_id in window:
+            self.tree.insert("", tk.END, iid=str(row_id), values=self.row_values(self.rows[row_id]))
+
+        if self.selected is not None and self.tree.exists(str(self.selected)):
+            self.tree.selection_set(str(self.selected))
+            self.tree.focus(str(self.selected))
+        self._update_scrollbar()
+        if not self.measured and window:
+            self._fit_rows()
+
+    def yview(self, *args: str) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.order)))
+        elif args[0] == "scroll":
+            step = self.visible_count if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def scroll_to(self, offset: int) -> None:
+        offset = self._clamp_offset(offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_rows(self, delta: int) -> str:
+        self.scroll_to(self.offset + delta)
+        return "break"
+
+    def _filtered_order(self) -> list[int]:
+        if self.filter_ids is None:
+            return sorted(self.rows)
+        return sorted(self.filter_ids & self.rows.keys())
+
+    def _index_of(self, row_id: int) -> int | None:
+        index = bisect.bisect_left(self.order, row_id)
+        if index < len(self.order) and self.order[index] == row_id:
+            return index
+        return None
+
+    def _clamp_offset(self, offset: int) -> int:
+        return max(0, min(offset, len(self.order) - self.visible_count))
+
+    def _update_scrollbar(self) -> None:
+        total = len(self.order)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_count) / total))
+
+    def _fit_rows(self) -> None:
+        # 実際の行高さはテーマやフォントで変わるため、描画済みの先頭行から表示可能な行数を求める
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else ""
+        if not bbox:
+            return
+        _, top, _, row_height = bbox
+        self.measured = True
+        count = max(1, (self.tree.winfo_height() - top) // max(1, row_height))
+        if count != self.visible_count:
+            self.visible_count = count
+            self.offset = self._clamp_offset(self.offset)
+            self.render()
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_tree_select(self, _event: Any) -> None:
+        # 描画で選択行を付け直したときのイベントは、選択が変わっていないので無視する
+        selected = self.tree.selection()
+        if not selected or int(selected[0]) == self.selected:
+            return
+        self.selected = int(selected[0])
+        self.on_select()
+
+
+class ThumbnailCache:
+    """public 配下の画像を内容ハッシュ単位で縮小PNGにキャッシュし、表示用の PhotoImage を LRU で保持する。
+
+    縮小PNGの生成は別スレッドで行う。PhotoImage は Tk のスレッドでしか作れないため、
+    GUI 側が poll() を定期的に呼んで出来上がったものを受け取る。
+    """
+
+    def __init__(self, public_dir: Path, cache_dir: Path = THUMBNAIL_CACHE_DIR, max_images: int = PREVIEW_MEMORY_ITEMS):
+        self.public_dir = public_dir
+        self.cache_dir = cache_dir
+        self.max_images = max_images
+        self.available = importlib.util.find_spec("PIL") is not None
+        self.images: OrderedDict[str, tuple[tuple[int, int], tk.PhotoImage]] = OrderedDict()
+        self.requested: set[str] = set()
+        self.jobs: queue.Queue[str | None] = queue.Queue()
+        self.results: queue.Queue[tuple[str, tuple[int, int], Path | None, str]] = queue.Queue()
+        self.hashes: dict[tuple[str, int, int], str] = {}
+        self.thread: threading.Thread | None = None
+
+    def get(self, image_ref: str) -> tk.PhotoImage | None:
+        cached = self.images.get(image_ref)
+        if cached is None:
+            return None
+        signature, image = cached
+        if signature != self._signature(image_ref):
+            del self.images[image_ref]
+            return None
+        self.images.move_to_end(image_ref)
+        return image
+
+    def request(self, image_ref: str) -> None:
+        if image_ref in self.requested:
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.requested.add(image_ref)
+        self.jobs.put(image_ref)
+
+    def poll(self) -> list[tuple[str, str]]:
+        """生成済みのサムネイルを読み込み、(画像参照, エラー文) の一覧を返す。"""
+        finished: list[tuple[str, str]] = []
+        while True:
+            try:
+                image_ref, signature, thumb_file, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.requested.discard(image_ref)
+            if thumb_file is not None:
+                try:
+                    self.images[image_ref] = (signature, tk.PhotoImage(file=str(thumb_file)))
+                    self.images.move_to_end(image_ref)
+                except tk.TclError as exc:
+                    error = str(exc)
+                while len(self.images) > self.max_images:
+                    self.images.popitem(last=False)
+            finished.append((image_ref, error))
+        return finished
+
+    def stop(self) -> None:
+        if self.thread is not None:
+            self.jobs.put(None)
+
+    def _signature(self, image_ref: str) -> tuple[int, int]:
+        try:
+            stat = (self.public_dir / image_ref).stat()
+        except OSError:
+            return (-1, -1)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _run(self) -> None:
+        while True:
+            image_ref = self.jobs.get()
+            if image_ref is None:
+                return
+            signature = self._signature(image_ref)
+            try:
+                thumb_file = self._build_thumbnail(image_ref, signature)
+            except Exception as exc:  # noqa: BLE001
+                self.results.put((image_ref, signature, None, str(exc)))
+                continue
+            self.results.put((image_ref, signature, thumb_file, ""))
+
+    def _build_thumbnail(self, image_ref: str, signature: tuple[int, int]) -> Path:
+        source = self.public_dir / image_ref
+        key = (image_ref, *signature)
+        digest = self.hashes.get(key)
+        if digest is None:
+            digest = file_sha256(source)
+            self.hashes[key] = digest
+
+        thumb_file = self.cache_dir / f"{digest}.png"
+        if thumb_file.exists():
+            return thumb_file
+
+        from PIL import Image
+
+        with Image.open(source) as image:
+            image.thumbnail(PREVIEW_SIZE)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = thumb_file.with_name(f"{thumb_file.name}.tmp")
+            image.save(temp_file, format="PNG")
+        os.replace(temp_file, thumb_file)
+        return thumb_file
@@ -0,0 +1,359 @@
+"""SHOP データ（works-data.json）の読み書き。"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from .normalize import (
+    normalize_image_reference,
+    normalize_youtube_urls,
+    to_bool,
+    to_number,
+    to_string_list,
+    to_text,
+    unique_strings,
+)
+from .images import IMAGE_EXTENSIONS
+from .locking import check_revision, data_file_lock, store_revision
+from .snapshots import keep_snapshot
+from .storage import (
+    load_data_meta,
+    load_json,
+    meta_file_for,
+    minified_artifact_paths,
+    minified_file_for,
+    next_id,
+    replace_file,
+    save_data_meta,
+    write_minified_artifacts,
+)
+from .validation import dropped_item_issue, FieldRule, Issue, validate_items, ValidationError, ValidationReport
+from .search import (
+    encode_search_index,
+    search_index_file_for,
+    search_index_paths,
+    SearchIndex,
+    write_search_index_artifacts,
+)
+
+
+WORK_TYPE_INFO: dict[str, dict[str, str]] = {
+    "games": {"label": "ゲーム", "kind": "game"},
+    "tools": {"label": "ツール", "kind": "tool"},
+    "modelAssets": {"label": "3Dアセット", "kind": "tool"},
+    "blenderAddons": {"label": "Blenderアドオン", "kind": "tool"},
+}
+
+
+COLOR_CLASS_OPTIONS = [
+    "from-cyan-400 to-blue-400",
+    "from-emerald-400 to-teal-400",
+    "from-blue-400 to-indigo-400",
+    "from-pink-400 to-rose-400",
+    "from-violet-400 to-purple-400",
+    "from-amber-400 to-orange-400",
+    "from-indigo-400 to-violet-400",
+    "from-green-400 to-emerald-400",
+    "from-rose-400 to-red-400",
+    "from-teal-400 to-cyan-400",
+]
+
+
+WORK_COMMON_SCHEMA: dict[str, FieldRule] = {
+    "id": FieldRule("id", missing="error"),
+    "title": FieldRule("text", missing="error"),
+    "description": FieldRule("text", missing="warning", default="空欄"),
+    "category": FieldRule("text", missing="warning", default="空欄"),
+    "price": FieldRule("number", missing="warning", default="0", minimum=0),
+    "color": FieldRule("choice", missing="warning", default=COLOR_CLASS_OPTIONS[0], choices=tuple(COLOR_CLASS_OPTIONS)),
+    "boothUrl": FieldRule("url", missing="warning", default="https://booth.pm/"),
+    "trailerUrls": FieldRule("youtube_list"),
+    "trailerUrl": FieldRule("legacy", default="trailerUrls にまとめられます"),
+    "screenshots": FieldRule("image_list"),
+    "inDevelopment": FieldRule("bool"),
+    "showPriceStatus": FieldRule("bool"),
+}
+
+WORK_SCHEMAS: dict[str, dict[str, FieldRule]] = {
+    "game": {
+        **WORK_COMMON_SCHEMA,
+        "rating": FieldRule("number", missing="warning", default="0", minimum=0, maximum=5),
+        "image": FieldRule("image", missing="warning", default="🎮"),
+        "tags": FieldRule("text_list"),
+    },
+    "tool": {
+        **WORK_COMMON_SCHEMA,
+        "icon": FieldRule("image", missing="warning", default="🛠️"),
+        "features": FieldRule("text_list"),
+        "isNew": FieldRule("bool"),
+    },
+}
+
+
+def blank_works_data() -> dict[str, list[dict[str, Any]]]:
+    return {key: [] for key in WORK_TYPE_INFO}
+
+
+def normalize_game_item(item: Any) -> dict[str, Any] | None:
+    if not isinstance(item, dict):
+        return None
+    item_id = int(to_number(item.get("id"), 0))
+    if item_id <= 0:
+        return None
+
+    trailer_urls = to_string_list(item.get("trailerUrls"))
+    legacy_trailer = to_text(item.get("trailerUrl"))
+    if not trailer_urls and legacy_trailer:
+        trailer_urls = [legacy_trailer]
+    trailer_urls = normalize_youtube_urls(trailer_urls)
+
+    return {
+        "id": item_id,
+        "title": to_text(item.get("title")),
+        "description": to_text(item.get("description")),
+        "category": to_text(item.get("category")),
+        "rating": float(to_number(item.get("rating"), 0)),
+        "price": int(to_number(item.get("price"), 0)),
+        "image": to_text(item.get("image"), "🎮"),
+        "tags": unique_strings(to_string_list(item.get("tags"))),
+        "color": to_text(item.get("color"), "from-cyan-400 to-blue-400"),
+        "boothUrl": to_text(item.get("boothUrl"), "https://booth.pm/"),
+        "trailerUrls": trailer_urls,
+        "screenshots": unique_strings(to_string_list(item.get("screenshots"))),
+        "inDevelopment": to_bool(item.get("inDevelopment"), False),
+        "showPriceStatus": to_bool(item.get("showPriceStatus"), False),
+    }
+
+
+def normalize_tool_item(item: Any) -> dict[str, Any] | None:
+    if not isinstance(item, dict):
+        return None
+    item_id = int(to_number(item.get("id"), 0))
+    if item_id <= 0:
+        return None
+
+    trailer_urls = to_string_list(item.get("trailerUrls"))
+    legacy_trailer = to_text(item.get("trailerUrl"))
+    if not trailer_urls and legacy_trailer:
+        trailer_urls = [legacy_trailer]
+    trailer_urls = normalize_youtube_urls(trailer_urls)
+
+    return {
+        "id": item_id,
+        "title": to_text(item.get("title")),
+        "description": to_text(item.get("description")),
+        "category": to_text(item.get("category")),
+        "price": int(to_number(item.get("price"), 0)),
+        "icon": to_text(item.get("icon"), "🛠️"),
+        "features": unique_strings(to_string_list(item.get("features"))),
+        "color": to_text(item.get("color"), "from-cyan-400 to-blue-400"),
+        "boothUrl": to_text(item.get("boothUrl"), "https://booth.pm/"),
+        "trailerUrls": trailer_urls,
+        "screenshots": unique_strings(to_string_list(item.get("screenshots"))),
+        "isNew": to_bool(item.get("isNew"), False),
+        "inDevelopment": to_bool(item.get("inDevelopment"), False),
+        "showPriceStatus": to_bool(item.get("showPriceStatus"), False),
+    }
+
+
+def normalize_works_data(data: Any) -> dict[str, list[dict[str, Any]]]:
+    normalized = blank_works_data()
+    if not isinstance(data, dict):
+        return normalized
+
+    for type_key, info in WORK_TYPE_INFO.items():
+        rows = data.get(type_key)
+        if not isinstance(rows, list):
+            continue
+        if info["kind"] == "game":
+            items = [normalize_game_item(item) for item in rows]
+        else:
+            items = [normalize_tool_item(item) for item in rows]
+        normalized[type_key] = [item for item in items if item is not None]
+        normalized[type_key].sort(key=lambda x: int(x["id"]))
+
+    return normalized
+
+
+def load_works_data(data_file: Path) -> dict[str, list[dict[str, Any]]]:
+    if not data_file.exists():
+        return blank_works_data()
+
+    return load_json(data_file, normalize_works_data)
+
+
+def validate_works(data: Any) -> ValidationReport:
+    """読み込み前の JSON をそのまま検査する。正規化で黙って落ちる・補われる箇所もすべて報告する。"""
+    report = ValidationReport()
+    if not isinstance(data, dict):
+        report.issues.append(Issue("error", "works", "", "オブジェクトではありません", None))
+        return report
+
+    for type_key in sorted(data.keys() - WORK_TYPE_INFO.keys()):
+        report.issues.append(Issue("warning", type_key, "", "未対応のタイプです（読み込み時に無視されます）", None))
+    for type_key, info in WORK_TYPE_INFO.items():
+        rows = data.get(type_key, [])
+        if not isinstance(rows, list):
+            report.issues.append(Issue("error", type_key, "", "配列ではありません（読み込み時に空になります）", None))
+            continue
+        validate_items(
+            report,
+            type_key,
+            f"works/{info['kind']}",
+            WORK_SCHEMAS[info["kind"]],
+            rows,
+            key_of=lambda item_id, type_key=type_key: (type_key, item_id),
+        )
+    return report
+
+
+def check_works_kept(
+    data: dict[str, list[Any]], normalized: dict[str, list[dict[str, Any]]], changed: set[tuple[str, int]] | None
+) -> None:
+    """変更した (タイプ, id) が正規化で落ちていれば ValidationError を送出する。changed に含まれる削除は対象外。"""
+    if not changed:
+        return
+    given = {
+        (type_key, item["id"])
+        for type_key, items in data.items()
+        for item in (items if isinstance(items, list) else [])
+        if isinstance(item, dict) and (type_key, item.get("id")) in changed
+    }
+    kept = {(type_key, int(item["id"])) for type_key, items in normalized.items() for item in items}
+    dropped = sorted(given - kept)
+    if dropped:
+        raise ValidationError([dropped_item_issue(f"{key[0]} id={key[1]}", key) for key in dropped])
+
+
+def save_works_data(
+    data_file: Path,
+    data: dict[str, list[dict[str, Any]]],
+    expected_revision: int | None = None,
+    changed: set[tuple[str, int]] | None = None,
+) -> int:
+    """全件を書き出し、新しいリビジョンを返す。expected_revision の扱いは save_records と同じ。
+
+    changed の (タイプ, id) にエラーがあれば、書き込まずに ValidationError を送出する。
+    """
+    if changed:
+        # 正規化すると問題のある項目が黙って落ちたり補われたりするので、受け取ったままの内容を検査する
+        errors = validate_works(data).errors_for(changed)
+        if errors:
+            raise ValidationError(errors)
+    normalized = normalize_works_data(data)
+    check_works_kept(data, normalized, changed)
+    payload = (json.dumps(normalized, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+    with data_file_lock(data_file):
+        current = check_revision(data_file, expected_revision)
+        keep_snapshot(data_file, current)
+        revision = current + 1
+        store_revision(data_file, revision)
+        replace_file(data_file, payload)
+        if minified_file_for(data_file).exists():
+            write_minified_artifacts(data_file, normalized)
+        if search_index_file_for(data_file).exists():
+            write_works_search_index(data_file, normalized)
+    return revision
+
+
+def merge_works(
+    latest: dict[str, list[dict[str, Any]]],
+    ours: dict[str, dict[int, dict[str, Any]]],
+    changed: set[tuple[str, int]],
+) -> dict[str, list[dict[str, Any]]]:
+    """最新のデータに、こちらで変更した (タイプ, id) だけを重ねる。ours に無いものは削除として扱う。"""
+    merged = index_works_by_id(latest)
+    for type_key, item_id in changed:
+        items = merged.setdefault(type_key, {})
+        if item_id in ours.get(type_key, {}):
+            items[item_id] = ours[type_key][item_id]
+        else:
+            items.pop(item_id, None)
+    return {type_key: sorted(items.values(), key=lambda x: int(x["id"])) for type_key, items in merged.items()}
+
+
+def data_commit_paths(data_file: Path) -> list[Path]:
+    artifacts = [meta_file_for(data_file), *minified_artifact_paths(data_file), *search_index_paths(data_file)]
+    return [data_file, *(path for path in artifacts if path.exists())]
+
+
+def is_image_reference(value: str) -> bool:
+    return Path(value).suffix.lower() in IMAGE_EXTENSIONS
+
+
+def collect_item_image_refs(item: dict[str, Any]) -> list[str]:
+    refs: list[str] = []
+    for key in ("image", "icon"):
+        value = item.get(key)
+        if isinstance(value, str) and is_image_reference(value):
+            refs.append(normalize_image_reference(value))
+    screenshots = item.get("screenshots")
+    if isinstance(screenshots, list):
+        refs.extend(
+            normalize_image_reference(value)
+            for value in screenshots
+            if isinstance(value, str) and is_image_reference(value)
+        )
+    return unique_strings(refs)
+
+
+def collect_works_image_refs(works: dict[str, list[dict[str, Any]]]) -> list[str]:
+    return unique_strings([ref for items in works.values() for item in items for ref in collect_item_image_refs(item)])
+
+
+def index_works_by_id(works: dict[str, list[dict[str, Any]]]) -> dict[str, dict[int, dict[str, Any]]]:
+    return {type_key: {int(item["id"]): item for item in works.get(type_key, [])} for type_key in WORK_TYPE_INFO}
+
+
+def allocate_item_id(data_file: Path, type_key: str, items_by_id: dict[int, dict[str, Any]]) -> int:
+    """メタ情報のタイプ別 nextIds から id を払い出す。削除した id は再利用しない。"""
+    with data_file_lock(data_file):
+        meta = load_data_meta(data_file)
+        next_ids = meta.get("nextIds") if isinstance(meta.get("nextIds"), dict) else {}
+        candidate = next_ids.get(type_key)
+        if not isinstance(candidate, int) or candidate < 1:
+            candidate = next_id(list(items_by_id.values()))
+        while candidate in items_by_id:
+            candidate += 1
+
+        next_ids[type_key] = candidate + 1
+        meta["nextIds"] = next_ids
+        save_data_meta(data_file, meta)
+    return candidate
+
+
+def item_search_fields(item: dict[str, Any]) -> list[str]:
+    return [
+        str(item.get("title", "")),
+        str(item.get("description", "")),
+        str(item.get("category", "")),
+        *to_string_list(item.get("tags")),
+        *to_string_list(item.get("features")),
+    ]
+
+
+def build_works_search_indexes(works: dict[str, list[dict[str, Any]]]) -> dict[str, SearchIndex]:
+    indexes: dict[str, SearchIndex] = {}
+    for type_key in WORK_TYPE_INFO:
+        index = SearchIndex()
+        for item in works.get(type_key, []):
+            index.add(int(item["id"]), item_search_fields(item))
+        indexes[type_key] = index
+    return indexes
+
+
+EXPORT_SEARCH_INDEXES: dict[Path, dict[str, SearchIndex]] = {}
+
+
+def write_works_search_index(data_file: Path, works: dict[str, list[dict[str, Any]]]) -> list[tuple[Path, int]]:
+    # GUI から保存が続く場合に備え、前回の索引を使い回して変わった項目だけ n-gram を作り直す
+    indexes = EXPORT_SEARCH_INDEXES.setdefault(data_file.resolve(), {})
+    types: dict[str, Any] = {}
+    for type_key in WORK_TYPE_INFO:
+        index = indexes.setdefault(type_key, SearchIndex())
+        index.sync({int(item["id"]): item_search_fields(item) for item in works.get(type_key, [])})
+        types[type_key] = encode_search_index(index)
+    return write_search_index_artifacts(data_file, {"types": types})
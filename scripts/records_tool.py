@@ -9,301 +9,105 @@ Usage:
   python scripts/records_tool.py add --title "タイトル" --description "説明" --image avatar.png --image icon.png
   python scripts/records_tool.py add --title "タイトル" --description "説明" --youtube "https://youtu.be/xxxx"
   python scripts/records_tool.py delete --id 3
+  python scripts/records_tool.py --journal add --title "タイトル" --description "説明" --image avatar.png
+  python scripts/records_tool.py --stage delete --id 3
+  python scripts/records_tool.py --merge delete --id 3
+  python scripts/records_tool.py publish
+  python scripts/records_tool.py import --input records.jsonl
+  python scripts/records_tool.py import --input records.csv
+  python scripts/records_tool.py derive
+  python scripts/records_tool.py dedupe --dry-run
+  python scripts/records_tool.py shard
+  python scripts/records_tool.py export
+  python scripts/records_tool.py search --query ことば
+  python scripts/records_tool.py verify
+  python scripts/records_tool.py gc
+  python scripts/records_tool.py gc --apply
+  python scripts/records_tool.py serve --port 8765
+  python scripts/records_tool.py rollback
+  python scripts/records_tool.py rollback --revision 12
+  python scripts/records_tool.py validate
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
+import importlib.util
 import json
-import shutil
-import subprocess
+import re
 import sys
-import tkinter as tk
-from pathlib import Path
-from tkinter import filedialog, messagebox, ttk
-from typing import Any
-from urllib.parse import parse_qs, urlparse
-
-def resolve_root_dir() -> Path:
-    if getattr(sys, "frozen", False):
-        exe_dir = Path(sys.executable).resolve().parent
-        if (exe_dir / "public").exists():
-            return exe_dir
-        if (exe_dir.parent / "public").exists():
-            return exe_dir.parent
-        return Path.cwd()
-    return Path(__file__).resolve().parents[1]
-
-
-ROOT_DIR = resolve_root_dir()
-PUBLIC_DIR = ROOT_DIR / "public"
-DEFAULT_DATA_FILE = ROOT_DIR / "public" / "records-data.json"
-IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".svg", ".avif"}
-YOUTUBE_EMBED_PREFIX = "https://www.youtube.com/embed/"
-
-
-def unique_strings(values: list[str]) -> list[str]:
-    result: list[str] = []
-    seen: set[str] = set()
-    for value in values:
-        item = value.strip()
-        if not item or item in seen:
-            continue
-        seen.add(item)
-        result.append(item)
-    return result
-
-
-def run_git_command(git_root: Path, args: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(
-        ["git", "-C", str(git_root), *args],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-
-def find_git_root(start_dir: Path) -> Path | None:
-    result = subprocess.run(
-        ["git", "-C", str(start_dir), "rev-parse", "--show-toplevel"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    if result.returncode != 0:
-        return None
-
-    git_root_text = result.stdout.strip()
-    if not git_root_text:
-        return None
-
-    git_root = Path(git_root_text).resolve()
-    return git_root if git_root.exists() else None
-
-
-def format_git_failure(prefix: str, result: subprocess.CompletedProcess[str]) -> str:
-    details = (result.stderr or result.stdout or "").strip()
-    return f"{prefix}: {details}" if details else prefix
-
-
-def git_commit_and_push(paths: list[Path], commit_message: str) -> tuple[bool, str]:
-    git_root = find_git_root(ROOT_DIR)
-    if git_root is None:
-        return (False, "Gitリポジトリが見つかりません。")
-
-    relative_paths: list[str] = []
-    seen: set[str] = set()
-    for path in paths:
-        resolved = path.resolve()
-        try:
-            rel = resolved.relative_to(git_root).as_posix()
-        except ValueError:
-            continue
-
-        if rel in seen:
-            continue
-        seen.add(rel)
-        relative_paths.append(rel)
-
-    if not relative_paths:
-        return (False, "コミット対象のファイルが見つかりません。")
-
-    add_result = run_git_command(git_root, ["add", "--", *relative_paths])
-    if add_result.returncode != 0:
-        return (False, format_git_failure("git add に失敗しました", add_result))
-
-    diff_result = run_git_command(git_root, ["diff", "--cached", "--quiet", "--", *relative_paths])
-    if diff_result.returncode == 0:
-        return (False, "コミット対象に変更がありません。")
-    if diff_result.returncode != 1:
-        return (False, format_git_failure("差分確認に失敗しました", diff_result))
-
-    commit_result = run_git_command(git_root, ["commit", "-m", commit_message, "--", *relative_paths])
-    if commit_result.returncode != 0:
-        return (False, format_git_failure("git commit に失敗しました", commit_result))
-
-    push_result = run_git_command(git_root, ["push"])
-    if push_result.returncode != 0:
-        return (False, format_git_failure("git push に失敗しました", push_result))
-
-    return (True, f"Git commit/push 完了: {commit_message}")
-
-
-def normalize_image_reference(image_value: Any) -> str:
-    if not isinstance(image_value, str):
-        return ""
-    return image_value.strip().replace("\\", "/").lstrip("/")
-
-
-def resolve_public_image_path(public_dir: Path, image_ref: str) -> Path | None:
-    normalized = normalize_image_reference(image_ref)
-    if not normalized:
-        return None
-
-    target = (public_dir / normalized).resolve()
-    try:
-        target.relative_to(public_dir.resolve())
-    except ValueError:
-        return None
-
-    return target
-
+import time
+from pathlib import Path, PurePosixPath
+from typing import Any, Iterator
+
+from homepage_tools.paths import PUBLIC_DIR, ROOT_DIR
+from homepage_tools.normalize import (
+    normalize_image_reference,
+    normalize_str_list,
+    parse_youtube_urls,
+    unique_strings,
+)
+from homepage_tools.git import GIT_SESSION, git_commit_and_push
+from homepage_tools.staging import (
+    build_publish_message,
+    discard_pending_changes,
+    load_pending_changes,
+    pending_change_paths,
+    stage_change,
+)
+from homepage_tools.images import (
+    DERIVED_DIR_NAME,
+    IMAGE_EXTENSIONS,
+    get_public_image_index,
+    image_file_exists,
+    list_public_images,
+    read_image_size,
+    resolve_public_image_path,
+)
+from homepage_tools.derive import (
+    IMAGE_MANIFEST_FILE,
+    build_image_derivatives,
+    load_image_manifest,
+    manifest_variant_paths,
+    save_image_manifest,
+)
+from homepage_tools.locking import DataLockTimeout, read_revision, RevisionConflict
+from homepage_tools.snapshots import print_snapshots, read_snapshot
+from homepage_tools.storage import DataMetaError, format_bytes, print_size_report, write_minified_artifacts
+from homepage_tools.validation import print_validation_report, save_validation_cache, ValidationError
+from homepage_tools.records import (
+    allocate_record_ids,
+    append_journal,
+    build_records_search_index,
+    collect_record_image_refs,
+    compact_records,
+    data_commit_paths,
+    index_raw_records,
+    journal_delete,
+    journal_file_for,
+    journal_put,
+    load_records,
+    merge_records,
+    normalize_records,
+    save_records,
+    shard_dir_for,
+    validate_records,
+    write_record_shards,
+    write_records_search_index,
+)
+from homepage_tools.works import data_commit_paths as works_commit_paths, load_works_data, save_works_data
 
-def normalize_youtube_url(value: Any) -> str:
-    if not isinstance(value, str):
-        return ""
-
-    raw = value.strip()
-    if not raw:
-        return ""
-
-    if raw.startswith(YOUTUBE_EMBED_PREFIX):
-        video_id = raw.replace(YOUTUBE_EMBED_PREFIX, "").split("?")[0].strip("/")
-        return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    try:
-        parsed = urlparse(raw)
-    except ValueError:
-        return ""
-
-    host = parsed.netloc.lower().replace("www.", "")
-    path = parsed.path.strip("/")
-
-    if host == "youtu.be":
-        video_id = path.split("/")[0] if path else ""
-        return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    if host in {"youtube.com", "m.youtube.com"}:
-        if parsed.path == "/watch":
-            query = parse_qs(parsed.query)
-            video_id = query.get("v", [""])[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-        if parsed.path.startswith("/embed/"):
-            video_id = path.replace("embed/", "").split("/")[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-        if parsed.path.startswith("/shorts/"):
-            video_id = path.replace("shorts/", "").split("/")[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    return ""
-
-
-def normalize_str_list(value: Any) -> list[str]:
-    if not isinstance(value, list):
-        return []
-    return [str(item).strip() for item in value if isinstance(item, str) and item.strip()]
-
-
-def is_image_file(path: Path) -> bool:
-    return path.suffix.lower() in IMAGE_EXTENSIONS
 
-
-def list_public_images(public_dir: Path) -> list[str]:
-    if not public_dir.exists():
-        return []
-    files = [p.relative_to(public_dir).as_posix() for p in public_dir.rglob("*") if p.is_file() and is_image_file(p)]
-    return sorted(files)
-
-
-def safe_public_target(public_dir: Path, source_name: str) -> Path:
-    candidate = public_dir / source_name
-    if not candidate.exists():
-        return candidate
-
-    stem = candidate.stem
-    suffix = candidate.suffix
-    counter = 1
-    while True:
-        next_candidate = public_dir / f"{stem}_{counter}{suffix}"
-        if not next_candidate.exists():
-            return next_candidate
-        counter += 1
-
-
-def image_exists_in_public(public_dir: Path, image_ref: str) -> bool:
-    target = resolve_public_image_path(public_dir, image_ref)
-    return bool(target and target.exists() and target.is_file())
-
-
-def normalize_record(item: Any) -> dict[str, Any] | None:
-    if not isinstance(item, dict):
-        return None
-    if not isinstance(item.get("id"), int):
-        return None
-    if not isinstance(item.get("title"), str):
-        return None
-    if not isinstance(item.get("description"), str):
-        return None
-
-    legacy_image = normalize_image_reference(item.get("image"))
-    legacy_youtube = normalize_youtube_url(item.get("youtubeUrl"))
-
-    images = unique_strings(
-        [normalize_image_reference(value) for value in normalize_str_list(item.get("images"))]
-        + ([legacy_image] if legacy_image else [])
-    )
-    youtube_urls = unique_strings(
-        [normalize_youtube_url(value) for value in normalize_str_list(item.get("youtubeUrls"))]
-        + ([legacy_youtube] if legacy_youtube else [])
-    )
-    youtube_urls = [url for url in youtube_urls if url]
-
-    if not images and not youtube_urls:
-        return None
-
-    return {
-        "id": int(item["id"]),
-        "title": item["title"].strip(),
-        "date": str(item.get("date", "")).strip() if item.get("date") else "",
-        "description": item["description"].strip(),
-        "images": images,
-        "youtubeUrls": youtube_urls,
-    }
-
-
-def load_records(data_file: Path) -> list[dict[str, Any]]:
-    if not data_file.exists():
-        return []
-
-    with data_file.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if not isinstance(data, list):
-        raise ValueError(f"{data_file} の形式が不正です（配列ではありません）")
-
-    records: list[dict[str, Any]] = []
-    for item in data:
-        normalized = normalize_record(item)
-        if normalized is None:
-            continue
-        records.append(normalized)
-
-    return records
-
-
-def save_records(data_file: Path, records: list[dict[str, Any]]) -> None:
-    normalized: list[dict[str, Any]] = []
-    for item in records:
-        record = normalize_record(item)
-        if record is not None:
-            normalized.append(record)
-
-    normalized.sort(key=lambda x: x["id"])
-
-    data_file.parent.mkdir(parents=True, exist_ok=True)
-    with data_file.open("w", encoding="utf-8") as f:
-        json.dump(normalized, f, ensure_ascii=False, indent=2)
-        f.write("\n")
-
-
-def next_id(records: list[dict[str, Any]]) -> int:
-    if not records:
-        return 1
-    return max(int(record["id"]) for record in records) + 1
+DEFAULT_DATA_FILE = ROOT_DIR / "public" / "records-data.json"
+WORKS_DATA_FILE = ROOT_DIR / "public" / "works-data.json"
+IMPORT_LIST_SEPARATOR = "|"
+VERIFY_DECODE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp"}
+VERIFY_MAX_IMAGE_MB = 5.0
+FRONTEND_SOURCE_DIRS = ("src", "components", "sections")
+FRONTEND_SOURCE_EXTENSIONS = {".ts", ".tsx", ".js", ".jsx", ".css", ".html"}
+DUPLICATE_SUFFIX_PATTERN = re.compile(r"_\d+$")
+SERVE_PORT = 8765
 
 
 def media_summary(record: dict[str, Any]) -> str:
@@ -312,6 +116,12 @@ def media_summary(record: dict[str, Any]) -> str:
     return f"画像 {len(images)} / 動画 {len(youtube_urls)}"
 
 
+def format_record_line(record: dict[str, Any]) -> str:
+    description = str(record["description"])
+    short_description = description if len(description) <= 40 else f"{description[:40]}..."
+    return f'id={record["id"]:>3} | title={record["title"]} | {media_summary(record)} | desc={short_description}'
+
+
 def print_records(records: list[dict[str, Any]]) -> None:
     if not records:
         print("記録データは空です。")
@@ -320,12 +130,7 @@ def print_records(records: list[dict[str, Any]]) -> None:
     print(f"データ件数: {len(records)}")
     print("-" * 100)
     for record in sorted(records, key=lambda r: int(r["id"])):
-        description = str(record["description"])
-        short_description = description if len(description) <= 40 else f"{description[:40]}..."
-        print(
-            f'id={record["id"]:>3} | title={record["title"]} | '
-            f'{media_summary(record)} | desc={short_description}'
-        )
+        print(format_record_line(record))
 
 
 def cmd_list(args: argparse.Namespace) -> int:
@@ -334,11 +139,37 @@ def cmd_list(args: argparse.Namespace) -> int:
     return 0
 
 
-def cmd_add(args: argparse.Namespace) -> int:
+def cmd_search(args: argparse.Namespace) -> int:
+    query = (args.query or "").strip()
+    if not query:
+        print("エラー: search には --query が必要です。")
+        return 1
+
     records = load_records(args.data_file)
+    started = time.perf_counter()
+    index = build_records_search_index(records)
+    built = time.perf_counter()
+    matches = index.search(query)
+    searched = time.perf_counter()
+
+    by_id = {int(record["id"]): record for record in records}
+    for record_id in matches:
+        print(format_record_line(by_id[record_id]))
+    print(
+        f'検索: "{query}" {len(matches)}件 / 全{len(records)}件'
+        f"（索引作成 {(built - started) * 1000:.1f} ms / 検索 {(searched - built) * 1000:.2f} ms）"
+    )
+    return 0
+
+
+def cmd_add(args: argparse.Namespace) -> int:
+    revision = read_revision(args.data_file)
+    # ジャーナルへの追記では全件を読まない。id はメタ情報の nextId から払い出す
+    records = [] if args.journal else load_records(args.data_file)
 
     image_refs = unique_strings([normalize_image_reference(value) for value in (args.image or [])])
-    youtube_urls = unique_strings([normalize_youtube_url(value) for value in (args.youtube or [])])
+    youtube_results = parse_youtube_urls(args.youtube or [])
+    youtube_urls = unique_strings([result.embed_url for result in youtube_results if result.embed_url])
 
     if not args.title or not args.title.strip():
         print("エラー: --title は必須です。")
@@ -351,515 +182,675 @@ def cmd_add(args: argparse.Namespace) -> int:
         return 1
 
     for image_ref in image_refs:
-        if not image_exists_in_public(PUBLIC_DIR, image_ref):
+        if not image_file_exists(PUBLIC_DIR, image_ref):
             print(f"エラー: 画像 '{image_ref}' が public 配下に見つかりません。")
             return 1
 
-    if any(not item for item in youtube_urls):
-        print("エラー: --youtube の形式が不正です。YouTube URLを指定してください。")
-        return 1
+    for raw_url, result in zip(args.youtube or [], youtube_results):
+        if not result.embed_url:
+            print(f"エラー: --youtube '{raw_url}' の形式が不正です（{result.reason}）。YouTube URLを指定してください。")
+            return 1
 
+    records_by_id = None if args.journal else {int(item["id"]): item for item in records}
     record = {
-        "id": next_id(records),
+        "id": allocate_record_ids(args.data_file, records_by_id)[0],
         "title": args.title.strip(),
         "description": args.description.strip(),
         "images": image_refs,
         "youtubeUrls": youtube_urls,
     }
 
-    records.append(record)
-    save_records(args.data_file, records)
-    commit_paths = [args.data_file] + [PUBLIC_DIR / image_ref for image_ref in image_refs]
-    git_ok, git_message = git_commit_and_push(commit_paths, "add")
-    print(f'追加しました: id={record["id"]}, title="{record["title"]}", {media_summary(record)}')
-    if git_ok:
-        print(git_message)
+    if args.journal:
+        append_journal(args.data_file, [journal_put(record)])
     else:
-        print(f"警告: {git_message}")
+        records.append(record)
+        save_cli_records(args, records, {record["id"]}, revision)
+    commit_paths = data_commit_paths(args.data_file) + [PUBLIC_DIR / image_ref for image_ref in image_refs]
+    print(f'追加しました: id={record["id"]}, title="{record["title"]}", {media_summary(record)}')
+    commit_or_stage(args, {"action": "add", "id": record["id"], "title": record["title"]}, commit_paths, "add")
     return 0
 
 
 def cmd_delete(args: argparse.Namespace) -> int:
-    records = load_records(args.data_file)
+    revision = read_revision(args.data_file)
+    if args.journal:
+        # ジャーナルへの追記では正規化せずに id の有無だけを確かめる
+        records_by_id = index_raw_records(args.data_file)
+    else:
+        records_by_id = {int(record["id"]): record for record in load_records(args.data_file)}
     target_id = args.id
 
-    new_records = [record for record in records if int(record["id"]) != target_id]
-    if len(new_records) == len(records):
+    target = records_by_id.pop(target_id, None)
+    if target is None:
         print(f"id={target_id} は見つかりませんでした。")
         return 1
 
-    save_records(args.data_file, new_records)
-    git_ok, git_message = git_commit_and_push([args.data_file], "delete")
+    if args.journal:
+        append_journal(args.data_file, [journal_delete(target_id)])
+    else:
+        save_cli_records(args, list(records_by_id.values()), {target_id}, revision)
     print(f"id={target_id} を削除しました。")
+    change = {"action": "delete", "id": target_id, "title": str(target.get("title", ""))}
+    commit_or_stage(args, change, data_commit_paths(args.data_file), "delete")
+    return 0
+
+
+def save_cli_records(
+    args: argparse.Namespace, records: list[dict[str, Any]], changed_ids: set[int], revision: int
+) -> None:
+    try:
+        save_records(args.data_file, records, changed_ids, expected_revision=revision)
+    except RevisionConflict:
+        if not args.merge:
+            raise
+        latest_revision = read_revision(args.data_file)
+        ours = {int(record["id"]): record for record in records}
+        merged = merge_records(load_records(args.data_file), ours, changed_ids)
+        save_records(args.data_file, merged, changed_ids, expected_revision=latest_revision)
+        print("警告: 他のツールの保存と競合したため、最新のデータに今回の変更を重ねて保存しました。")
+
+
+def commit_or_stage(args: argparse.Namespace, change: dict[str, Any], commit_paths: list[Path], commit_message: str) -> None:
+    if args.journal or args.stage:
+        count = stage_change(args.data_file, change, commit_paths)
+        print(f"未公開の変更: {count} 件（publish コマンドでまとめて公開します）")
+        return
+
+    git_ok, git_message = git_commit_and_push(commit_paths, commit_message)
     if git_ok:
         print(git_message)
     else:
         print(f"警告: {git_message}")
-    return 0
-
 
-class RecordsGui:
-    def __init__(self, root: tk.Tk, data_file: Path):
-        self.root = root
-        self.data_file = data_file
-        self.public_dir = PUBLIC_DIR
-        self.records: list[dict[str, Any]] = []
 
-        self.form_images: list[str] = []
-        self.form_youtube_urls: list[str] = []
+def cmd_publish(args: argparse.Namespace) -> int:
+    image_refs = compact_records(args.data_file)
+    changes = load_pending_changes(args.data_file)
+    if not changes and not image_refs:
+        print("公開する変更はありません。")
+        return 0
 
-        self.root.title("成長記録データ管理")
-        self.root.geometry("1120x720")
-        self.root.minsize(960, 620)
+    commit_paths = (
+        data_commit_paths(args.data_file)
+        + [PUBLIC_DIR / image_ref for image_ref in image_refs]
+        + pending_change_paths(changes)
+    )
+    git_ok, git_message = git_commit_and_push(commit_paths, build_publish_message("records", changes))
+    if not git_ok:
+        print(f"警告: {git_message}")
+        return 1
 
-        self._build_ui()
-        self.refresh_records()
+    discard_pending_changes(args.data_file, len(changes))
+    print(f"{len(changes)} 件の変更を公開しました。")
+    print(git_message)
+    return 0
 
-    def _build_ui(self) -> None:
-        wrapper = ttk.Frame(self.root, padding=12)
-        wrapper.pack(fill=tk.BOTH, expand=True)
 
-        top_bar = ttk.Frame(wrapper)
-        top_bar.pack(fill=tk.X, pady=(0, 10))
+def split_import_list(value: Any) -> list[str]:
+    if not isinstance(value, str):
+        return []
+    return [chunk.strip() for chunk in value.split(IMPORT_LIST_SEPARATOR) if chunk.strip()]
 
-        ttk.Label(top_bar, text="データファイル:").pack(side=tk.LEFT)
-        ttk.Label(top_bar, text=str(self.data_file), foreground="#555").pack(side=tk.LEFT, padx=(6, 0))
-        ttk.Button(top_bar, text="再読み込み", command=self.refresh_records).pack(side=tk.RIGHT)
 
-        main_area = ttk.Panedwindow(wrapper, orient=tk.HORIZONTAL)
-        main_area.pack(fill=tk.BOTH, expand=True)
+def csv_row_to_item(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "title": row.get("title") or "",
+        "date": row.get("date") or "",
+        "description": row.get("description") or "",
+        "images": split_import_list(row.get("images")) + split_import_list(row.get("image")),
+        "youtubeUrls": split_import_list(row.get("youtubeUrls")) + split_import_list(row.get("youtube")),
+    }
 
-        list_frame = ttk.Frame(main_area, padding=8)
-        form_frame = ttk.Frame(main_area, padding=8)
-        main_area.add(list_frame, weight=3)
-        main_area.add(form_frame, weight=2)
 
-        self.tree = ttk.Treeview(
-            list_frame,
-            columns=("id", "title", "images", "youtube"),
-            show="headings",
-            height=22,
-        )
-        self.tree.heading("id", text="ID")
-        self.tree.heading("title", text="タイトル")
-        self.tree.heading("images", text="画像")
-        self.tree.heading("youtube", text="YouTube")
-        self.tree.column("id", width=70, anchor=tk.CENTER)
-        self.tree.column("title", width=290, anchor=tk.W)
-        self.tree.column("images", width=80, anchor=tk.CENTER)
-        self.tree.column("youtube", width=80, anchor=tk.CENTER)
-
-        tree_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scroll.set)
-
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.bind("<<TreeviewSelect>>", self.on_select_record)
-
-        ttk.Label(form_frame, text="タイトル").pack(anchor=tk.W)
-        self.title_entry = ttk.Entry(form_frame)
-        self.title_entry.pack(fill=tk.X, pady=(0, 8))
-
-        ttk.Label(form_frame, text="日付（YYYY-MM-DD、省略可）").pack(anchor=tk.W)
-        self.date_entry = ttk.Entry(form_frame)
-        self.date_entry.pack(fill=tk.X, pady=(0, 10))
-
-        ttk.Label(form_frame, text="画像ファイル（public配下）").pack(anchor=tk.W)
-        image_entry_row = ttk.Frame(form_frame)
-        image_entry_row.pack(fill=tk.X, pady=(0, 6))
-
-        self.image_var = tk.StringVar(value="")
-        self.image_combo = ttk.Combobox(image_entry_row, textvariable=self.image_var)
-        self.image_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-        ttk.Button(image_entry_row, text="参照...", command=self.browse_image).pack(side=tk.LEFT, padx=(8, 0))
-        ttk.Button(image_entry_row, text="更新", command=self.refresh_image_candidates).pack(side=tk.LEFT, padx=(6, 0))
-        ttk.Button(image_entry_row, text="追加", command=self.add_image_from_input).pack(side=tk.LEFT, padx=(6, 0))
-
-        image_list_row = ttk.Frame(form_frame)
-        image_list_row.pack(fill=tk.X, pady=(0, 10))
-
-        self.image_listbox = tk.Listbox(image_list_row, height=4)
-        self.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        image_list_actions = ttk.Frame(image_list_row)
-        image_list_actions.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
-        ttk.Button(image_list_actions, text="削除", command=self.remove_selected_image).pack(fill=tk.X)
-        ttk.Button(image_list_actions, text="クリア", command=self.clear_images).pack(fill=tk.X, pady=(6, 0))
-
-        ttk.Label(form_frame, text="YouTube URL").pack(anchor=tk.W)
-        youtube_entry_row = ttk.Frame(form_frame)
-        youtube_entry_row.pack(fill=tk.X, pady=(0, 6))
-
-        self.youtube_var = tk.StringVar(value="")
-        self.youtube_entry = ttk.Entry(youtube_entry_row, textvariable=self.youtube_var)
-        self.youtube_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        ttk.Button(youtube_entry_row, text="追加", command=self.add_youtube_from_input).pack(side=tk.LEFT, padx=(8, 0))
-
-        youtube_list_row = ttk.Frame(form_frame)
-        youtube_list_row.pack(fill=tk.X, pady=(0, 10))
-
-        self.youtube_listbox = tk.Listbox(youtube_list_row, height=4)
-        self.youtube_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        youtube_list_actions = ttk.Frame(youtube_list_row)
-        youtube_list_actions.pack(side=tk.LEFT, padx=(8, 0), fill=tk.Y)
-        ttk.Button(youtube_list_actions, text="削除", command=self.remove_selected_youtube).pack(fill=tk.X)
-        ttk.Button(youtube_list_actions, text="クリア", command=self.clear_youtube).pack(fill=tk.X, pady=(6, 0))
-
-        ttk.Label(form_frame, text="説明").pack(anchor=tk.W)
-        self.description_text = tk.Text(form_frame, height=9, wrap=tk.WORD)
-        self.description_text.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
-
-        button_row = ttk.Frame(form_frame)
-        button_row.pack(fill=tk.X, pady=(0, 8))
-        ttk.Button(button_row, text="新規追加", command=self.add_record_from_form).pack(side=tk.LEFT)
-        ttk.Button(button_row, text="選択行を更新", command=self.update_selected_record).pack(side=tk.LEFT, padx=6)
-        ttk.Button(button_row, text="選択行を削除", command=self.delete_selected_record).pack(side=tk.LEFT, padx=6)
-        ttk.Button(button_row, text="入力クリア", command=self.clear_form).pack(side=tk.LEFT)
-
-        self.status_var = tk.StringVar(value="")
-        ttk.Label(form_frame, textvariable=self.status_var, foreground="#555").pack(anchor=tk.W)
-
-        self.refresh_image_candidates()
-
-    def refresh_records(self) -> None:
-        try:
-            self.records = load_records(self.data_file)
-            self.records.sort(key=lambda x: int(x["id"]))
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("読み込みエラー", str(exc))
+def iter_import_rows(input_file: Path) -> Iterator[tuple[int, Any, str]]:
+    """取り込みファイルを1行ずつ読み、(行番号, 値, エラー) を返す。"""
+    with input_file.open("r", encoding="utf-8-sig", newline="") as f:
+        if input_file.suffix.lower() == ".csv":
+            # 1行目はヘッダー
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield (line_no, csv_row_to_item(row), "")
             return
 
-        self.tree.delete(*self.tree.get_children())
-        for record in self.records:
-            self.tree.insert(
-                "",
-                tk.END,
-                iid=str(record["id"]),
-                values=(record["id"], record["title"], len(record.get("images", [])), len(record.get("youtubeUrls", []))),
-            )
-
-        self.status_var.set(f"件数: {len(self.records)}")
-
-    def refresh_image_candidates(self) -> None:
-        images = list_public_images(self.public_dir)
-        self.image_combo["values"] = images
-        if not self.image_var.get().strip() and images:
-            self.image_var.set(images[0])
-
-    def refresh_form_media_listboxes(self) -> None:
-        self.image_listbox.delete(0, tk.END)
-        for image in self.form_images:
-            self.image_listbox.insert(tk.END, image)
-
-        self.youtube_listbox.delete(0, tk.END)
-        for url in self.form_youtube_urls:
-            self.youtube_listbox.insert(tk.END, url)
-
-        self.status_var.set(f"編集中メディア: 画像 {len(self.form_images)} / 動画 {len(self.form_youtube_urls)}")
-
-    def add_image_reference(self, image_ref: str, show_messages: bool = True) -> bool:
-        normalized = normalize_image_reference(image_ref)
-        if not normalized:
-            if show_messages:
-                messagebox.showwarning("入力不足", "画像ファイル名を入力してください。")
-            return False
-
-        if not image_exists_in_public(self.public_dir, normalized):
-            if show_messages:
-                messagebox.showwarning(
-                    "画像が見つかりません",
-                    "指定した画像が public 配下に見つかりません。",
-                )
-            return False
-
-        if normalized in self.form_images:
-            if show_messages:
-                messagebox.showinfo("重複", "その画像はすでに追加されています。")
-            return False
-
-        self.form_images.append(normalized)
-        self.refresh_form_media_listboxes()
-        return True
+        for line_no, line in enumerate(f, start=1):
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                yield (line_no, json.loads(text), "")
+            except json.JSONDecodeError as exc:
+                yield (line_no, None, f"JSONの形式が不正です: {exc.msg}")
 
-    def add_image_from_input(self) -> None:
-        if self.add_image_reference(self.image_var.get()):
-            self.image_var.set("")
 
-    def resolve_or_copy_image_ref(self, selected: str) -> tuple[str | None, bool]:
-        selected_path = Path(selected).resolve()
-        public_root = self.public_dir.resolve()
+def build_import_record(item: Any, public_images: set[str]) -> tuple[dict[str, Any] | None, str]:
+    if not isinstance(item, dict):
+        return (None, "オブジェクトではありません。")
+
+    title = item.get("title").strip() if isinstance(item.get("title"), str) else ""
+    description = item.get("description").strip() if isinstance(item.get("description"), str) else ""
+    if not title:
+        return (None, "title は必須です。")
+    if not description:
+        return (None, "description は必須です。")
+
+    raw_images = normalize_str_list(item.get("images"))
+    if isinstance(item.get("image"), str):
+        raw_images.append(item["image"])
+    image_refs = unique_strings([normalize_image_reference(value) for value in raw_images])
+    for image_ref in image_refs:
+        if image_ref not in public_images:
+            return (None, f"画像 '{image_ref}' が public 配下に見つかりません。")
+
+    raw_urls = normalize_str_list(item.get("youtubeUrls"))
+    if isinstance(item.get("youtubeUrl"), str):
+        raw_urls.append(item["youtubeUrl"])
+    youtube_results = parse_youtube_urls(raw_urls)
+    for raw_url, result in zip(raw_urls, youtube_results):
+        if not result.embed_url:
+            return (None, f"YouTube URL '{raw_url}' の形式が不正です（{result.reason}）。")
+    youtube_urls = unique_strings([result.embed_url for result in youtube_results])
 
-        try:
-            image_ref = selected_path.relative_to(public_root).as_posix()
-            return (image_ref, False)
-        except ValueError:
-            target = safe_public_target(self.public_dir, selected_path.name)
-            try:
-                shutil.copy2(selected_path, target)
-            except Exception as exc:  # noqa: BLE001
-                messagebox.showerror("コピーエラー", f"画像のコピーに失敗しました:\n{exc}")
-                return (None, False)
-            image_ref = target.relative_to(self.public_dir).as_posix()
-            return (image_ref, True)
-
-    def browse_image(self) -> None:
-        selected_items = filedialog.askopenfilenames(
-            title="画像ファイルを選択（複数選択可）",
-            initialdir=str(self.public_dir),
-            filetypes=[
-                ("画像ファイル", "*.png *.jpg *.jpeg *.webp *.gif *.bmp *.svg *.avif"),
-                ("すべてのファイル", "*.*"),
-            ],
-        )
-        if not selected_items:
-            return
+    if not image_refs and not youtube_urls:
+        return (None, "images か youtubeUrls のどちらかを1件以上指定してください。")
 
-        added_count = 0
-        copied_refs: list[str] = []
-        skipped_count = 0
+    date = item.get("date")
+    return (
+        {
+            "title": title,
+            "date": str(date).strip() if date else "",
+            "description": description,
+            "images": image_refs,
+            "youtubeUrls": youtube_urls,
+        },
+        "",
+    )
 
-        for selected in selected_items:
-            image_ref, copied = self.resolve_or_copy_image_ref(selected)
-            if not image_ref:
-                skipped_count += 1
-                continue
 
-            if copied:
-                copied_refs.append(image_ref)
+def cmd_import(args: argparse.Namespace) -> int:
+    input_file: Path = args.input
+    if not input_file.exists():
+        print(f"エラー: {input_file} が見つかりません。")
+        return 1
 
-            if self.add_image_reference(image_ref, show_messages=False):
-                added_count += 1
-            else:
-                skipped_count += 1
+    revision = read_revision(args.data_file)
+    records = [] if args.journal else load_records(args.data_file)
+    public_images = set(list_public_images(PUBLIC_DIR))
 
-        if copied_refs:
-            max_display = 5
-            displayed = copied_refs[:max_display]
-            copied_text = "\n".join(f"public/{item}" for item in displayed)
-            if len(copied_refs) > max_display:
-                copied_text += f"\n... 他 {len(copied_refs) - max_display} 件"
-            messagebox.showinfo("画像をコピーしました", copied_text)
+    imported: list[dict[str, Any]] = []
+    errors: list[str] = []
+    for line_no, item, error in iter_import_rows(input_file):
+        record = None
+        if not error:
+            record, error = build_import_record(item, public_images)
+        if record is None:
+            errors.append(f"行 {line_no}: {error}")
+            continue
+        imported.append(record)
 
-        if added_count == 0:
-            messagebox.showinfo("追加なし", "追加できる画像がありませんでした。")
-        else:
-            suffix = f"（未追加 {skipped_count} 件）" if skipped_count > 0 else ""
-            self.status_var.set(f"画像を {added_count} 件追加しました{suffix}")
-
-        self.image_var.set("")
-        self.refresh_image_candidates()
-
-    def sync_git(self, commit_message: str, image_refs: list[str] | None = None) -> tuple[bool, str]:
-        paths: list[Path] = [self.data_file]
-        for image_ref in image_refs or []:
-            target = resolve_public_image_path(self.public_dir, image_ref)
-            if target and target.exists() and target.is_file():
-                paths.append(target)
-        return git_commit_and_push(paths, commit_message)
-
-    def remove_selected_image(self) -> None:
-        selected = self.image_listbox.curselection()
-        if not selected:
-            return
-        idx = selected[0]
-        del self.form_images[idx]
-        self.refresh_form_media_listboxes()
-
-    def clear_images(self) -> None:
-        self.form_images = []
-        self.refresh_form_media_listboxes()
-
-    def add_youtube_reference(self, value: str) -> bool:
-        normalized = normalize_youtube_url(value)
-        if not value.strip():
-            messagebox.showwarning("入力不足", "YouTube URL を入力してください。")
-            return False
-        if not normalized:
-            messagebox.showwarning("入力エラー", "YouTube URL の形式が不正です。")
-            return False
-        if normalized in self.form_youtube_urls:
-            messagebox.showinfo("重複", "そのYouTube URLはすでに追加されています。")
-            return False
-
-        self.form_youtube_urls.append(normalized)
-        self.refresh_form_media_listboxes()
-        return True
+    for message in errors:
+        print(f"エラー: {message}")
 
-    def add_youtube_from_input(self) -> None:
-        if self.add_youtube_reference(self.youtube_var.get()):
-            self.youtube_var.set("")
+    if not imported:
+        print("取り込めるレコードがありませんでした。")
+        return 1
 
-    def remove_selected_youtube(self) -> None:
-        selected = self.youtube_listbox.curselection()
-        if not selected:
-            return
-        idx = selected[0]
-        del self.form_youtube_urls[idx]
-        self.refresh_form_media_listboxes()
+    records_by_id = None if args.journal else {int(item["id"]): item for item in records}
+    record_ids = allocate_record_ids(args.data_file, records_by_id, len(imported))
+    imported = [{"id": record_id, **record} for record_id, record in zip(record_ids, imported)]
 
-    def clear_youtube(self) -> None:
-        self.form_youtube_urls = []
-        self.refresh_form_media_listboxes()
+    image_refs = unique_strings([image_ref for record in imported for image_ref in record["images"]])
+    if args.journal:
+        append_journal(args.data_file, [journal_put(record) for record in imported])
+    else:
+        save_cli_records(args, records + imported, {record["id"] for record in imported}, revision)
+    commit_paths = data_commit_paths(args.data_file) + [PUBLIC_DIR / image_ref for image_ref in image_refs]
+    id_range = f"{imported[0]['id']}-{imported[-1]['id']}"
+    print(f"{len(imported)} 件取り込みました: id={id_range}（エラー {len(errors)} 件）")
+    change = {"action": "import", "id": id_range, "title": f"{len(imported)} 件"}
+    commit_or_stage(args, change, commit_paths, f"import {len(imported)}")
+    return 1 if errors else 0
+
+
+def cmd_derive(args: argparse.Namespace) -> int:
+    if importlib.util.find_spec("PIL") is None:
+        print("エラー: 派生画像の生成には Pillow が必要です（pip install Pillow）。")
+        return 1
 
-    def on_select_record(self, _event: Any) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            return
+    manifest = load_image_manifest(IMAGE_MANIFEST_FILE)
+    unsupported: set[str] = set()
+    generated, skipped, errors = build_image_derivatives(
+        PUBLIC_DIR, manifest, collect_record_image_refs(load_records(args.data_file)), unsupported
+    )
+    save_image_manifest(IMAGE_MANIFEST_FILE, manifest)
+
+    for message in errors:
+        print(f"エラー: {message}")
+    for fmt in sorted(unsupported):
+        print(f"警告: {fmt} はこの環境の Pillow では書き出せないためスキップしました。")
+    print(f"派生画像: 生成 {len(generated)} 件 / 変更なし {len(skipped)} 件 / エラー {len(errors)} 件")
+
+    if generated:
+        commit_paths = [IMAGE_MANIFEST_FILE]
+        if (PUBLIC_DIR / DERIVED_DIR_NAME).exists():
+            commit_paths.append(PUBLIC_DIR / DERIVED_DIR_NAME)
+        git_ok, git_message = git_commit_and_push(commit_paths, "derive images")
+        if git_ok:
+            print(git_message)
+        else:
+            print(f"警告: {git_message}")
+    return 1 if errors else 0
 
-        selected_id = int(selected[0])
-        record = next((item for item in self.records if int(item["id"]) == selected_id), None)
-        if not record:
-            return
 
-        self.title_entry.delete(0, tk.END)
-        self.title_entry.insert(0, record["title"])
-
-        self.date_entry.delete(0, tk.END)
-        self.date_entry.insert(0, record.get("date", ""))
-
-        self.description_text.delete("1.0", tk.END)
-        self.description_text.insert("1.0", record["description"])
-
-        self.form_images = list(record.get("images", []))
-        self.form_youtube_urls = list(record.get("youtubeUrls", []))
-        self.refresh_form_media_listboxes()
-        self.status_var.set(f"選択中: id={selected_id}")
-
-    def clear_form(self) -> None:
-        self.title_entry.delete(0, tk.END)
-        self.date_entry.delete(0, tk.END)
-        self.image_var.set("")
-        self.youtube_var.set("")
-        self.description_text.delete("1.0", tk.END)
-        self.form_images = []
-        self.form_youtube_urls = []
-        self.refresh_form_media_listboxes()
-        self.tree.selection_remove(*self.tree.selection())
-        self.status_var.set("入力をクリアしました。")
-
-    def validate_form(self) -> tuple[str, str] | None:
-        title = self.title_entry.get().strip()
-        description = self.description_text.get("1.0", tk.END).strip()
-
-        if not title:
-            messagebox.showwarning("入力不足", "タイトルを入力してください。")
-            return None
-        if not description:
-            messagebox.showwarning("入力不足", "説明を入力してください。")
-            return None
-        if not self.form_images and not self.form_youtube_urls:
-            messagebox.showwarning("入力不足", "画像またはYouTubeを1件以上追加してください。")
-            return None
-
-        for image in self.form_images:
-            if not image_exists_in_public(self.public_dir, image):
-                messagebox.showwarning("画像が見つかりません", f"public/{image} が見つかりません。")
-                return None
-
-        return (title, description)
-
-    def build_record_from_form(self, record_id: int) -> dict[str, Any] | None:
-        validated = self.validate_form()
-        if validated is None:
-            return None
-
-        title, description = validated
-        date_val = self.date_entry.get().strip()
-        return {
-            "id": record_id,
-            "title": title,
-            "date": date_val,
-            "description": description,
-            "images": unique_strings(self.form_images),
-            "youtubeUrls": unique_strings(self.form_youtube_urls),
-        }
+def canonical_image_sort_key(image_ref: str) -> tuple[bool, int, str]:
+    # 「_1」などの衝突回避サフィックスが無く、短い名前を残す
+    stem = PurePosixPath(image_ref).stem
+    return (bool(DUPLICATE_SUFFIX_PATTERN.search(stem)), len(image_ref), image_ref)
 
-    def add_record_from_form(self) -> None:
-        record = self.build_record_from_form(next_id(self.records))
-        if record is None:
-            return
 
-        self.records.append(record)
-        save_records(self.data_file, self.records)
-        self.refresh_records()
-        self.tree.selection_set(str(record["id"]))
-        self.tree.focus(str(record["id"]))
-        git_ok, git_message = self.sync_git("add", record.get("images", []))
-        if git_ok:
-            self.status_var.set(f'追加しました: id={record["id"]} / {git_message}')
-        else:
-            self.status_var.set(f'追加しました: id={record["id"]} / Git未反映')
-            messagebox.showwarning("Git同期", git_message)
+def group_duplicate_images(public_dir: Path) -> list[list[str]]:
+    index = get_public_image_index(public_dir)
+    by_size: dict[int, list[str]] = {}
+    for image_ref, entry in index.files.items():
+        by_size.setdefault(int(entry["size"]), []).append(image_ref)
 
-    def update_selected_record(self) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("選択なし", "更新するレコードを選択してください。")
-            return
+    groups: list[list[str]] = []
+    for refs in by_size.values():
+        if len(refs) < 2:
+            continue
+        by_hash: dict[str, list[str]] = {}
+        for image_ref in refs:
+            content_hash = index.file_hash(image_ref)
+            if content_hash:
+                by_hash.setdefault(content_hash, []).append(image_ref)
+        groups.extend(sorted(group, key=canonical_image_sort_key) for group in by_hash.values() if len(group) > 1)
+    index.save()
+    return sorted(groups)
+
+
+def rewrite_image_refs(value: Any, mapping: dict[str, str]) -> tuple[Any, int]:
+    if isinstance(value, str):
+        image_ref = normalize_image_reference(value)
+        return (mapping[image_ref], 1) if image_ref in mapping else (value, 0)
+    if isinstance(value, list):
+        count = 0
+        items: list[Any] = []
+        for item in value:
+            rewritten, changed = rewrite_image_refs(item, mapping)
+            items.append(rewritten)
+            count += changed
+        # 書き換えで同じ参照が並んだ配列だけまとめる。tags などの重複は手を付けない
+        if count and all(isinstance(item, str) for item in items):
+            return (unique_strings(items), count)
+        return (items, count)
+    if isinstance(value, dict):
+        count = 0
+        result: dict[str, Any] = {}
+        for key, item in value.items():
+            result[key], changed = rewrite_image_refs(item, mapping)
+            count += changed
+        return (result, count)
+    return (value, 0)
+
+
+def rewrite_records_image_refs(data_file: Path, mapping: dict[str, str], dry_run: bool = False) -> int:
+    if not data_file.exists():
+        return 0
 
-        selected_id = int(selected[0])
-        record = self.build_record_from_form(selected_id)
-        if record is None:
-            return
+    revision = read_revision(data_file)
+    records = load_records(data_file)
+    rewritten, count = rewrite_image_refs(records, mapping)
+    changed_ids = {int(new["id"]) for old, new in zip(records, rewritten) if old != new}
+    # 通常の保存を通し、分割出力・最小化JSON・検索索引・リビジョンもまとめて更新する
+    if changed_ids and not dry_run:
+        save_records(data_file, rewritten, changed_ids, expected_revision=revision)
+    return count
 
-        replaced = False
-        for index, item in enumerate(self.records):
-            if int(item["id"]) == selected_id:
-                self.records[index] = record
-                replaced = True
-                break
 
-        if not replaced:
-            messagebox.showerror("更新エラー", f"id={selected_id} が見つかりません。")
-            return
+def rewrite_works_image_refs(data_file: Path, mapping: dict[str, str], dry_run: bool = False) -> int:
+    if not data_file.exists():
+        return 0
+
+    revision = read_revision(data_file)
+    works = load_works_data(data_file)
+    rewritten, count = rewrite_image_refs(works, mapping)
+    changed = {
+        (type_key, int(new["id"]))
+        for type_key, items in works.items()
+        for old, new in zip(items, rewritten[type_key])
+        if old != new
+    }
+    if changed and not dry_run:
+        save_works_data(data_file, rewritten, revision, changed)
+    return count
+
+
+def iter_json_image_refs(value: Any, location: str) -> Iterator[tuple[str, str]]:
+    """JSON 内の画像参照らしき文字列を (参照, 場所) で列挙する。場所は「ファイル名 タイプ id=N」の形。"""
+    if isinstance(value, str):
+        image_ref = normalize_image_reference(value)
+        if "://" not in image_ref and PurePosixPath(image_ref).suffix.lower() in IMAGE_EXTENSIONS:
+            yield (image_ref, location)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_json_image_refs(item, location)
+    elif isinstance(value, dict):
+        if "id" in value:
+            location = f"{location} id={value['id']}"
+        for key, item in value.items():
+            child_location = location if "id" in value or not isinstance(item, (list, dict)) else f"{location} {key}"
+            yield from iter_json_image_refs(item, child_location)
+
+
+def collect_data_image_refs(data_files: list[Path]) -> dict[str, list[str]]:
+    refs: dict[str, list[str]] = {}
+    for data_file in data_files:
+        if not data_file.exists():
+            continue
+        with data_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        for image_ref, location in iter_json_image_refs(data, data_file.name):
+            refs.setdefault(image_ref, []).append(location)
+    return refs
 
-        save_records(self.data_file, self.records)
-        self.refresh_records()
-        self.tree.selection_set(str(selected_id))
-        self.tree.focus(str(selected_id))
-        git_ok, git_message = self.sync_git("update", record.get("images", []))
-        if git_ok:
-            self.status_var.set(f"id={selected_id} を更新しました。 / {git_message}")
-        else:
-            self.status_var.set(f"id={selected_id} を更新しました。 / Git未反映")
-            messagebox.showwarning("Git同期", git_message)
 
-    def delete_selected_record(self) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("選択なし", "削除するレコードを選択してください。")
-            return
+def image_decodes(path: Path) -> bool:
+    if path.suffix.lower() not in VERIFY_DECODE_EXTENSIONS:
+        return True
+    if importlib.util.find_spec("PIL") is None:
+        return read_image_size(path) is not None
 
-        selected_id = int(selected[0])
-        target = next((item for item in self.records if int(item["id"]) == selected_id), None)
-        if not target:
-            messagebox.showerror("削除エラー", f"id={selected_id} が見つかりません。")
-            return
+    from PIL import Image
 
-        confirmed = messagebox.askyesno(
-            "確認",
-            f'id={selected_id}「{target["title"]}」を削除しますか？',
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except Exception:  # noqa: BLE001
+        return False
+    return True
+
+
+def verify_public_image(public_dir: Path, image_ref: str, max_bytes: int) -> str | None:
+    path = resolve_public_image_path(public_dir, image_ref)
+    if path is None:
+        return "public 配下を指していません"
+    if not path.is_file():
+        return "見つかりません"
+    size = path.stat().st_size
+    if size == 0:
+        return "0 バイトです"
+    if size > max_bytes:
+        return f"{format_bytes(size)} あり、上限 {format_bytes(max_bytes)} を超えています"
+    if not image_decodes(path):
+        return "画像として読み込めません（破損の可能性）"
+    return None
+
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    # concurrent.futures は logging ごと読み込まれて重いので、verify のときだけ読む
+    from concurrent.futures import ThreadPoolExecutor
+
+    refs = collect_data_image_refs([args.data_file, WORKS_DATA_FILE])
+    max_bytes = int(args.max_image_mb * 1024 * 1024)
+
+    with ThreadPoolExecutor() as executor:
+        problems = dict(
+            zip(refs, executor.map(lambda image_ref: verify_public_image(PUBLIC_DIR, image_ref, max_bytes), refs))
         )
-        if not confirmed:
-            return
 
-        self.records = [item for item in self.records if int(item["id"]) != selected_id]
-        save_records(self.data_file, self.records)
-        self.refresh_records()
-        self.clear_form()
-        git_ok, git_message = self.sync_git("delete")
-        if git_ok:
-            self.status_var.set(f"id={selected_id} を削除しました。 / {git_message}")
+    errors = 0
+    for image_ref, problem in sorted(problems.items()):
+        if problem is None:
+            continue
+        errors += 1
+        locations = ", ".join(refs[image_ref][:3])
+        more = f" ほか {len(refs[image_ref]) - 3} 件" if len(refs[image_ref]) > 3 else ""
+        print(f"エラー: public/{image_ref} が{problem}（{locations}{more}）")
+
+    source_text = read_frontend_sources(ROOT_DIR)
+    orphans = [
+        image_ref
+        for image_ref in sorted(set(list_public_images(PUBLIC_DIR)) - refs.keys())
+        if image_ref not in source_text
+    ]
+    for image_ref in orphans:
+        print(f"警告: 未参照の画像: public/{image_ref}")
+
+    print(f"検査: 参照画像 {len(refs)} 件 / エラー {errors} 件 / 未参照 {len(orphans)} 件")
+    return 1 if errors else 0
+
+
+def iter_frontend_source_files(root_dir: Path) -> Iterator[Path]:
+    for dir_name in FRONTEND_SOURCE_DIRS:
+        source_dir = root_dir / dir_name
+        if not source_dir.is_dir():
+            continue
+        for path in source_dir.rglob("*"):
+            if path.suffix.lower() in FRONTEND_SOURCE_EXTENSIONS and path.is_file():
+                yield path
+    for pattern in ("index.html", "*/index.html"):
+        yield from root_dir.glob(pattern)
+
+
+def read_frontend_sources(root_dir: Path) -> str:
+    return "\n".join(path.read_text(encoding="utf-8", errors="replace") for path in iter_frontend_source_files(root_dir))
+
+
+def find_unreachable_assets(
+    public_dir: Path, data_refs: set[str], source_text: str, manifest: dict[str, Any]
+) -> tuple[list[str], list[str], list[str]]:
+    """(未参照の画像, 不要になった派生画像, マニフェストから外すエントリ) を返す。
+
+    データから参照されていなくても、フロントエンドのソースにファイル名が現れる画像（アイコン等）は残す。
+    """
+    orphans = [
+        image_ref
+        for image_ref in list_public_images(public_dir)
+        if image_ref not in data_refs and image_ref not in source_text
+    ]
+    orphan_set = set(orphans)
+
+    kept_variants: set[str] = set()
+    dropped_entries: list[str] = []
+    for source_ref, entry in manifest["images"].items():
+        if source_ref in orphan_set or not (public_dir / source_ref).is_file():
+            dropped_entries.append(source_ref)
         else:
-            self.status_var.set(f"id={selected_id} を削除しました。 / Git未反映")
-            messagebox.showwarning("Git同期", git_message)
+            kept_variants.update(manifest_variant_paths(entry))
+
+    stale_variants: list[str] = []
+    derived_dir = public_dir / DERIVED_DIR_NAME
+    if derived_dir.is_dir():
+        for path in derived_dir.rglob("*"):
+            rel = path.relative_to(public_dir).as_posix()
+            if path.is_file() and rel not in kept_variants:
+                stale_variants.append(rel)
+    return (orphans, sorted(stale_variants), dropped_entries)
+
+
+def cmd_gc(args: argparse.Namespace) -> int:
+    records = load_records(args.data_file)
+    data_refs = {image_ref for image_ref, _ in iter_json_image_refs(records, args.data_file.name)}
+    data_refs.update(collect_data_image_refs([WORKS_DATA_FILE]))
+    manifest = load_image_manifest(IMAGE_MANIFEST_FILE)
+    orphans, stale_variants, dropped_entries = find_unreachable_assets(
+        PUBLIC_DIR, data_refs, read_frontend_sources(ROOT_DIR), manifest
+    )
+
+    removable = orphans + stale_variants
+    if not removable:
+        print("不要な画像はありません。")
+        return 0
+
+    total_bytes = 0
+    for image_ref in removable:
+        size = (PUBLIC_DIR / image_ref).stat().st_size
+        total_bytes += size
+        print(f"{format_bytes(size):>10}  public/{image_ref}")
+    print(f"未参照: 画像 {len(orphans)} 件 / 派生画像 {len(stale_variants)} 件 / 合計 {format_bytes(total_bytes)}")
+
+    if not args.apply:
+        print("削除するには --apply を付けて実行してください。")
+        return 0
+
+    for image_ref in removable:
+        (PUBLIC_DIR / image_ref).unlink()
+    commit_paths = [PUBLIC_DIR / image_ref for image_ref in removable]
+    if dropped_entries:
+        for source_ref in dropped_entries:
+            del manifest["images"][source_ref]
+        save_image_manifest(IMAGE_MANIFEST_FILE, manifest)
+        commit_paths.append(IMAGE_MANIFEST_FILE)
+    print(f"{len(removable)} 件を削除しました（{format_bytes(total_bytes)}）。")
+
+    git_ok, git_message = git_commit_and_push(commit_paths, f"gc: remove {len(removable)} unreferenced images")
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
+    return 0
+
+
+def cmd_dedupe(args: argparse.Namespace) -> int:
+    if journal_file_for(args.data_file).exists():
+        print("エラー: 未反映のジャーナルがあります。先に compact を実行してください。")
+        return 1
+
+    groups = group_duplicate_images(PUBLIC_DIR)
+    if not groups:
+        print("重複画像はありません。")
+        return 0
+
+    mapping = {duplicate: group[0] for group in groups for duplicate in group[1:]}
+    for group in groups:
+        print(f"public/{group[0]} <- {', '.join(group[1:])}")
+
+    reclaimed = sum((PUBLIC_DIR / duplicate).stat().st_size for duplicate in mapping)
+    rewritten = rewrite_records_image_refs(args.data_file, mapping, args.dry_run)
+    rewritten += rewrite_works_image_refs(WORKS_DATA_FILE, mapping, args.dry_run)
+    summary = f"重複画像 {len(mapping)} 件 / 参照の書き換え {rewritten} 件 / 削減 {format_bytes(reclaimed)}"
+    if args.dry_run:
+        print(f"{summary}（--dry-run のため変更していません）")
+        return 0
+
+    for duplicate in mapping:
+        (PUBLIC_DIR / duplicate).unlink()
+
+    commit_paths = (
+        data_commit_paths(args.data_file)
+        + works_commit_paths(WORKS_DATA_FILE)
+        + [PUBLIC_DIR / duplicate for duplicate in mapping]
+    )
+    if IMAGE_MANIFEST_FILE.exists():
+        manifest = load_image_manifest(IMAGE_MANIFEST_FILE)
+        # 同一内容なので派生画像は正規側のエントリと共有している
+        for duplicate in mapping:
+            manifest["images"].pop(duplicate, None)
+        save_image_manifest(IMAGE_MANIFEST_FILE, manifest)
+        commit_paths.append(IMAGE_MANIFEST_FILE)
+
+    git_ok, git_message = git_commit_and_push(commit_paths, "dedupe images")
+    print(summary)
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
+    return 0
+
+
+def cmd_shard(args: argparse.Namespace) -> int:
+    records = load_records(args.data_file)
+    written = write_record_shards(args.data_file, records)
+    shard_dir = shard_dir_for(args.data_file)
+    print(f"{shard_dir} に分割出力しました（{len(records)} 件 / 更新 {len(written)} ファイル）。")
+    if not written:
+        return 0
+
+    git_ok, git_message = git_commit_and_push([shard_dir], "shard records")
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    records = load_records(args.data_file)
+    artifacts = write_minified_artifacts(args.data_file, records)
+    artifacts += write_records_search_index(args.data_file, records)
+    print_size_report(args.data_file, artifacts)
+    git_ok, git_message = git_commit_and_push([path for path, _ in artifacts], "export minified records")
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
+    return 0
+
+
+def cmd_rollback(args: argparse.Namespace) -> int:
+    if args.revision is None:
+        print_snapshots(args.data_file)
+        return 0
 
+    try:
+        restored = normalize_records(read_snapshot(args.data_file, args.revision))
+    except FileNotFoundError:
+        print(f"エラー: リビジョン {args.revision} の版は残っていません。rollback だけで一覧を表示できます。")
+        return 1
+    except json.JSONDecodeError as exc:
+        print(f"エラー: リビジョン {args.revision} の版を読み込めません: {exc}")
+        return 1
+    if restored is None:
+        print(f"エラー: リビジョン {args.revision} の版は成長記録の形式ではありません。")
+        return 1
+
+    # 未反映のジャーナルを先に畳み込み、今の内容として版に残す。戻したこと自体も rollback で取り消せる
+    compact_records(args.data_file)
+    revision = save_records(args.data_file, restored)
+    print(f"リビジョン {args.revision} の内容に戻しました（{len(restored)} 件 / 新しいリビジョン {revision}）。")
+    change = {"action": "rollback", "title": f"revision {args.revision}"}
+    commit_or_stage(args, change, data_commit_paths(args.data_file), f"rollback records to revision {args.revision}")
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    # 正規化すると問題のある要素が落ちたり補われたりするので、読み込む前の JSON を検査する
+    try:
+        with args.data_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"エラー: {args.data_file} を読み込めません: {exc}")
+        return 1
+
+    report = validate_records(data)
+    save_validation_cache()
+    print_validation_report(report)
+    return 1 if report.errors else 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    # asyncio はサーバーを起動するときだけ読み込む
+    import asyncio
+
+    from homepage_tools.server import serve
+
+    try:
+        asyncio.run(serve(args.data_file, WORKS_DATA_FILE, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as exc:
+        print(f"エラー: サーバーを起動できません: {exc}")
+        return 1
+    print("サーバーを停止しました。未公開の変更は各ツールの publish コマンドで公開できます。")
+    return 0
+
+
+def run_gui(data_file: Path, journal: bool = False, stage: bool = False) -> int:
+    # Tk は GUI を開くときだけ読み込み、CLI コマンドの起動を軽くする
+    import tkinter as tk
+
+    from homepage_tools.records_gui import RecordsGui
 
-def run_gui(data_file: Path) -> int:
     root = tk.Tk()
-    RecordsGui(root, data_file)
+    RecordsGui(root, data_file, journal=journal, stage=stage)
     root.mainloop()
     return 0
 
@@ -875,7 +866,25 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "command",
         nargs="?",
-        choices=("gui", "list", "add", "delete"),
+        choices=(
+            "gui",
+            "list",
+            "add",
+            "delete",
+            "publish",
+            "compact",
+            "import",
+            "derive",
+            "dedupe",
+            "shard",
+            "export",
+            "search",
+            "verify",
+            "gc",
+            "serve",
+            "rollback",
+            "validate",
+        ),
         default="gui",
         help="実行コマンド（省略時: gui）",
     )
@@ -884,16 +893,67 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--image", action="append", default=[], help="画像ファイル名（public配下）: 複数指定可")
     parser.add_argument("--youtube", action="append", default=[], help="YouTube URL（watch/short/youtu.be対応）: 複数指定可")
     parser.add_argument("--id", type=int, help="削除対象ID")
+    parser.add_argument("--revision", type=int, help="rollback で戻すリビジョン（省略時は残っている版を一覧表示）")
+    parser.add_argument(
+        "--input",
+        type=Path,
+        help=f"import で読み込むファイル（.jsonl / .csv、CSVの複数値は '{IMPORT_LIST_SEPARATOR}' 区切り）",
+    )
+    parser.add_argument("--query", help="search で使う検索語（空白区切りで AND 検索）")
+    parser.add_argument(
+        "--max-image-mb",
+        type=float,
+        default=VERIFY_MAX_IMAGE_MB,
+        help=f"verify で許容する画像サイズの上限 MB（デフォルト: {VERIFY_MAX_IMAGE_MB}）",
+    )
+    parser.add_argument("--apply", action="store_true", help="gc で未参照の画像を実際に削除して commit/push する")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVE_PORT,
+        help=f"serve で待ち受ける localhost のポート（デフォルト: {SERVE_PORT}）",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="保存時に他のツールの保存と競合したら、最新のデータに今回の変更を重ねて保存する",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="dedupe 時に変更を書き込まず結果だけ表示する")
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="追加・更新・削除を操作ログに追記し、publish 実行時にまとめてJSONへ反映する（--stage を含む）",
+    )
+    parser.add_argument(
+        "--stage",
+        action="store_true",
+        help="変更ごとに commit/push せず、publish 実行時に1回の commit/push でまとめて公開する",
+    )
 
+    parser.add_argument("--git-timing", action="store_true", help="Git の各ステップの所要時間を表示する")
     return parser
 
 
 def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
+    try:
+        exit_code = run_command(parser, args)
+    except RevisionConflict as exc:
+        print(f"エラー: {exc} --merge を付けると、最新のデータに今回の変更を重ねて保存します。")
+        return 1
+    except (DataLockTimeout, DataMetaError, ValidationError) as exc:
+        print(f"エラー: {exc}")
+        return 1
+    if args.git_timing and GIT_SESSION.last_timings:
+        print(f"Git所要時間: {GIT_SESSION.timing_summary()}")
+    return exit_code
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
 
     if args.command == "gui":
-        return run_gui(args.data_file)
+        return run_gui(args.data_file, journal=args.journal, stage=args.stage)
     if args.command == "list":
         return cmd_list(args)
     if args.command == "add":
@@ -904,6 +964,33 @@ def main() -> int:
         if args.id is None:
             parser.error("delete には --id が必要です。")
         return cmd_delete(args)
+    if args.command in ("publish", "compact"):
+        return cmd_publish(args)
+    if args.command == "import":
+        if args.input is None:
+            parser.error("import には --input が必要です。")
+        return cmd_import(args)
+    if args.command == "derive":
+        return cmd_derive(args)
+    if args.command == "dedupe":
+        return cmd_dedupe(args)
+    if args.command == "shard":
+        return cmd_shard(args)
+    if args.command == "export":
+        return cmd_export(args)
+    if args.command == "search":
+        return cmd_search(args)
+    if args.command == "verify":
+        return cmd_verify(args)
+    if args.command == "gc":
+        return cmd_gc(args)
+
+    if args.command == "serve":
+        return cmd_serve(args)
+    if args.command == "rollback":
+        return cmd_rollback(args)
+    if args.command == "validate":
+        return cmd_validate(args)
 
     parser.error("不明なコマンドです。")
     return 1
@@ -7,1005 +7,220 @@ Usage:
   python scripts/shop_tool.py gui
   python scripts/shop_tool.py list
   python scripts/shop_tool.py list --type games
+  python scripts/shop_tool.py derive
+  python scripts/shop_tool.py gui --stage
+  python scripts/shop_tool.py publish
+  python scripts/shop_tool.py export
+  python scripts/shop_tool.py search --query パズル --type games
+  python scripts/shop_tool.py rollback
+  python scripts/shop_tool.py rollback --revision 12
+  python scripts/shop_tool.py validate
 """
 
 from __future__ import annotations
 
 import argparse
+import importlib.util
 import json
-import shutil
-import subprocess
 import sys
-import tkinter as tk
+import time
 from pathlib import Path
-from tkinter import filedialog, messagebox, ttk
-from typing import Any
-from urllib.parse import parse_qs, urlparse
 
+from homepage_tools.paths import PUBLIC_DIR, ROOT_DIR
+from homepage_tools.git import GIT_SESSION, git_commit_and_push
+from homepage_tools.staging import (
+    build_publish_message,
+    discard_pending_changes,
+    load_pending_changes,
+    pending_change_paths,
+)
+from homepage_tools.images import DERIVED_DIR_NAME
+from homepage_tools.derive import IMAGE_MANIFEST_FILE, build_image_derivatives, load_image_manifest, save_image_manifest
+from homepage_tools.locking import DataLockTimeout
+from homepage_tools.snapshots import print_snapshots, read_snapshot
+from homepage_tools.storage import DataMetaError, print_size_report, write_minified_artifacts
+from homepage_tools.validation import print_validation_report, save_validation_cache
+from homepage_tools.works import (
+    WORK_TYPE_INFO,
+    build_works_search_indexes,
+    collect_works_image_refs,
+    data_commit_paths,
+    load_works_data,
+    normalize_works_data,
+    save_works_data,
+    validate_works,
+    write_works_search_index,
+)
 
-def resolve_root_dir() -> Path:
-    if getattr(sys, "frozen", False):
-        exe_dir = Path(sys.executable).resolve().parent
-        if (exe_dir / "public").exists():
-            return exe_dir
-        if (exe_dir.parent / "public").exists():
-            return exe_dir.parent
-        return Path.cwd()
-    return Path(__file__).resolve().parents[1]
 
-
-ROOT_DIR = resolve_root_dir()
-PUBLIC_DIR = ROOT_DIR / "public"
 DEFAULT_DATA_FILE = ROOT_DIR / "public" / "works-data.json"
-IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".svg", ".avif"}
-YOUTUBE_EMBED_PREFIX = "https://www.youtube.com/embed/"
-
-WORK_TYPE_INFO: dict[str, dict[str, str]] = {
-    "games": {"label": "ゲーム", "kind": "game"},
-    "tools": {"label": "ツール", "kind": "tool"},
-    "modelAssets": {"label": "3Dアセット", "kind": "tool"},
-    "blenderAddons": {"label": "Blenderアドオン", "kind": "tool"},
-}
-
-COLOR_CLASS_OPTIONS = [
-    "from-cyan-400 to-blue-400",
-    "from-emerald-400 to-teal-400",
-    "from-blue-400 to-indigo-400",
-    "from-pink-400 to-rose-400",
-    "from-violet-400 to-purple-400",
-    "from-amber-400 to-orange-400",
-    "from-indigo-400 to-violet-400",
-    "from-green-400 to-emerald-400",
-    "from-rose-400 to-red-400",
-    "from-teal-400 to-cyan-400",
-]
-
-
-def run_git_command(git_root: Path, args: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(
-        ["git", "-C", str(git_root), *args],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-
-
-def find_git_root(start_dir: Path) -> Path | None:
-    result = subprocess.run(
-        ["git", "-C", str(start_dir), "rev-parse", "--show-toplevel"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    if result.returncode != 0:
-        return None
-
-    git_root_text = result.stdout.strip()
-    if not git_root_text:
-        return None
-
-    git_root = Path(git_root_text).resolve()
-    return git_root if git_root.exists() else None
-
-
-def format_git_failure(prefix: str, result: subprocess.CompletedProcess[str]) -> str:
-    details = (result.stderr or result.stdout or "").strip()
-    return f"{prefix}: {details}" if details else prefix
-
-
-def git_commit_and_push(paths: list[Path], commit_message: str) -> tuple[bool, str]:
-    git_root = find_git_root(ROOT_DIR)
-    if git_root is None:
-        return (False, "Gitリポジトリが見つかりません。")
-
-    relative_paths: list[str] = []
-    seen: set[str] = set()
-    for path in paths:
-        resolved = path.resolve()
-        try:
-            rel = resolved.relative_to(git_root).as_posix()
-        except ValueError:
-            continue
-
-        if rel in seen:
-            continue
-        seen.add(rel)
-        relative_paths.append(rel)
-
-    if not relative_paths:
-        return (False, "コミット対象のファイルが見つかりません。")
-
-    add_result = run_git_command(git_root, ["add", "--", *relative_paths])
-    if add_result.returncode != 0:
-        return (False, format_git_failure("git add に失敗しました", add_result))
-
-    diff_result = run_git_command(git_root, ["diff", "--cached", "--quiet", "--", *relative_paths])
-    if diff_result.returncode == 0:
-        return (False, "コミット対象に変更がありません。")
-    if diff_result.returncode != 1:
-        return (False, format_git_failure("差分確認に失敗しました", diff_result))
-
-    commit_result = run_git_command(git_root, ["commit", "-m", commit_message, "--", *relative_paths])
-    if commit_result.returncode != 0:
-        return (False, format_git_failure("git commit に失敗しました", commit_result))
-
-    push_result = run_git_command(git_root, ["push"])
-    if push_result.returncode != 0:
-        return (False, format_git_failure("git push に失敗しました", push_result))
-
-    return (True, f"Git commit/push 完了: {commit_message}")
-
-
-def unique_strings(values: list[str]) -> list[str]:
-    result: list[str] = []
-    seen: set[str] = set()
-    for value in values:
-        text = value.strip()
-        if not text or text in seen:
-            continue
-        seen.add(text)
-        result.append(text)
-    return result
-
-
-def to_text(value: Any, fallback: str = "") -> str:
-    return value.strip() if isinstance(value, str) else fallback
-
-
-def to_number(value: Any, fallback: float = 0) -> float:
-    if isinstance(value, (int, float)):
-        return float(value)
-    return fallback
-
-
-def to_bool(value: Any, fallback: bool = False) -> bool:
-    return bool(value) if isinstance(value, bool) else fallback
-
-
-def to_string_list(value: Any) -> list[str]:
-    if not isinstance(value, list):
-        return []
-    return [to_text(item) for item in value if isinstance(item, str) and to_text(item)]
-
-
-def split_lines(value: str) -> list[str]:
-    values: list[str] = []
-    for line in value.splitlines():
-        for chunk in line.split(","):
-            text = chunk.strip()
-            if text:
-                values.append(text)
-    return unique_strings(values)
-
-
-def normalize_image_reference(value: str) -> str:
-    return value.strip().replace("\\", "/").lstrip("/")
-
-
-def resolve_public_image_path(public_dir: Path, image_ref: str) -> Path | None:
-    normalized = normalize_image_reference(image_ref)
-    if not normalized:
-        return None
-
-    target = (public_dir / normalized).resolve()
-    try:
-        target.relative_to(public_dir.resolve())
-    except ValueError:
-        return None
-
-    return target
-
-
-def is_image_file(path: Path) -> bool:
-    return path.suffix.lower() in IMAGE_EXTENSIONS
-
-
-def list_public_images(public_dir: Path) -> list[str]:
-    if not public_dir.exists():
-        return []
-    files = [p.relative_to(public_dir).as_posix() for p in public_dir.rglob("*") if p.is_file() and is_image_file(p)]
-    return sorted(files)
-
-
-def safe_public_target(public_dir: Path, source_name: str) -> Path:
-    candidate = public_dir / source_name
-    if not candidate.exists():
-        return candidate
-
-    stem = candidate.stem
-    suffix = candidate.suffix
-    counter = 1
-    while True:
-        next_candidate = public_dir / f"{stem}_{counter}{suffix}"
-        if not next_candidate.exists():
-            return next_candidate
-        counter += 1
-
-
-def normalize_youtube_url(value: str) -> str:
-    raw = value.strip()
-    if not raw:
-        return ""
-
-    if raw.startswith(YOUTUBE_EMBED_PREFIX):
-        video_id = raw.replace(YOUTUBE_EMBED_PREFIX, "").split("?")[0].strip("/")
-        return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    try:
-        parsed = urlparse(raw)
-    except ValueError:
-        return ""
-
-    host = parsed.netloc.lower().replace("www.", "")
-    path = parsed.path.strip("/")
-
-    if host == "youtu.be":
-        video_id = path.split("/")[0] if path else ""
-        return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    if host in {"youtube.com", "m.youtube.com"}:
-        if parsed.path == "/watch":
-            query = parse_qs(parsed.query)
-            video_id = query.get("v", [""])[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-        if parsed.path.startswith("/embed/"):
-            video_id = path.replace("embed/", "").split("/")[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-        if parsed.path.startswith("/shorts/"):
-            video_id = path.replace("shorts/", "").split("/")[0]
-            return f"{YOUTUBE_EMBED_PREFIX}{video_id}" if video_id else ""
-
-    return ""
 
 
-def blank_works_data() -> dict[str, list[dict[str, Any]]]:
-    return {key: [] for key in WORK_TYPE_INFO}
+def run_gui(data_file: Path, stage: bool = False) -> int:
+    # Tk は GUI を開くときだけ読み込み、CLI コマンドの起動を軽くする
+    import tkinter as tk
 
+    from homepage_tools.shop_gui import ShopGui
 
-def normalize_game_item(item: Any) -> dict[str, Any] | None:
-    if not isinstance(item, dict):
-        return None
-    item_id = int(to_number(item.get("id"), 0))
-    if item_id <= 0:
-        return None
-
-    trailer_urls = to_string_list(item.get("trailerUrls"))
-    legacy_trailer = to_text(item.get("trailerUrl"))
-    if not trailer_urls and legacy_trailer:
-        trailer_urls = [legacy_trailer]
-    trailer_urls = unique_strings([normalize_youtube_url(url) for url in trailer_urls if normalize_youtube_url(url)])
-
-    return {
-        "id": item_id,
-        "title": to_text(item.get("title")),
-        "description": to_text(item.get("description")),
-        "category": to_text(item.get("category")),
-        "rating": float(to_number(item.get("rating"), 0)),
-        "price": int(to_number(item.get("price"), 0)),
-        "image": to_text(item.get("image"), "🎮"),
-        "tags": unique_strings(to_string_list(item.get("tags"))),
-        "color": to_text(item.get("color"), "from-cyan-400 to-blue-400"),
-        "boothUrl": to_text(item.get("boothUrl"), "https://booth.pm/"),
-        "trailerUrls": trailer_urls,
-        "screenshots": unique_strings(to_string_list(item.get("screenshots"))),
-        "inDevelopment": to_bool(item.get("inDevelopment"), False),
-        "showPriceStatus": to_bool(item.get("showPriceStatus"), False),
-    }
-
-
-def normalize_tool_item(item: Any) -> dict[str, Any] | None:
-    if not isinstance(item, dict):
-        return None
-    item_id = int(to_number(item.get("id"), 0))
-    if item_id <= 0:
-        return None
-
-    trailer_urls = to_string_list(item.get("trailerUrls"))
-    legacy_trailer = to_text(item.get("trailerUrl"))
-    if not trailer_urls and legacy_trailer:
-        trailer_urls = [legacy_trailer]
-    trailer_urls = unique_strings([normalize_youtube_url(url) for url in trailer_urls if normalize_youtube_url(url)])
-
-    return {
-        "id": item_id,
-        "title": to_text(item.get("title")),
-        "description": to_text(item.get("description")),
-        "category": to_text(item.get("category")),
-        "price": int(to_number(item.get("price"), 0)),
-        "icon": to_text(item.get("icon"), "🛠️"),
-        "features": unique_strings(to_string_list(item.get("features"))),
-        "color": to_text(item.get("color"), "from-cyan-400 to-blue-400"),
-        "boothUrl": to_text(item.get("boothUrl"), "https://booth.pm/"),
-        "trailerUrls": trailer_urls,
-        "screenshots": unique_strings(to_string_list(item.get("screenshots"))),
-        "isNew": to_bool(item.get("isNew"), False),
-        "inDevelopment": to_bool(item.get("inDevelopment"), False),
-        "showPriceStatus": to_bool(item.get("showPriceStatus"), False),
-    }
+    root = tk.Tk()
+    ShopGui(root, data_file, stage=stage)
+    root.mainloop()
+    return 0
 
 
-def normalize_works_data(data: Any) -> dict[str, list[dict[str, Any]]]:
-    normalized = blank_works_data()
-    if not isinstance(data, dict):
-        return normalized
+def cmd_list(args: argparse.Namespace) -> int:
+    works = load_works_data(args.data_file)
+    if args.type:
+        type_key = args.type
+        if type_key not in WORK_TYPE_INFO:
+            print(f"未対応タイプ: {type_key}")
+            return 1
+        print(f"[{type_key}] {WORK_TYPE_INFO[type_key]['label']}")
+        for row in works[type_key]:
+            print(f'  id={row["id"]} | {row["title"]} | JPY {row["price"]}')
+        return 0
 
     for type_key, info in WORK_TYPE_INFO.items():
-        rows = data.get(type_key)
-        if not isinstance(rows, list):
-            continue
-        if info["kind"] == "game":
-            items = [normalize_game_item(item) for item in rows]
-        else:
-            items = [normalize_tool_item(item) for item in rows]
-        normalized[type_key] = [item for item in items if item is not None]
-        normalized[type_key].sort(key=lambda x: int(x["id"]))
-
-    return normalized
-
-
-def load_works_data(data_file: Path) -> dict[str, list[dict[str, Any]]]:
-    if not data_file.exists():
-        return blank_works_data()
-
-    with data_file.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    return normalize_works_data(data)
-
-
-def save_works_data(data_file: Path, data: dict[str, list[dict[str, Any]]]) -> None:
-    normalized = normalize_works_data(data)
-    data_file.parent.mkdir(parents=True, exist_ok=True)
-    with data_file.open("w", encoding="utf-8") as f:
-        json.dump(normalized, f, ensure_ascii=False, indent=2)
-        f.write("\n")
+        print(f"{type_key:14} {info['label']:12} {len(works[type_key])}件")
+    return 0
 
 
-def next_id(items: list[dict[str, Any]]) -> int:
-    if not items:
+def cmd_search(args: argparse.Namespace) -> int:
+    query = (args.query or "").strip()
+    if not query:
+        print("エラー: search には --query が必要です。")
         return 1
-    return max(int(item["id"]) for item in items) + 1
-
-
-class ShopGui:
-    def __init__(self, root: tk.Tk, data_file: Path):
-        self.root = root
-        self.data_file = data_file
-        self.public_dir = PUBLIC_DIR
-        self.works_data = load_works_data(data_file)
-        self.public_images: list[str] = []
-        self.form_trailer_urls: list[str] = []
-        self.form_screenshots: list[str] = []
-
-        self.root.title("SHOPデータ管理")
-        self.root.geometry("1280x780")
-        self.root.minsize(1080, 680)
-
-        self.type_label_to_key = {info["label"]: key for key, info in WORK_TYPE_INFO.items()}
-        self.type_labels = [info["label"] for info in WORK_TYPE_INFO.values()]
-
-        self._build_ui()
-        self.refresh_public_images()
-        self.refresh_list()
-
-    def _build_ui(self) -> None:
-        wrapper = ttk.Frame(self.root, padding=12)
-        wrapper.pack(fill=tk.BOTH, expand=True)
-
-        top = ttk.Frame(wrapper)
-        top.pack(fill=tk.X, pady=(0, 10))
-        ttk.Label(top, text="データファイル:").pack(side=tk.LEFT)
-        ttk.Label(top, text=str(self.data_file), foreground="#555").pack(side=tk.LEFT, padx=(6, 0))
-        ttk.Button(top, text="再読み込み", command=self.reload_data).pack(side=tk.RIGHT)
-
-        type_row = ttk.Frame(wrapper)
-        type_row.pack(fill=tk.X, pady=(0, 10))
-        ttk.Label(type_row, text="タイプ").pack(side=tk.LEFT)
-        self.type_var = tk.StringVar(value=self.type_labels[0])
-        self.type_combo = ttk.Combobox(type_row, state="readonly", textvariable=self.type_var, values=self.type_labels, width=16)
-        self.type_combo.pack(side=tk.LEFT, padx=(8, 0))
-        self.type_combo.bind("<<ComboboxSelected>>", self.on_type_change)
-
-        main = ttk.Panedwindow(wrapper, orient=tk.HORIZONTAL)
-        main.pack(fill=tk.BOTH, expand=True)
-
-        left = ttk.Frame(main, padding=8)
-        right = ttk.Frame(main, padding=8)
-        main.add(left, weight=3)
-        main.add(right, weight=2)
-
-        self.tree = ttk.Treeview(left, columns=("id", "title", "price", "media"), show="headings", height=24)
-        self.tree.heading("id", text="ID")
-        self.tree.heading("title", text="タイトル")
-        self.tree.heading("price", text="価格")
-        self.tree.heading("media", text="メディア")
-        self.tree.column("id", width=60, anchor=tk.CENTER)
-        self.tree.column("title", width=300, anchor=tk.W)
-        self.tree.column("price", width=90, anchor=tk.E)
-        self.tree.column("media", width=120, anchor=tk.CENTER)
-
-        tree_scroll = ttk.Scrollbar(left, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=tree_scroll.set)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        tree_scroll.pack(side=tk.LEFT, fill=tk.Y)
-        self.tree.bind("<<TreeviewSelect>>", self.on_select_row)
-
-        form = right
-
-        ttk.Label(form, text="タイトル").pack(anchor=tk.W)
-        self.title_entry = ttk.Entry(form)
-        self.title_entry.pack(fill=tk.X, pady=(0, 8))
-
-        ttk.Label(form, text="カテゴリ表示名").pack(anchor=tk.W)
-        self.category_entry = ttk.Entry(form)
-        self.category_entry.pack(fill=tk.X, pady=(0, 8))
-
-        common_row = ttk.Frame(form)
-        common_row.pack(fill=tk.X, pady=(0, 8))
-        ttk.Label(common_row, text="価格").pack(side=tk.LEFT)
-        self.price_entry = ttk.Entry(common_row, width=10)
-        self.price_entry.pack(side=tk.LEFT, padx=(6, 16))
-
-        ttk.Label(common_row, text="色クラス").pack(side=tk.LEFT)
-        self.color_var = tk.StringVar(value=COLOR_CLASS_OPTIONS[0])
-        self.color_combo = ttk.Combobox(
-            common_row,
-            state="readonly",
-            textvariable=self.color_var,
-            values=COLOR_CLASS_OPTIONS,
-        )
-        self.color_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
-
-        ttk.Label(form, text="BOOTH URL").pack(anchor=tk.W)
-        self.booth_url_entry = ttk.Entry(form)
-        self.booth_url_entry.pack(fill=tk.X, pady=(0, 8))
 
-        self.main_visual_label_var = tk.StringVar(value="画像/アイコン")
-        ttk.Label(form, textvariable=self.main_visual_label_var).pack(anchor=tk.W)
-        self.main_visual_entry = ttk.Entry(form)
-        self.main_visual_entry.pack(fill=tk.X, pady=(0, 8))
-
-        extra_row = ttk.Frame(form)
-        extra_row.pack(fill=tk.X, pady=(0, 8))
-        self.rating_label = ttk.Label(extra_row, text="評価")
-        self.rating_label.pack(side=tk.LEFT)
-        self.rating_entry = ttk.Entry(extra_row, width=10)
-        self.rating_entry.pack(side=tk.LEFT, padx=(6, 16))
-
-        self.in_development_var = tk.BooleanVar(value=False)
-        self.in_development_check = ttk.Checkbutton(extra_row, text="開発中", variable=self.in_development_var)
-        self.in_development_check.pack(side=tk.LEFT, padx=(0, 12))
-
-        self.show_price_status_var = tk.BooleanVar(value=False)
-        self.show_price_status_check = ttk.Checkbutton(
-            extra_row,
-            text="価格欄に「非販売」を表示",
-            variable=self.show_price_status_var,
-        )
-        self.show_price_status_check.pack(side=tk.LEFT, padx=(0, 12))
-
-        self.is_new_var = tk.BooleanVar(value=False)
-        self.is_new_check = ttk.Checkbutton(extra_row, text="NEW", variable=self.is_new_var)
-        self.is_new_check.pack(side=tk.LEFT)
-
-        self.extra_list_label_var = tk.StringVar(value="タグ/機能（改行区切り）")
-        ttk.Label(form, textvariable=self.extra_list_label_var).pack(anchor=tk.W)
-        self.extra_list_text = tk.Text(form, height=4, wrap=tk.WORD)
-        self.extra_list_text.pack(fill=tk.X, pady=(0, 8))
-
-        ttk.Label(form, text="説明").pack(anchor=tk.W)
-        self.description_text = tk.Text(form, height=5, wrap=tk.WORD)
-        self.description_text.pack(fill=tk.X, pady=(0, 8))
-
-        trailer_entry_row = ttk.Frame(form)
-        trailer_entry_row.pack(fill=tk.X)
-        ttk.Label(trailer_entry_row, text="YouTube URL").pack(side=tk.LEFT)
-        self.trailer_input_var = tk.StringVar(value="")
-        self.trailer_input = ttk.Entry(trailer_entry_row, textvariable=self.trailer_input_var)
-        self.trailer_input.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
-        ttk.Button(trailer_entry_row, text="追加", command=self.add_trailer_url).pack(side=tk.LEFT, padx=(8, 0))
-
-        trailer_list_row = ttk.Frame(form)
-        trailer_list_row.pack(fill=tk.X, pady=(4, 8))
-        self.trailer_listbox = tk.Listbox(trailer_list_row, height=3)
-        self.trailer_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        trailer_actions = ttk.Frame(trailer_list_row)
-        trailer_actions.pack(side=tk.LEFT, padx=(8, 0))
-        ttk.Button(trailer_actions, text="削除", command=self.remove_trailer_url).pack(fill=tk.X)
-        ttk.Button(trailer_actions, text="クリア", command=self.clear_trailer_urls).pack(fill=tk.X, pady=(6, 0))
-
-        screenshot_entry_row = ttk.Frame(form)
-        screenshot_entry_row.pack(fill=tk.X)
-        ttk.Label(screenshot_entry_row, text="スクショ/画像").pack(side=tk.LEFT)
-        self.screenshot_input_var = tk.StringVar(value="")
-        self.screenshot_input = ttk.Combobox(screenshot_entry_row, textvariable=self.screenshot_input_var)
-        self.screenshot_input.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
-        ttk.Button(screenshot_entry_row, text="参照...", command=self.browse_screenshot).pack(side=tk.LEFT, padx=(8, 0))
-        ttk.Button(screenshot_entry_row, text="追加", command=self.add_screenshot).pack(side=tk.LEFT, padx=(6, 0))
-
-        screenshot_list_row = ttk.Frame(form)
-        screenshot_list_row.pack(fill=tk.X, pady=(4, 8))
-        self.screenshot_listbox = tk.Listbox(screenshot_list_row, height=3)
-        self.screenshot_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        screenshot_actions = ttk.Frame(screenshot_list_row)
-        screenshot_actions.pack(side=tk.LEFT, padx=(8, 0))
-        ttk.Button(screenshot_actions, text="削除", command=self.remove_screenshot).pack(fill=tk.X)
-        ttk.Button(screenshot_actions, text="クリア", command=self.clear_screenshots).pack(fill=tk.X, pady=(6, 0))
-
-        button_row = ttk.Frame(form)
-        button_row.pack(fill=tk.X, pady=(8, 4))
-        ttk.Button(button_row, text="新規追加", command=self.add_item).pack(side=tk.LEFT)
-        ttk.Button(button_row, text="選択行を更新", command=self.update_item).pack(side=tk.LEFT, padx=6)
-        ttk.Button(button_row, text="選択行を削除", command=self.delete_item).pack(side=tk.LEFT, padx=6)
-        ttk.Button(button_row, text="入力クリア", command=self.clear_form).pack(side=tk.LEFT, padx=6)
-
-        self.status_var = tk.StringVar(value="")
-        ttk.Label(form, textvariable=self.status_var, foreground="#555").pack(anchor=tk.W, pady=(2, 0))
-
-        self.update_dynamic_labels()
-
-    def sync_git(self, commit_message: str, image_refs: list[str] | None = None) -> tuple[bool, str]:
-        paths: list[Path] = [self.data_file]
-        for image_ref in image_refs or []:
-            target = resolve_public_image_path(self.public_dir, image_ref)
-            if target and target.exists() and target.is_file():
-                paths.append(target)
-        return git_commit_and_push(paths, commit_message)
-
-    def collect_commit_image_refs(self, item: dict[str, Any]) -> list[str]:
-        refs: list[str] = []
-
-        if self.is_game_type():
-            main_visual = item.get("image")
-        else:
-            main_visual = item.get("icon")
-        if isinstance(main_visual, str):
-            refs.append(main_visual)
-
-        screenshots = item.get("screenshots")
-        if isinstance(screenshots, list):
-            refs.extend(value for value in screenshots if isinstance(value, str))
-
-        return unique_strings(refs)
-
-    def reload_data(self) -> None:
-        self.works_data = load_works_data(self.data_file)
-        self.refresh_list()
-        self.status_var.set("再読み込みしました。")
-
-    def get_selected_type_key(self) -> str:
-        label = self.type_var.get()
-        return self.type_label_to_key.get(label, "games")
-
-    def is_game_type(self) -> bool:
-        type_key = self.get_selected_type_key()
-        return WORK_TYPE_INFO[type_key]["kind"] == "game"
-
-    def update_dynamic_labels(self) -> None:
-        if self.is_game_type():
-            self.main_visual_label_var.set("ゲーム画像/絵文字")
-            self.extra_list_label_var.set("タグ（改行区切り）")
-            self.rating_entry.configure(state="normal")
-            self.rating_label.configure(foreground="")
-            self.is_new_var.set(False)
-            self.is_new_check.configure(state="disabled")
-        else:
-            self.main_visual_label_var.set("アイコン/絵文字")
-            self.extra_list_label_var.set("機能（改行区切り）")
-            self.rating_entry.configure(state="disabled")
-            self.rating_label.configure(foreground="#888")
-            self.is_new_check.configure(state="normal")
-
-    def on_type_change(self, _event: Any = None) -> None:
-        self.update_dynamic_labels()
-        self.refresh_list()
-        self.clear_form()
-
-    def refresh_public_images(self) -> None:
-        self.public_images = list_public_images(self.public_dir)
-        self.screenshot_input["values"] = self.public_images
-
-    def refresh_list(self) -> None:
-        type_key = self.get_selected_type_key()
-        items = self.works_data.get(type_key, [])
-
-        self.tree.delete(*self.tree.get_children())
-        for item in sorted(items, key=lambda x: int(x["id"])):
-            media = f"V{len(item.get('trailerUrls', []))} / S{len(item.get('screenshots', []))}"
-            if self.is_item_in_development(item):
-                media = f"{media} / 開発中"
-            if self.is_item_show_price_status(item):
-                media = f"{media} / 非販売"
-            self.tree.insert(
-                "",
-                tk.END,
-                iid=str(item["id"]),
-                values=(item["id"], item.get("title", ""), item.get("price", 0), media),
-            )
-
-        info = WORK_TYPE_INFO[type_key]["label"]
-        self.status_var.set(f"{info}: {len(items)}件")
-
-    def refresh_media_listboxes(self) -> None:
-        self.trailer_listbox.delete(0, tk.END)
-        for value in self.form_trailer_urls:
-            self.trailer_listbox.insert(tk.END, value)
-
-        self.screenshot_listbox.delete(0, tk.END)
-        for value in self.form_screenshots:
-            self.screenshot_listbox.insert(tk.END, value)
-
-    def set_color_value(self, color: str) -> None:
-        color_text = color.strip()
-        if not color_text:
-            self.color_var.set(COLOR_CLASS_OPTIONS[0])
-            return
-
-        values = list(self.color_combo.cget("values"))
-        if color_text not in values:
-            values.append(color_text)
-            self.color_combo.configure(values=values)
-        self.color_var.set(color_text)
-
-    def is_item_in_development(self, item: dict[str, Any]) -> bool:
-        return bool(item.get("inDevelopment", False))
-
-    def is_item_show_price_status(self, item: dict[str, Any]) -> bool:
-        return bool(item.get("showPriceStatus", False))
-
-    def on_select_row(self, _event: Any = None) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            return
-        item_id = int(selected[0])
-        type_key = self.get_selected_type_key()
-        item = next((row for row in self.works_data.get(type_key, []) if int(row["id"]) == item_id), None)
-        if item is None:
-            return
-
-        self.title_entry.delete(0, tk.END)
-        self.title_entry.insert(0, item.get("title", ""))
-
-        self.category_entry.delete(0, tk.END)
-        self.category_entry.insert(0, item.get("category", ""))
-
-        self.price_entry.delete(0, tk.END)
-        self.price_entry.insert(0, str(item.get("price", 0)))
-
-        self.set_color_value(item.get("color", ""))
-
-        self.booth_url_entry.delete(0, tk.END)
-        self.booth_url_entry.insert(0, item.get("boothUrl", ""))
-
-        self.main_visual_entry.delete(0, tk.END)
-        if self.is_game_type():
-            self.main_visual_entry.insert(0, item.get("image", ""))
-            self.rating_entry.configure(state="normal")
-            self.rating_entry.delete(0, tk.END)
-            self.rating_entry.insert(0, str(item.get("rating", 0)))
-            self.rating_entry.configure(state="normal")
-            self.is_new_var.set(False)
-            extra_values = item.get("tags", [])
-        else:
-            self.main_visual_entry.insert(0, item.get("icon", ""))
-            self.rating_entry.configure(state="normal")
-            self.rating_entry.delete(0, tk.END)
-            self.rating_entry.configure(state="disabled")
-            self.is_new_var.set(bool(item.get("isNew", False)))
-            extra_values = item.get("features", [])
-
-        self.extra_list_text.delete("1.0", tk.END)
-        self.extra_list_text.insert("1.0", "\n".join(extra_values if isinstance(extra_values, list) else []))
-
-        self.description_text.delete("1.0", tk.END)
-        self.description_text.insert("1.0", item.get("description", ""))
-        self.in_development_var.set(self.is_item_in_development(item))
-        self.show_price_status_var.set(self.is_item_show_price_status(item))
-
-        self.form_trailer_urls = list(item.get("trailerUrls", []))
-        self.form_screenshots = list(item.get("screenshots", []))
-        self.refresh_media_listboxes()
-        self.status_var.set(f"選択中: id={item_id}")
-
-    def clear_form(self) -> None:
-        self.title_entry.delete(0, tk.END)
-        self.category_entry.delete(0, tk.END)
-        self.price_entry.delete(0, tk.END)
-        self.price_entry.insert(0, "0")
-        self.set_color_value(COLOR_CLASS_OPTIONS[0])
-        self.booth_url_entry.delete(0, tk.END)
-        self.booth_url_entry.insert(0, "https://booth.pm/")
-        self.main_visual_entry.delete(0, tk.END)
-        self.rating_entry.configure(state="normal")
-        self.rating_entry.delete(0, tk.END)
-        if not self.is_game_type():
-            self.rating_entry.configure(state="disabled")
-        self.is_new_var.set(False)
-        self.in_development_var.set(False)
-        self.show_price_status_var.set(False)
-        self.extra_list_text.delete("1.0", tk.END)
-        self.description_text.delete("1.0", tk.END)
-        self.trailer_input_var.set("")
-        self.screenshot_input_var.set("")
-        self.form_trailer_urls = []
-        self.form_screenshots = []
-        self.refresh_media_listboxes()
-        self.tree.selection_remove(*self.tree.selection())
-
-    def _parse_price(self) -> int | None:
-        raw = self.price_entry.get().strip()
-        if not raw:
-            return 0
-        try:
-            return int(raw)
-        except ValueError:
-            messagebox.showwarning("入力エラー", "価格は整数で入力してください。")
-            return None
-
-    def _parse_rating(self) -> float | None:
-        raw = self.rating_entry.get().strip()
-        if not raw:
-            return 0.0
-        try:
-            return float(raw)
-        except ValueError:
-            messagebox.showwarning("入力エラー", "評価は数値で入力してください。")
-            return None
-
-    def build_item_from_form(self, item_id: int) -> dict[str, Any] | None:
-        title = self.title_entry.get().strip()
-        description = self.description_text.get("1.0", tk.END).strip()
-        category = self.category_entry.get().strip()
-        color = self.color_var.get().strip() or COLOR_CLASS_OPTIONS[0]
-        booth_url = self.booth_url_entry.get().strip() or "https://booth.pm/"
-        main_visual = self.main_visual_entry.get().strip()
-        extra_values = split_lines(self.extra_list_text.get("1.0", tk.END))
-
-        if not title:
-            messagebox.showwarning("入力不足", "タイトルを入力してください。")
-            return None
-        if not description:
-            messagebox.showwarning("入力不足", "説明を入力してください。")
-            return None
-        if not category:
-            messagebox.showwarning("入力不足", "カテゴリ表示名を入力してください。")
-            return None
-
-        price = self._parse_price()
-        if price is None:
-            return None
-
-        trailer_urls = unique_strings(self.form_trailer_urls)
-        screenshots = unique_strings(self.form_screenshots)
-
-        if self.is_game_type():
-            rating = self._parse_rating()
-            if rating is None:
-                return None
-            return {
-                "id": item_id,
-                "title": title,
-                "description": description,
-                "category": category,
-                "rating": rating,
-                "price": price,
-                "image": main_visual or "🎮",
-                "tags": extra_values,
-                "color": color,
-                "boothUrl": booth_url,
-                "trailerUrls": trailer_urls,
-                "screenshots": screenshots,
-                "inDevelopment": bool(self.in_development_var.get()),
-                "showPriceStatus": bool(self.show_price_status_var.get()),
-            }
-
-        return {
-            "id": item_id,
-            "title": title,
-            "description": description,
-            "category": category,
-            "price": price,
-            "icon": main_visual or "🛠️",
-            "features": extra_values,
-            "color": color,
-            "boothUrl": booth_url,
-            "trailerUrls": trailer_urls,
-            "screenshots": screenshots,
-            "isNew": bool(self.is_new_var.get()),
-            "inDevelopment": bool(self.in_development_var.get()),
-            "showPriceStatus": bool(self.show_price_status_var.get()),
-        }
-
-    def add_item(self) -> None:
-        type_key = self.get_selected_type_key()
-        items = self.works_data[type_key]
-        item = self.build_item_from_form(next_id(items))
-        if item is None:
-            return
-
-        items.append(item)
-        save_works_data(self.data_file, self.works_data)
-        self.refresh_list()
-        self.tree.selection_set(str(item["id"]))
-        self.tree.focus(str(item["id"]))
-        git_ok, git_message = self.sync_git("add", self.collect_commit_image_refs(item))
-        if git_ok:
-            self.status_var.set(f"追加しました: id={item['id']} / {git_message}")
-        else:
-            self.status_var.set(f"追加しました: id={item['id']} / Git未反映")
-            messagebox.showwarning("Git同期", git_message)
-
-    def update_item(self) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("選択なし", "更新する項目を選択してください。")
-            return
-        selected_id = int(selected[0])
-        type_key = self.get_selected_type_key()
-        items = self.works_data[type_key]
-
-        item = self.build_item_from_form(selected_id)
-        if item is None:
-            return
-
-        found = False
-        for idx, row in enumerate(items):
-            if int(row["id"]) == selected_id:
-                items[idx] = item
-                found = True
-                break
-        if not found:
-            messagebox.showerror("更新エラー", f"id={selected_id} が見つかりません。")
-            return
-
-        save_works_data(self.data_file, self.works_data)
-        self.refresh_list()
-        self.tree.selection_set(str(selected_id))
-        self.tree.focus(str(selected_id))
-        git_ok, git_message = self.sync_git("update", self.collect_commit_image_refs(item))
-        if git_ok:
-            self.status_var.set(f"更新しました: id={selected_id} / {git_message}")
-        else:
-            self.status_var.set(f"更新しました: id={selected_id} / Git未反映")
-            messagebox.showwarning("Git同期", git_message)
+    works = load_works_data(args.data_file)
+    type_keys = [args.type] if args.type else list(WORK_TYPE_INFO)
+    started = time.perf_counter()
+    indexes = build_works_search_indexes(works)
+    built = time.perf_counter()
+    results = {type_key: indexes[type_key].search(query) for type_key in type_keys}
+    searched = time.perf_counter()
+
+    total = 0
+    for type_key, matches in results.items():
+        if not matches:
+            continue
+        by_id = {int(row["id"]): row for row in works[type_key]}
+        print(f"[{type_key}] {WORK_TYPE_INFO[type_key]['label']}")
+        for item_id in matches:
+            row = by_id[item_id]
+            print(f'  id={row["id"]} | {row["title"]} | JPY {row["price"]}')
+        total += len(matches)
+    print(
+        f'検索: "{query}" {total}件'
+        f"（索引作成 {(built - started) * 1000:.1f} ms / 検索 {(searched - built) * 1000:.2f} ms）"
+    )
+    return 0
 
-    def delete_item(self) -> None:
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showinfo("選択なし", "削除する項目を選択してください。")
-            return
-        selected_id = int(selected[0])
-        type_key = self.get_selected_type_key()
-        items = self.works_data[type_key]
-        target = next((row for row in items if int(row["id"]) == selected_id), None)
-        if target is None:
-            messagebox.showerror("削除エラー", f"id={selected_id} が見つかりません。")
-            return
 
-        confirmed = messagebox.askyesno("確認", f'id={selected_id}「{target.get("title", "")}」を削除しますか？')
-        if not confirmed:
-            return
+def cmd_derive(args: argparse.Namespace) -> int:
+    if importlib.util.find_spec("PIL") is None:
+        print("エラー: 派生画像の生成には Pillow が必要です（pip install Pillow）。")
+        return 1
 
-        self.works_data[type_key] = [row for row in items if int(row["id"]) != selected_id]
-        save_works_data(self.data_file, self.works_data)
-        self.refresh_list()
-        self.clear_form()
-        git_ok, git_message = self.sync_git("delete")
+    manifest = load_image_manifest(IMAGE_MANIFEST_FILE)
+    unsupported: set[str] = set()
+    generated, skipped, errors = build_image_derivatives(
+        PUBLIC_DIR, manifest, collect_works_image_refs(load_works_data(args.data_file)), unsupported
+    )
+    save_image_manifest(IMAGE_MANIFEST_FILE, manifest)
+
+    for message in errors:
+        print(f"エラー: {message}")
+    for fmt in sorted(unsupported):
+        print(f"警告: {fmt} はこの環境の Pillow では書き出せないためスキップしました。")
+    print(f"派生画像: 生成 {len(generated)} 件 / 変更なし {len(skipped)} 件 / エラー {len(errors)} 件")
+
+    if generated:
+        commit_paths = [IMAGE_MANIFEST_FILE]
+        if (PUBLIC_DIR / DERIVED_DIR_NAME).exists():
+            commit_paths.append(PUBLIC_DIR / DERIVED_DIR_NAME)
+        git_ok, git_message = git_commit_and_push(commit_paths, "derive images")
         if git_ok:
-            self.status_var.set(f"削除しました: id={selected_id} / {git_message}")
+            print(git_message)
         else:
-            self.status_var.set(f"削除しました: id={selected_id} / Git未反映")
-            messagebox.showwarning("Git同期", git_message)
-
-    def add_trailer_url(self) -> None:
-        raw = self.trailer_input_var.get().strip()
-        if not raw:
-            messagebox.showwarning("入力不足", "YouTube URL を入力してください。")
-            return
-
-        normalized = normalize_youtube_url(raw)
-        if not normalized:
-            messagebox.showwarning("入力エラー", "YouTube URL の形式が不正です。")
-            return
-        if normalized in self.form_trailer_urls:
-            messagebox.showinfo("重複", "そのURLはすでに追加されています。")
-            return
-
-        self.form_trailer_urls.append(normalized)
-        self.trailer_input_var.set("")
-        self.refresh_media_listboxes()
-
-    def remove_trailer_url(self) -> None:
-        selected = self.trailer_listbox.curselection()
-        if not selected:
-            return
-        del self.form_trailer_urls[selected[0]]
-        self.refresh_media_listboxes()
+            print(f"警告: {git_message}")
+    return 1 if errors else 0
 
-    def clear_trailer_urls(self) -> None:
-        self.form_trailer_urls = []
-        self.refresh_media_listboxes()
 
-    def _add_screenshot_value(self, value: str) -> None:
-        text = value.strip()
-        if not text:
-            messagebox.showwarning("入力不足", "スクショ値を入力してください。")
-            return
-        normalized = normalize_image_reference(text) if any(ext in text.lower() for ext in IMAGE_EXTENSIONS) else text
-        if normalized in self.form_screenshots:
-            messagebox.showinfo("重複", "その値はすでに追加されています。")
-            return
-        self.form_screenshots.append(normalized)
-        self.screenshot_input_var.set("")
-        self.refresh_media_listboxes()
+def cmd_publish(args: argparse.Namespace) -> int:
+    changes = load_pending_changes(args.data_file)
+    if not changes:
+        print("公開する変更はありません。")
+        return 0
 
-    def add_screenshot(self) -> None:
-        self._add_screenshot_value(self.screenshot_input_var.get())
+    commit_paths = data_commit_paths(args.data_file) + pending_change_paths(changes)
+    git_ok, git_message = git_commit_and_push(commit_paths, build_publish_message("works", changes))
+    if not git_ok:
+        print(f"警告: {git_message}")
+        return 1
 
-    def browse_screenshot(self) -> None:
-        selected = filedialog.askopenfilename(
-            title="スクリーンショット画像を選択",
-            initialdir=str(self.public_dir),
-            filetypes=[("画像ファイル", "*.png *.jpg *.jpeg *.webp *.gif *.bmp *.svg *.avif"), ("すべてのファイル", "*.*")],
-        )
-        if not selected:
-            return
+    discard_pending_changes(args.data_file, len(changes))
+    print(f"{len(changes)} 件の変更を公開しました。")
+    print(git_message)
+    return 0
 
-        selected_path = Path(selected).resolve()
-        public_root = self.public_dir.resolve()
-        try:
-            image_ref = selected_path.relative_to(public_root).as_posix()
-        except ValueError:
-            target = safe_public_target(self.public_dir, selected_path.name)
-            try:
-                shutil.copy2(selected_path, target)
-            except Exception as exc:  # noqa: BLE001
-                messagebox.showerror("コピーエラー", f"画像のコピーに失敗しました:\n{exc}")
-                return
-            image_ref = target.relative_to(self.public_dir).as_posix()
-            messagebox.showinfo("画像をコピーしました", f"public/{image_ref} にコピーしました。")
 
-        self._add_screenshot_value(image_ref)
-        self.refresh_public_images()
+def cmd_export(args: argparse.Namespace) -> int:
+    works = load_works_data(args.data_file)
+    artifacts = write_minified_artifacts(args.data_file, works)
+    artifacts += write_works_search_index(args.data_file, works)
+    print_size_report(args.data_file, artifacts)
+    git_ok, git_message = git_commit_and_push([path for path, _ in artifacts], "export minified works")
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
+    return 0
 
-    def remove_screenshot(self) -> None:
-        selected = self.screenshot_listbox.curselection()
-        if not selected:
-            return
-        del self.form_screenshots[selected[0]]
-        self.refresh_media_listboxes()
 
-    def clear_screenshots(self) -> None:
-        self.form_screenshots = []
-        self.refresh_media_listboxes()
+def cmd_rollback(args: argparse.Namespace) -> int:
+    if args.revision is None:
+        print_snapshots(args.data_file)
+        return 0
 
+    try:
+        snapshot = read_snapshot(args.data_file, args.revision)
+    except FileNotFoundError:
+        print(f"エラー: リビジョン {args.revision} の版は残っていません。rollback だけで一覧を表示できます。")
+        return 1
+    except json.JSONDecodeError as exc:
+        print(f"エラー: リビジョン {args.revision} の版を読み込めません: {exc}")
+        return 1
+    if not isinstance(snapshot, dict):
+        print(f"エラー: リビジョン {args.revision} の版は SHOP データの形式ではありません。")
+        return 1
 
-def run_gui(data_file: Path) -> int:
-    root = tk.Tk()
-    ShopGui(root, data_file)
-    root.mainloop()
+    # 今の内容も保存時に版として残るので、戻したこと自体も rollback で取り消せる
+    works = normalize_works_data(snapshot)
+    revision = save_works_data(args.data_file, works)
+    counts = " / ".join(f"{type_key} {len(works[type_key])}件" for type_key in WORK_TYPE_INFO)
+    print(f"リビジョン {args.revision} の内容に戻しました（{counts} / 新しいリビジョン {revision}）。")
+    commit_message = f"rollback works to revision {args.revision}"
+    git_ok, git_message = git_commit_and_push(data_commit_paths(args.data_file), commit_message)
+    if git_ok:
+        print(git_message)
+    else:
+        print(f"警告: {git_message}")
     return 0
 
 
-def cmd_list(args: argparse.Namespace) -> int:
-    works = load_works_data(args.data_file)
-    if args.type:
-        type_key = args.type
-        if type_key not in WORK_TYPE_INFO:
-            print(f"未対応タイプ: {type_key}")
-            return 1
-        print(f"[{type_key}] {WORK_TYPE_INFO[type_key]['label']}")
-        for row in works[type_key]:
-            print(f'  id={row["id"]} | {row["title"]} | JPY {row["price"]}')
-        return 0
+def cmd_validate(args: argparse.Namespace) -> int:
+    # 正規化すると問題のある要素が落ちたり補われたりするので、読み込む前の JSON を検査する
+    try:
+        with args.data_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"エラー: {args.data_file} を読み込めません: {exc}")
+        return 1
 
-    for type_key, info in WORK_TYPE_INFO.items():
-        print(f"{type_key:14} {info['label']:12} {len(works[type_key])}件")
-    return 0
+    report = validate_works(data)
+    save_validation_cache()
+    print_validation_report(report)
+    return 1 if report.errors else 0
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -1019,21 +234,52 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "command",
         nargs="?",
-        choices=("gui", "list"),
+        choices=("gui", "list", "publish", "derive", "export", "search", "rollback", "validate"),
         default="gui",
         help="実行コマンド（省略時: gui）",
     )
-    parser.add_argument("--type", choices=tuple(WORK_TYPE_INFO.keys()), help="list時に対象タイプを指定")
+    parser.add_argument("--type", choices=tuple(WORK_TYPE_INFO.keys()), help="list / search 時に対象タイプを指定")
+    parser.add_argument("--query", help="search で使う検索語（空白区切りで AND 検索）")
+    parser.add_argument("--revision", type=int, help="rollback で戻すリビジョン（省略時は残っている版を一覧表示）")
+    parser.add_argument(
+        "--stage",
+        action="store_true",
+        help="GUIで変更ごとに commit/push せず、公開ボタンでまとめて公開する",
+    )
+    parser.add_argument("--git-timing", action="store_true", help="Git の各ステップの所要時間を表示する")
     return parser
 
 
 def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
+    try:
+        exit_code = run_command(parser, args)
+    except (DataLockTimeout, DataMetaError) as exc:
+        print(f"エラー: {exc}")
+        return 1
+    if args.git_timing and GIT_SESSION.last_timings:
+        print(f"Git所要時間: {GIT_SESSION.timing_summary()}")
+    return exit_code
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     if args.command == "gui":
-        return run_gui(args.data_file)
+        return run_gui(args.data_file, stage=args.stage)
     if args.command == "list":
         return cmd_list(args)
+    if args.command == "publish":
+        return cmd_publish(args)
+    if args.command == "derive":
+        return cmd_derive(args)
+    if args.command == "export":
+        return cmd_export(args)
+    if args.command == "search":
+        return cmd_search(args)
+    if args.command == "rollback":
+        return cmd_rollback(args)
+    if args.command == "validate":
+        return cmd_validate(args)
     parser.error("不明なコマンドです。")
     return 1
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# ツールと同じく scripts/ を基準に homepage_tools を読み込む
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
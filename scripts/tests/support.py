@@ -0,0 +1,39 @@
+"""一時ディレクトリのデータファイルを使うテストの土台。"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from homepage_tools import validation
+from homepage_tools.locking import lock_file_for
+from homepage_tools.records import journal_file_for
+from homepage_tools.snapshots import snapshot_dir_for
+from homepage_tools.staging import pending_file_for
+
+
+def remove_state_files(data_file: Path) -> None:
+    # ロックや旧版はリポジトリの .tool-state 側に作られるので、テストの分を片付ける
+    shutil.rmtree(snapshot_dir_for(data_file), ignore_errors=True)
+    for path in (lock_file_for(data_file), journal_file_for(data_file), pending_file_for(data_file)):
+        path.unlink(missing_ok=True)
+
+
+class TempDataTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        # 検査結果のキャッシュも本物と混ざらないよう一時ディレクトリに置く
+        cache = validation.ValidationCache(self.temp_dir / "validation-cache.json")
+        patcher = mock.patch.object(validation, "_validation_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def data_path(self, name: str) -> Path:
+        data_file = self.temp_dir / name
+        self.addCleanup(remove_state_files, data_file)
+        return data_file
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from support import TempDataTestCase
+
+from homepage_tools.records import (
+    append_journal,
+    journal_put,
+    load_records,
+    save_records,
+    shard_dir_for,
+    write_record_shards,
+)
+
+
+def record(record_id: int) -> dict:
+    return {
+        "id": record_id,
+        "title": f"記録{record_id}",
+        "date": "2026-01-01",
+        "description": "説明",
+        "images": [],
+        "youtubeUrls": ["https://youtu.be/dQw4w9WgXcQ"],
+    }
+
+
+class JournalAndSaveTest(TempDataTestCase):
+    def test_plain_save_writes_shards_for_flushed_journal_entries(self) -> None:
+        data_file = self.data_path("records-data.json")
+        revision = save_records(data_file, [record(1)], {1})
+        write_record_shards(data_file, load_records(data_file))
+
+        revision = append_journal(data_file, [journal_put(record(2))], revision)
+        save_records(data_file, [*load_records(data_file), record(3)], {3}, revision)
+
+        items_dir = shard_dir_for(data_file) / "items"
+        self.assertEqual(sorted(path.name for path in items_dir.glob("*.json")), ["1.json", "2.json", "3.json"])
+        self.assertEqual([item["id"] for item in load_records(data_file)], [1, 2, 3])
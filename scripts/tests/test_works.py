@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from support import TempDataTestCase
+
+from homepage_tools.works import blank_works_data, load_works_data, save_works_data
+
+
+def game_item(**fields):
+    return {
+        "id": 1,
+        "title": "テストゲーム",
+        "description": "説明",
+        "category": "アクション",
+        "rating": 4.5,
+        "price": 500,
+        "image": "🎮",
+        "tags": [],
+        "color": "from-cyan-400 to-blue-400",
+        "boothUrl": "https://booth.pm/",
+        "trailerUrls": [],
+        "screenshots": [],
+        "inDevelopment": False,
+        "showPriceStatus": False,
+        **fields,
+    }
+
+
+class SaveWorksDataTest(TempDataTestCase):
+    def test_text_and_emoji_screenshots_are_not_image_refs(self) -> None:
+        data_file = self.data_path("works-data.json")
+        data = {**blank_works_data(), "games": [game_item(screenshots=["🎮", "準備中"])]}
+
+        revision = save_works_data(data_file, data, None, {("games", 1)})
+
+        self.assertEqual(revision, 1)
+        self.assertEqual(load_works_data(data_file)["games"][0]["screenshots"], ["🎮", "準備中"])